@@ -0,0 +1,298 @@
+import argparse
+import contextlib
+import io
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from ephemeries import EPHEMERIS_BACKENDS, DualFileEphemerisGenerator, ensure_utc, utc_sample_times
+
+# Fixed fixtures so runs are comparable between commits
+OBSERVER = (52.9822196, 36.1406844, 220)
+BODY = 'moon'
+START_DATE = ensure_utc(datetime(2025, 6, 10, 0, 0, 0))
+STREAM_INTERVAL = 60
+STREAM_SAMPLES = 10080       # One week of 1-minute samples
+SCALAR_SAMPLES = 200         # Per-call paths are slow, keep their sample count small
+EVENT_DAYS = 30
+
+DEFAULT_BASELINE = 'benchmark_baseline.json'
+DEFAULT_TOLERANCE = 0.25     # Allowed relative throughput drop / memory growth before a case fails
+MIN_RUN_SECONDS = 0.2        # Fast cases are called repeatedly until one timed run lasts this long
+MIN_MEMORY_GROWTH_MB = 1.0   # Memory growth below this is allocator noise, never a regression
+
+# Linux resets a process's peak RSS (VmHWM in /proc/self/status) when '5' is written here
+CLEAR_REFS_PATH = '/proc/self/clear_refs'
+PROC_STATUS_PATH = '/proc/self/status'
+
+
+class BenchmarkContext:
+    """Generator and precomputed inputs shared by every benchmark case."""
+
+    def __init__(self, output_dir, backend='skyfield', backend_options=None):
+        self.output_dir = Path(output_dir)
+        self.generator = DualFileEphemerisGenerator(*OBSERVER, backend=backend, backend_options=backend_options)
+        self.body = self.generator.resolve_bodies([BODY])[BODY]
+        self.end_date = START_DATE + timedelta(days=EVENT_DAYS)
+        self.stream_end = START_DATE + timedelta(seconds=(STREAM_SAMPLES - 1) * STREAM_INTERVAL)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.stream_records = self.generator.calculate_stream_chunk(
+                self.body, BODY, START_DATE, STREAM_SAMPLES, STREAM_INTERVAL
+            )
+            self.events = self.generator.generate_events(
+                self.body, BODY, START_DATE, self.stream_end, self.stream_records
+            )
+
+    def sample_times(self, count):
+        return utc_sample_times(self.generator.ts, START_DATE, count, STREAM_INTERVAL)
+
+    def output_file(self, name):
+        return self.output_dir / name
+
+
+# Each case returns (unit, items processed, bytes written)
+def bench_stream_scalar(ctx):
+    for i in range(SCALAR_SAMPLES):
+        ctx.generator.calculate_stream_data(ctx.body, BODY, START_DATE + timedelta(seconds=i * STREAM_INTERVAL))
+    return 'samples', SCALAR_SAMPLES, 0
+
+
+def bench_stream_chunk(ctx):
+    ctx.generator.calculate_stream_chunk(ctx.body, BODY, START_DATE, STREAM_SAMPLES, STREAM_INTERVAL)
+    return 'samples', STREAM_SAMPLES, 0
+
+
+def bench_closest_planet_scalar(ctx):
+    t = ctx.sample_times(SCALAR_SAMPLES)
+    for i in range(SCALAR_SAMPLES):
+        ctx.generator.find_closest_planet(ctx.body, t[i], BODY)
+    return 'samples', SCALAR_SAMPLES, 0
+
+
+def bench_closest_planets(ctx):
+    ctx.generator.find_closest_planets(ctx.body, ctx.sample_times(STREAM_SAMPLES), BODY)
+    return 'samples', STREAM_SAMPLES, 0
+
+
+def bench_rise_set_events(ctx):
+    events = ctx.generator.find_rise_set_events(ctx.body, BODY, START_DATE, ctx.end_date)
+    return 'events', len(events), 0
+
+
+def bench_moon_phase_events(ctx):
+    events = ctx.generator.find_moon_phase_events(ctx.body, BODY, START_DATE, ctx.end_date)
+    return 'events', len(events), 0
+
+
+def bench_stream_events(ctx):
+    events = ctx.generator.find_stream_events(ctx.stream_records, BODY)
+    return 'events', len(events), 0
+
+
+def bench_write_binary_stream(ctx):
+    filename = ctx.output_file('stream.bin')
+    ctx.generator.write_binary_stream(ctx.stream_records, filename, BODY, START_DATE, ctx.stream_end, STREAM_INTERVAL)
+    return 'samples', len(ctx.stream_records), filename.stat().st_size
+
+
+def bench_write_binary_events(ctx):
+    filename = ctx.output_file('events.bin')
+    ctx.generator.write_binary_events(ctx.events, filename, BODY)
+    return 'events', len(ctx.events), filename.stat().st_size
+
+
+def bench_write_ephe_file(ctx):
+    filename = ctx.output_file('ephe.bin')
+    ctx.generator.write_ephe_file(ctx.stream_records, ctx.events, filename, BODY, STREAM_INTERVAL)
+    return 'samples', len(ctx.stream_records), filename.stat().st_size
+
+
+def bench_write_compressed_stream(ctx):
+    filename = ctx.output_file('stream.ephz')
+    ctx.generator.write_compressed_stream(ctx.stream_records, filename, STREAM_INTERVAL)
+    return 'samples', len(ctx.stream_records), filename.stat().st_size
+
+
+BENCHMARKS = {
+    'stream_scalar': bench_stream_scalar,
+    'stream_chunk': bench_stream_chunk,
+    'closest_planet_scalar': bench_closest_planet_scalar,
+    'closest_planets': bench_closest_planets,
+    'rise_set_events': bench_rise_set_events,
+    'moon_phase_events': bench_moon_phase_events,
+    'stream_events': bench_stream_events,
+    'write_binary_stream': bench_write_binary_stream,
+    'write_binary_events': bench_write_binary_events,
+    'write_ephe_file': bench_write_ephe_file,
+    'write_compressed_stream': bench_write_compressed_stream,
+}
+
+
+def time_case(ctx, name):
+    """Seconds per call of one case, calling it until MIN_RUN_SECONDS have been timed (fresh position cache per call)."""
+    calls = 0
+    elapsed = 0.0
+    while elapsed < MIN_RUN_SECONDS:
+        ctx.generator.reset_run()
+        started = time.perf_counter()
+        outcome = BENCHMARKS[name](ctx)
+        elapsed += time.perf_counter() - started
+        calls += 1
+    return outcome, elapsed / calls
+
+
+def peak_allocated_mb(ctx, name):
+    """Peak memory one call of a case allocates on top of what was live before it (NumPy buffers included)."""
+    ctx.generator.reset_run()
+    tracemalloc.start()
+    try:
+        BENCHMARKS[name](ctx)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return peak / (1024 * 1024)
+
+
+def rss_status_mb():
+    """Current and peak resident set size of this process in MB, or (None, None) without /proc."""
+    values = {}
+    try:
+        with open(PROC_STATUS_PATH) as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('VmRSS', 'VmHWM'):
+                    values[key] = int(value.split()[0]) / 1024  # kB
+    except OSError:
+        return None, None
+    return values.get('VmRSS'), values.get('VmHWM')
+
+
+def peak_rss_mb(ctx, name):
+    """Peak RSS of the process during one call of a case, and how far it rose above the RSS before it.
+
+    Needs Linux's resettable VmHWM; returns (None, None) where the peak cannot be
+    scoped to a single case (the lifetime maximum from getrusage would hide it).
+    """
+    ctx.generator.reset_run()
+    try:
+        with open(CLEAR_REFS_PATH, 'w') as f:
+            f.write('5')
+    except OSError:
+        return None, None
+    before, _ = rss_status_mb()
+    BENCHMARKS[name](ctx)
+    _, peak = rss_status_mb()
+    if before is None or peak is None:
+        return None, None
+    return peak, peak - before
+
+
+def run_benchmark(ctx, name, repeat):
+    """Time one case `repeat` times and keep the fastest, then measure its memory in separate calls."""
+    best = None
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            (unit, items, bytes_written), seconds = time_case(ctx, name)
+            best = seconds if best is None else min(best, seconds)
+        # Neither memory measurement overlaps the timed calls, and RSS is read without tracing overhead
+        rss_mb, rss_growth_mb = peak_rss_mb(ctx, name)
+        peak_mb = peak_allocated_mb(ctx, name)
+
+    return {
+        'unit': unit,
+        'items': items,
+        'seconds': round(best, 6),
+        'throughput': round(items / max(best, 1e-9), 3),
+        'bytes_written': bytes_written,
+        'peak_alloc_mb': round(peak_mb, 1),
+        'peak_rss_mb': None if rss_mb is None else round(rss_mb, 1),
+        'rss_growth_mb': None if rss_growth_mb is None else round(rss_growth_mb, 1),
+    }
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """Return a list of regression messages (empty when every case is within tolerance)."""
+    failures = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        if result['throughput'] < reference['throughput'] * (1 - tolerance):
+            failures.append(f"{name}: {result['throughput']:,.1f} {result['unit']}/s, "
+                            f"baseline {reference['throughput']:,.1f} {reference['unit']}/s")
+        if result['bytes_written'] != reference['bytes_written']:
+            failures.append(f"{name}: wrote {result['bytes_written']:,} bytes, "
+                            f"baseline {reference['bytes_written']:,} bytes")
+        # Older baselines, and platforms without a resettable peak RSS, lack some memory metrics
+        for metric, label in (('peak_alloc_mb', 'peak allocation'), ('rss_growth_mb', 'RSS growth')):
+            reference_mb = reference.get(metric)
+            if reference_mb is None or result[metric] is None:
+                continue
+            if result[metric] > max(reference_mb * (1 + tolerance), reference_mb + MIN_MEMORY_GROWTH_MB):
+                failures.append(f"{name}: {label} {result[metric]:.1f} MB, baseline {reference_mb:.1f} MB")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark ephemeris generation hot paths against a JSON baseline')
+    parser.add_argument('cases', nargs='*', help=f'Cases to run (default: all of {", ".join(BENCHMARKS)})')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='Write the results as the new baseline')
+    parser.add_argument('--output', help='Also write the results to this JSON file')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per case; the fastest is kept')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Allowed relative throughput drop / memory growth')
+    parser.add_argument('--backend', default='skyfield', choices=list(EPHEMERIS_BACKENDS),
+                        help='Stream position backend (compare against a baseline saved with the same backend)')
+    parser.add_argument('--ephemeris-file', help='EPHD coefficient store for the native backend')
+    args = parser.parse_args()
+
+    unknown = [name for name in args.cases if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark cases: {', '.join(unknown)}")
+    cases = args.cases or list(BENCHMARKS)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as output_dir:
+        print("Preparing fixtures...")
+        backend_options = {'ephemeris_file': args.ephemeris_file} if args.ephemeris_file else None
+        ctx = BenchmarkContext(output_dir, args.backend, backend_options)
+
+        print(f"\n  {'case':<26}{'seconds':>10}{'throughput':>16}{'':<11}{'bytes':>12}{'peak alloc':>13}"
+              f"{'peak RSS':>13}{'RSS growth':>13}")
+        for name in cases:
+            result = results[name] = run_benchmark(ctx, name, args.repeat)
+            rss = ''.join(f"{'n/a':>13}" if result[metric] is None else f"{result[metric]:>10.1f} MB"
+                          for metric in ('peak_rss_mb', 'rss_growth_mb'))
+            print(f"  {name:<26}{result['seconds']:>10.3f}{result['throughput']:>16,.0f} {result['unit'] + '/s':<10}"
+                  f"{result['bytes_written']:>12,}{result['peak_alloc_mb']:>10.1f} MB{rss}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+    if args.save_baseline:
+        baseline = json.loads(Path(args.baseline).read_text()) if Path(args.baseline).exists() else {}
+        baseline.update(results)
+        Path(args.baseline).write_text(json.dumps(baseline, indent=2))
+        print(f"\nBaseline saved: {args.baseline}")
+        return
+
+    if not Path(args.baseline).exists():
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one")
+        return
+
+    failures = compare_to_baseline(results, json.loads(Path(args.baseline).read_text()), args.tolerance)
+    if failures:
+        print(f"\nREGRESSIONS against {args.baseline}:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print(f"\nAll cases within {args.tolerance:.0%} of {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
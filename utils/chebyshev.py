@@ -0,0 +1,239 @@
+import argparse
+import struct
+import time
+from pathlib import Path
+import numpy as np
+from numpy.polynomial import chebyshev
+
+from ephemeries import STREAM_HEADER_SIZE, STREAM_RECORD_DTYPE
+from ephemeris_reader import StreamFileReader
+
+# Chebyshev coefficient file (EPHC v1): header, then variable-length segments.
+# Each segment covers [start, start + duration] and stores the same number of
+# float64 coefficients for every channel, channel after channel.
+CHEBYSHEV_MAGIC = b'EPHC'
+CHEBYSHEV_VERSION = 1
+CHEBYSHEV_HEADER_FORMAT = '<4sIIIIfff'
+CHEBYSHEV_HEADER_SIZE = struct.calcsize(CHEBYSHEV_HEADER_FORMAT)  # 32 bytes
+CHEBYSHEV_SEGMENT_FORMAT = '<IIHH'  # start timestamp, duration, coefficients per channel, reserved
+CHEBYSHEV_SEGMENT_SIZE = struct.calcsize(CHEBYSHEV_SEGMENT_FORMAT)  # 12 bytes
+CHEBYSHEV_CHANNELS = ('phase', 'distance_km', 'azimuth_deg', 'altitude_deg')
+
+# Default fit settings
+DEFAULT_WINDOW_SECONDS = 86400
+DEFAULT_MAX_DEGREE = 24
+MIN_SEGMENT_SAMPLES = 8
+DEFAULT_MAX_ERRORS = {
+    'phase': 1e-4,
+    'distance_km': 1.0,
+    'azimuth_deg': 0.01,
+    'altitude_deg': 0.01,
+}
+
+
+def stream_channels(records):
+    """Return the dense stream as a (samples x channels) float64 matrix, azimuth unwrapped."""
+    values = np.column_stack([records[channel].astype(np.float64) for channel in CHEBYSHEV_CHANNELS])
+    azimuth = CHEBYSHEV_CHANNELS.index('azimuth_deg')
+    values[:, azimuth] = np.unwrap(values[:, azimuth], period=360.0)
+    return values
+
+
+def effective_max_errors(records, max_errors=None):
+    """Merge `max_errors` with the defaults, never tighter than the stream's float32 resolution."""
+    max_errors = dict(DEFAULT_MAX_ERRORS, **(max_errors or {}))
+    # No fit can beat the rounding step of the stored values (e.g. ~16 km for the Sun's distance)
+    for channel in CHEBYSHEV_CHANNELS:
+        resolution = float(np.spacing(np.float32(np.abs(records[channel]).max()))) if len(records) else 0.0
+        max_errors[channel] = max(max_errors[channel], resolution)
+    return max_errors
+
+
+def fit_segment(timestamps, values, max_errors, max_degree):
+    """Fit the lowest degree that meets every channel's max error, or return None."""
+    start, end = timestamps[0], timestamps[-1]
+    x = 2.0 * (timestamps - start) / (end - start) - 1.0
+    tolerance = np.array([max_errors[channel] for channel in CHEBYSHEV_CHANNELS])
+
+    for degree in range(2, min(max_degree, len(timestamps) - 1) + 1):
+        coefficients = chebyshev.chebfit(x, values, degree)
+        errors = np.abs(chebyshev.chebval(x, coefficients).T - values).max(axis=0)
+        if np.all(errors <= tolerance):
+            return coefficients.T
+    return None
+
+
+def fit_chebyshev_segments(records, window_seconds=DEFAULT_WINDOW_SECONDS,
+                           max_degree=DEFAULT_MAX_DEGREE, max_errors=None):
+    """Fit Chebyshev segments to a dense stream.
+
+    Windows that cannot meet `max_errors` at `max_degree` are split in half
+    until they do (or reach MIN_SEGMENT_SAMPLES samples, which are then fit
+    at the highest degree available). Returns a list of
+    (start_timestamp, duration_seconds, coefficients[channel, k]) tuples.
+    """
+    max_errors = effective_max_errors(records, max_errors)
+    timestamps = records['timestamp'].astype(np.int64)
+    values = stream_channels(records)
+    interval = int(timestamps[1] - timestamps[0]) if len(timestamps) > 1 else 1
+    samples_per_window = max(MIN_SEGMENT_SAMPLES, window_seconds // interval)
+
+    segments = []
+    pending = [
+        (first, min(first + samples_per_window, len(timestamps) - 1))
+        for first in range(0, max(len(timestamps) - 1, 1), samples_per_window)
+    ]
+    while pending:
+        first, last = pending.pop(0)
+        # Segments share their boundary sample so evaluation is continuous
+        segment_times = timestamps[first:last + 1]
+        segment_values = values[first:last + 1]
+        if len(segment_times) < 2:
+            segments.append((int(segment_times[0]), 0, segment_values[:1].T.copy()))
+            continue
+
+        coefficients = fit_segment(segment_times, segment_values, max_errors, max_degree)
+        if coefficients is None and last - first >= 2 * MIN_SEGMENT_SAMPLES:
+            middle = (first + last) // 2
+            pending[:0] = [(first, middle), (middle, last)]
+            continue
+        if coefficients is None:
+            degree = min(max_degree, len(segment_times) - 1)
+            x = 2.0 * (segment_times - segment_times[0]) / (segment_times[-1] - segment_times[0]) - 1.0
+            coefficients = chebyshev.chebfit(x, segment_values, degree).T
+
+        segments.append((int(segment_times[0]), int(segment_times[-1] - segment_times[0]), coefficients))
+
+    return segments
+
+
+def write_chebyshev_file(segments, filename, observer_lat=0.0, observer_lon=0.0, observer_elevation=0.0):
+    """Write fitted segments to an EPHC coefficient file."""
+    start_timestamp = segments[0][0] if segments else 0
+    end_timestamp = segments[-1][0] + segments[-1][1] if segments else 0
+
+    with open(filename, 'wb') as f:
+        f.write(struct.pack(
+            CHEBYSHEV_HEADER_FORMAT,
+            CHEBYSHEV_MAGIC,
+            CHEBYSHEV_VERSION,
+            len(segments),
+            start_timestamp,
+            end_timestamp,
+            observer_lat,
+            observer_lon,
+            observer_elevation
+        ))
+        for start, duration, coefficients in segments:
+            f.write(struct.pack(CHEBYSHEV_SEGMENT_FORMAT, start, duration, coefficients.shape[1], 0))
+            f.write(np.ascontiguousarray(coefficients, dtype='<f8').tobytes())
+
+    return Path(filename).stat().st_size
+
+
+class ChebyshevEphemeris:
+    """Evaluator for EPHC coefficient files at arbitrary (sub-minute) timestamps."""
+
+    def __init__(self, filename):
+        data = Path(filename).read_bytes()
+        header = struct.unpack_from(CHEBYSHEV_HEADER_FORMAT, data)
+        if header[0] != CHEBYSHEV_MAGIC:
+            raise ValueError(f"{filename}: bad magic number {header[0]!r}, expected {CHEBYSHEV_MAGIC!r}")
+        if header[1] != CHEBYSHEV_VERSION:
+            raise ValueError(f"{filename}: unsupported Chebyshev file version {header[1]}")
+
+        self.segment_count = header[2]
+        self.start_timestamp = header[3]
+        self.end_timestamp = header[4]
+        self.observer_lat, self.observer_lon, self.observer_elevation = header[5:8]
+
+        self.starts = np.zeros(self.segment_count, dtype=np.int64)
+        self.durations = np.zeros(self.segment_count, dtype=np.int64)
+        self.coefficients = []
+        offset = CHEBYSHEV_HEADER_SIZE
+        for i in range(self.segment_count):
+            start, duration, count, _ = struct.unpack_from(CHEBYSHEV_SEGMENT_FORMAT, data, offset)
+            offset += CHEBYSHEV_SEGMENT_SIZE
+            coefficients = np.frombuffer(data, dtype='<f8', count=count * len(CHEBYSHEV_CHANNELS), offset=offset)
+            offset += coefficients.nbytes
+            self.starts[i] = start
+            self.durations[i] = duration
+            self.coefficients.append(coefficients.reshape(len(CHEBYSHEV_CHANNELS), count))
+
+    def evaluate(self, timestamps):
+        """Evaluate every channel at custom epoch `timestamps` (seconds, may be fractional).
+
+        Returns a dict of channel name -> float64 array; timestamps outside the
+        fitted range are clamped to the nearest segment.
+        """
+        timestamps = np.atleast_1d(np.asarray(timestamps, dtype=np.float64))
+        segment_index = np.clip(np.searchsorted(self.starts, timestamps, side='right') - 1, 0, self.segment_count - 1)
+        values = np.zeros((len(CHEBYSHEV_CHANNELS), len(timestamps)))
+
+        for i in np.unique(segment_index):
+            mask = segment_index == i
+            duration = max(self.durations[i], 1)
+            x = np.clip(2.0 * (timestamps[mask] - self.starts[i]) / duration - 1.0, -1.0, 1.0)
+            values[:, mask] = chebyshev.chebval(x, self.coefficients[i].T)
+
+        result = dict(zip(CHEBYSHEV_CHANNELS, values))
+        result['azimuth_deg'] = np.mod(result['azimuth_deg'], 360.0)
+        return result
+
+
+def error_report(ephemeris, records):
+    """Compare an evaluator against the dense stream; returns max/RMS error per channel."""
+    evaluated = ephemeris.evaluate(records['timestamp'].astype(np.float64))
+    report = {}
+    for channel in CHEBYSHEV_CHANNELS:
+        difference = evaluated[channel] - records[channel].astype(np.float64)
+        if channel == 'azimuth_deg':
+            difference = (difference + 180.0) % 360.0 - 180.0
+        report[channel] = (float(np.abs(difference).max()), float(np.sqrt(np.mean(difference ** 2))))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fit Chebyshev segments to an EPHS stream and report errors')
+    parser.add_argument('stream_file', help='EPHS stream file to compress')
+    parser.add_argument('output_file', help='EPHC coefficient file to write')
+    parser.add_argument('--window-hours', type=float, default=DEFAULT_WINDOW_SECONDS / 3600,
+                        help='Initial segment window in hours')
+    parser.add_argument('--max-degree', type=int, default=DEFAULT_MAX_DEGREE,
+                        help='Highest Chebyshev degree before a window is split')
+    for channel, default in DEFAULT_MAX_ERRORS.items():
+        parser.add_argument(f'--max-error-{channel.split("_")[0]}', type=float, default=default,
+                            dest=f'max_error_{channel}', help=f'Max {channel} error (default {default})')
+    args = parser.parse_args()
+
+    stream = StreamFileReader(args.stream_file)
+    records = np.array(stream.records)
+    max_errors = effective_max_errors(
+        records, {channel: getattr(args, f'max_error_{channel}') for channel in CHEBYSHEV_CHANNELS}
+    )
+
+    print(f"Fitting {len(records)} records from {args.stream_file}")
+    fit_start = time.perf_counter()
+    segments = fit_chebyshev_segments(records, int(args.window_hours * 3600), args.max_degree, max_errors)
+    fit_seconds = time.perf_counter() - fit_start
+
+    file_size = write_chebyshev_file(
+        segments, args.output_file, stream.observer_lat, stream.observer_lon, stream.observer_elevation
+    )
+    dense_size = STREAM_HEADER_SIZE + len(records) * STREAM_RECORD_DTYPE.itemsize
+    print(f"  Segments: {len(segments)}, fit time: {fit_seconds:.2f}s")
+    print(f"  Size: {file_size:,} bytes vs {dense_size:,} bytes dense ({dense_size / file_size:.1f}x smaller)")
+
+    ephemeris = ChebyshevEphemeris(args.output_file)
+    eval_start = time.perf_counter()
+    report = error_report(ephemeris, records)
+    eval_seconds = time.perf_counter() - eval_start
+    print(f"  Evaluation: {len(records) / max(eval_seconds, 1e-9):,.0f} samples/s")
+
+    print(f"\n  {'channel':<14}{'max error':>14}{'rms error':>14}{'limit':>12}")
+    for channel, (max_error, rms_error) in report.items():
+        print(f"  {channel:<14}{max_error:>14.6g}{rms_error:>14.6g}{max_errors[channel]:>12g}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+import argparse
+import glob
+import struct
+import time
+from pathlib import Path
+import numpy as np
+
+# DE coefficient store (EPHD v1): header, body table, then `record count` float64
+# records of `coefficients per record` values each, starting at `data offset`
+# so the whole block can be np.memmap'd as a (records x coefficients) array.
+# Each record is one DE ASCII block: [start JD, end JD, body coefficients...].
+DE_MAGIC = b'EPHD'
+DE_VERSION = 1
+DE_HEADER_FORMAT = '<4sIIIIIddd'  # magic, version, coefficients per record, record count, body count, data offset, start JD, end JD, record days
+DE_HEADER_SIZE = struct.calcsize(DE_HEADER_FORMAT)  # 48 bytes
+DE_BODY_FORMAT = '<IIII'  # first coefficient (0-based), coefficients per component, subintervals, components
+DE_BODY_SIZE = struct.calcsize(DE_BODY_FORMAT)  # 16 bytes
+DE_DATA_ALIGNMENT = 64
+
+# DE430 record layout (GROUP 1050 of header.430_572, first coefficient 1-based as in the header)
+DE430_COEFFICIENTS = 1018
+DE430_BODIES = (
+    'mercury', 'venus', 'earth_moon_barycenter', 'mars', 'jupiter', 'saturn', 'uranus',
+    'neptune', 'pluto', 'moon', 'sun', 'nutations', 'librations', 'tt_tdb'
+)
+DE430_LAYOUT = (
+    (3, 14, 4), (171, 10, 2), (231, 13, 2), (309, 11, 1), (342, 8, 1), (366, 7, 1), (387, 6, 1),
+    (405, 6, 1), (423, 6, 1), (441, 13, 8), (753, 11, 2), (819, 10, 4), (899, 10, 4)
+)
+COMPONENTS = {'nutations': 2, 'tt_tdb': 1}  # Everything else is x, y, z
+
+DEFAULT_INPUT_PATTERN = './data/ascp*.430'
+DEFAULT_OUTPUT_FILE = './data/de430.ephd'
+
+
+def body_table(layout):
+    """(name, first coefficient 0-based, coefficients, subintervals, components) for each body in a GROUP 1050 layout."""
+    return [
+        (name, first - 1, count, subintervals, COMPONENTS.get(name, 3))
+        for name, (first, count, subintervals) in zip(DE430_BODIES, layout)
+    ]
+
+
+def read_ascii_header(filename):
+    """Read the coefficient count and GROUP 1050 layout from a DE ASCII header (header.430_572)."""
+    coefficient_count = None
+    groups = {}
+    group = None
+    for line in Path(filename).read_text().splitlines():
+        tokens = line.split()
+        if 'NCOEFF=' in tokens:
+            coefficient_count = int(tokens[tokens.index('NCOEFF=') + 1])
+        elif tokens[:1] == ['GROUP']:
+            group = groups.setdefault(int(tokens[1]), [])
+        elif group is not None and tokens:
+            group.append(tokens)
+
+    if coefficient_count is None or len(groups.get(1050, [])) != 3:
+        raise ValueError(f"{filename}: not a DE ASCII header (needs NCOEFF= and a 3-row GROUP 1050)")
+    first, count, subintervals = ([int(token) for token in row] for row in groups[1050])
+    return coefficient_count, tuple(zip(first, count, subintervals))
+
+
+def parse_ascii_file(filename, coefficient_count=DE430_COEFFICIENTS):
+    """Parse a DE ASCII coefficient file (ascpYYYY.430) into a (blocks x coefficients) float64 array.
+
+    The whole file goes through one np.fromstring call after swapping the
+    Fortran 'D' exponents for 'E'; each block is then a fixed-width row of
+    block number, coefficient count and the coefficients padded to a multiple of 3.
+    """
+    text = Path(filename).read_bytes().replace(b'D', b'E')
+    values = np.fromstring(text, dtype=np.float64, sep=' ')
+
+    block_size = 2 + -(-coefficient_count // 3) * 3
+    if len(values) % block_size:
+        raise ValueError(f"{filename}: {len(values)} values is not a whole number of {block_size}-value blocks")
+    blocks = values.reshape(-1, block_size)
+    if not np.all(blocks[:, 1] == coefficient_count):
+        raise ValueError(f"{filename}: blocks do not all hold {coefficient_count} coefficients")
+    if not np.array_equal(blocks[:, 0], np.arange(1, len(blocks) + 1)):
+        raise ValueError(f"{filename}: block numbers are not consecutive")
+    return blocks[:, 2:2 + coefficient_count]
+
+
+def convert_ascii_files(ascii_files, output_file, header_file=None):
+    """Convert DE ASCII files into one EPHD store; returns (record count, start JD, end JD).
+
+    Files are parsed one at a time and appended, so memory stays at one file's
+    worth of coefficients. Neighbouring DE files repeat their boundary block;
+    repeats are dropped, and gaps or out-of-order files raise ValueError.
+    """
+    coefficient_count, layout = read_ascii_header(header_file) if header_file else (DE430_COEFFICIENTS, DE430_LAYOUT)
+    bodies = body_table(layout)
+    data_offset = -(-(DE_HEADER_SIZE + len(bodies) * DE_BODY_SIZE) // DE_DATA_ALIGNMENT) * DE_DATA_ALIGNMENT
+
+    record_count = 0
+    start_jd = end_jd = None
+    with open(output_file, 'wb') as f:
+        f.write(bytes(data_offset))
+
+        for filename in sorted(ascii_files):
+            records = parse_ascii_file(filename, coefficient_count)
+            if end_jd is not None:
+                records = records[records[:, 0] >= end_jd]
+            if not len(records):
+                continue
+            if end_jd is not None and records[0, 0] != end_jd:
+                raise ValueError(f"{filename}: starts at JD {records[0, 0]}, previous file ends at JD {end_jd}")
+            if not np.array_equal(records[1:, 0], records[:-1, 1]):
+                raise ValueError(f"{filename}: records are not contiguous")
+
+            f.write(np.ascontiguousarray(records, dtype='<f8').tobytes())
+            record_count += len(records)
+            start_jd = records[0, 0] if start_jd is None else start_jd
+            end_jd = records[-1, 1]
+
+        if not record_count:
+            raise ValueError("No DE coefficient records found")
+
+        f.seek(0)
+        f.write(struct.pack(
+            DE_HEADER_FORMAT,
+            DE_MAGIC,
+            DE_VERSION,
+            coefficient_count,
+            record_count,
+            len(bodies),
+            data_offset,
+            start_jd,
+            end_jd,
+            (end_jd - start_jd) / record_count
+        ))
+        for name, first, count, subintervals, components in bodies:
+            f.write(struct.pack(DE_BODY_FORMAT, first, count, subintervals, components))
+
+    return record_count, start_jd, end_jd
+
+
+class DECoefficients:
+    """Memory-mapped DE coefficients from an EPHD store; opening costs a header read."""
+
+    def __init__(self, filename):
+        with open(filename, 'rb') as f:
+            header = struct.unpack(DE_HEADER_FORMAT, f.read(DE_HEADER_SIZE))
+            if header[0] != DE_MAGIC:
+                raise ValueError(f"{filename}: bad magic number {header[0]!r}, expected {DE_MAGIC!r}")
+            if header[1] != DE_VERSION:
+                raise ValueError(f"{filename}: unsupported DE store version {header[1]}")
+            self.coefficient_count, self.record_count, body_count, data_offset = header[2:6]
+            self.start_jd, self.end_jd, self.record_days = header[6:9]
+
+            self.bodies = {}
+            for name in DE430_BODIES[:body_count]:
+                first, count, subintervals, components = struct.unpack(DE_BODY_FORMAT, f.read(DE_BODY_SIZE))
+                if count and subintervals:
+                    self.bodies[name] = (first, count, subintervals, components)
+
+        self.records = np.memmap(
+            filename, dtype='<f8', mode='r', offset=data_offset, shape=(self.record_count, self.coefficient_count)
+        )
+
+    def record_index(self, jd):
+        """Index of the record covering each Julian date (TDB); the end date belongs to the last record."""
+        jd = np.asarray(jd, dtype=np.float64)
+        if np.any((jd < self.start_jd) | (jd > self.end_jd)):
+            raise ValueError(f"Julian dates outside the store's range {self.start_jd} to {self.end_jd}")
+        index = ((jd - self.start_jd) // self.record_days).astype(np.int64)
+        return np.minimum(index, self.record_count - 1)
+
+    def body_granules(self, body, jd):
+        """Coefficients of the distinct subintervals ("granules") of `body` covering the Julian dates (TDB).
+
+        Each granule is read from the store once, however many dates fall in it.
+        Returns (coefficients[granule, component, k], granule index per date, x per date)
+        where x in [-1, 1] is the date's position within its subinterval.
+        """
+        first, count, subintervals, components = self.bodies[body]
+        jd = np.asarray(jd, dtype=np.float64)
+        index = self.record_index(jd)
+
+        records, record_inverse = np.unique(index, return_inverse=True)
+        subinterval_days = self.record_days / subintervals
+        offset = jd - self.records[records, 0][record_inverse].reshape(jd.shape)
+        subinterval = np.minimum((offset // subinterval_days).astype(np.int64), subintervals - 1)
+        x = 2.0 * (offset - subinterval * subinterval_days) / subinterval_days - 1.0
+
+        granules, granule_index = np.unique(index * subintervals + subinterval, return_inverse=True)
+        columns = first + (granules % subintervals)[:, None] * components * count + np.arange(components * count)
+        coefficients = self.records[(granules // subintervals)[:, None], columns]
+        return coefficients.reshape(len(granules), components, count), granule_index.reshape(jd.shape), x
+
+    def body_coefficients(self, body, jd):
+        """Chebyshev coefficients of `body` for each Julian date (TDB).
+
+        Returns (coefficients[..., component, k], x) where x in [-1, 1] is the
+        date's position within its subinterval.
+        """
+        coefficients, granule_index, x = self.body_granules(body, jd)
+        return coefficients[granule_index], x
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert DE430 ASCII coefficient files into a memory-mapped EPHD store')
+    parser.add_argument('ascii_files', nargs='*', help=f'ascpYYYY.430 files (default {DEFAULT_INPUT_PATTERN})')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT_FILE, help='EPHD store to write')
+    parser.add_argument('--header', help='header.430_572 with the record layout (default: built-in DE430 layout)')
+    args = parser.parse_args()
+
+    ascii_files = args.ascii_files or sorted(glob.glob(DEFAULT_INPUT_PATTERN))
+    if not ascii_files:
+        parser.error(f"no DE ASCII files given or found at {DEFAULT_INPUT_PATTERN} (run eph.py first)")
+
+    print(f"Converting {len(ascii_files)} files to {args.output}")
+    convert_start = time.perf_counter()
+    record_count, start_jd, end_jd = convert_ascii_files(ascii_files, args.output, args.header)
+    convert_seconds = time.perf_counter() - convert_start
+    print(f"  Records: {record_count}, JD {start_jd} to {end_jd}, conversion time: {convert_seconds:.2f}s")
+    print(f"  Size: {Path(args.output).stat().st_size:,} bytes")
+
+    open_start = time.perf_counter()
+    store = DECoefficients(args.output)
+    open_seconds = time.perf_counter() - open_start
+    print(f"  Opened {store.record_count} records x {store.coefficient_count} coefficients in {open_seconds * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
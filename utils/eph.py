@@ -1,94 +1,330 @@
 import os
+import time
+import hashlib
+import threading
 import requests
 import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 
-def download_file(url, destination, force_refresh=False):
+DE430_BASE_URL = 'https://ssd.jpl.nasa.gov/ftp/eph/planets/ascii/de430'
+DE430_YEARS = range(1550, 2551, 100)
+DEFAULT_OUTPUT_DIR = './data'
+DEFAULT_WORKERS = 4
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+DEFAULT_RETRIES = 5
+DEFAULT_TIMEOUT = 60
+PART_SUFFIX = '.part'
+
+# Errors worth resuming after: the .part file keeps everything received so far
+RETRYABLE_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.ChunkedEncodingError,
+    requests.exceptions.Timeout,
+)
+
+class DownloadProgress:
+    """
+    One progress bar for every file being downloaded.
+    
+    Sizes are only known once each response arrives, so the bar's total grows
+    as downloads start. Bytes already on disk in .part files count as done.
+    """
+    
+    def __init__(self, file_count, enabled=True):
+        self.lock = threading.Lock()
+        self.file_count = file_count
+        self.finished = 0
+        self.counted = {}
+        self.bar = tqdm(total=0, unit='B', unit_scale=True, disable=not enabled,
+                        desc=f'0/{file_count} files')
+    
+    def start_file(self, name, total_size, offset):
+        """Register a response for `name`: `offset` bytes are already on disk."""
+        with self.lock:
+            if name not in self.counted and total_size:
+                self.bar.total += total_size
+            # A restart from zero takes back the bytes counted for the old .part
+            self.bar.update(offset - self.counted.get(name, 0))
+            self.counted[name] = offset
+            self.bar.refresh()
+    
+    def update(self, name, size):
+        with self.lock:
+            self.counted[name] = self.counted.get(name, 0) + size
+            self.bar.update(size)
+    
+    def finish_file(self):
+        with self.lock:
+            self.finished += 1
+            self.bar.set_description(f'{self.finished}/{self.file_count} files')
+    
+    def write(self, message):
+        """Print without breaking the progress bar."""
+        self.bar.write(message)
+    
+    def close(self):
+        self.bar.close()
+
+def file_sha256(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Return the hex SHA-256 digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def load_checksums(path):
+    """
+    Read a `sha256sum`-style checksum file.
+    
+    Args:
+        path (str): File with one "<sha256>  <filename>" line per file
+    
+    Returns:
+        dict: Base file name -> lowercase hex digest
+    """
+    checksums = {}
+    with open(path) as f:
+        for line in f:
+            if line.strip() and not line.startswith('#'):
+                digest, name = line.split(maxsplit=1)
+                checksums[os.path.basename(name.strip().lstrip('*'))] = digest.lower()
+    return checksums
+
+def verify_file(path, expected_size=None, sha256=None):
+    """
+    Check a downloaded file against its expected size and checksum.
+    
+    Returns:
+        str: A description of the mismatch, or None when the file checks out
+    """
+    size = os.path.getsize(path)
+    if expected_size is not None and size != expected_size:
+        return f"size {size:,} bytes, expected {expected_size:,}"
+    if sha256 is not None:
+        digest = file_sha256(path)
+        if digest != sha256.lower():
+            return f"SHA-256 {digest}, expected {sha256.lower()}"
+    return None
+
+def content_range_total(response):
+    """Total file size from a `Content-Range: bytes a-b/total` header, or None."""
+    total = response.headers.get('content-range', '').rpartition('/')[2]
+    return int(total) if total.isdigit() else None
+
+def is_encoded(response):
+    """Whether the body is compressed on the wire, so its lengths are not the file's size."""
+    return response.headers.get('content-encoding', 'identity').lower() != 'identity'
+
+def fetch_part(session, url, part_path, chunk_size, timeout, progress=None):
+    """
+    Download `url` into `part_path`, continuing from whatever the part file already holds.
+    
+    Returns:
+        int: The full file size announced by the server, or None if it did not say
+    """
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    # Ranges and lengths must count the file's own bytes, not a compressed body
+    headers = {'Accept-Encoding': 'identity'}
+    if offset:
+        headers['Range'] = f'bytes={offset}-'
+    name = os.path.basename(part_path)
+    
+    with session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+        if response.status_code == 416:
+            # Nothing left to fetch: the part file already holds the whole file
+            total_size = content_range_total(response)
+            if total_size is not None and total_size != offset:
+                # The part file belongs to another version of the file, so start over next time
+                os.remove(part_path)
+                raise IOError(f"{name} has {offset:,} bytes but the server's file has {total_size:,}")
+            if progress:
+                progress.start_file(name, offset, offset)
+            return offset
+        response.raise_for_status()
+    
+        if response.status_code == 206:
+            if not response.headers.get('content-range', '').startswith(f'bytes {offset}-'):
+                raise IOError(f"Unexpected Content-Range for {name}: {response.headers.get('content-range')}")
+            total_size = content_range_total(response)
+            mode = 'ab'
+        else:
+            # The server ignored the Range header and is sending the whole file
+            offset = 0
+            # With a compressed body Content-Length counts the wire bytes, not the file's
+            length = None if is_encoded(response) else response.headers.get('content-length')
+            total_size = int(length) if length is not None else None
+            mode = 'wb'
+    
+        if progress:
+            progress.start_file(name, total_size, offset)
+        with open(part_path, mode) as f:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                f.write(chunk)
+                if progress:
+                    progress.update(name, len(chunk))
+    
+    return total_size
+
+def download_file(url, destination, force_refresh=False, chunk_size=DEFAULT_CHUNK_SIZE,
+                  expected_size=None, sha256=None, retries=DEFAULT_RETRIES, timeout=DEFAULT_TIMEOUT,
+                  progress=None):
     """
     Download a file from a URL and save it to the specified destination.
     
+    Data goes to `<destination>.part` first, and a dropped connection resumes
+    from the end of that file with an HTTP Range request. The file is only
+    renamed into place once its size (and checksum, if given) checks out.
+    
     Args:
         url (str): The URL to download from
         destination (str): The local path to save the file to
         force_refresh (bool): Whether to download the file even if it already exists
+        chunk_size (int): Bytes read from the connection per write
+        expected_size (int): Size the file must have; defaults to the size the server announces
+        sha256 (str): Hex SHA-256 digest the file must have, if known
+        retries (int): Resume attempts after connection errors
+        timeout (float): Seconds to wait for the server before retrying
+        progress (DownloadProgress): Shared progress bar, or None for quiet downloads
     
     Returns:
         bool: True if download was successful, False otherwise
     """
+    log = progress.write if progress else print
+    
     # Check if file already exists
     if os.path.exists(destination) and not force_refresh:
-        print(f"File {destination} already exists, skipping.")
-        return True
+        mismatch = verify_file(destination, expected_size, sha256)
+        if mismatch is None:
+            log(f"File {destination} already exists, skipping.")
+            if progress:
+                progress.finish_file()
+            return True
+        log(f"File {destination} exists but has {mismatch}, downloading again.")
     
     # Create directory if it doesn't exist
-    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    os.makedirs(os.path.dirname(destination) or '.', exist_ok=True)
+    part_path = destination + PART_SUFFIX
+    if force_refresh and os.path.exists(part_path):
+        os.remove(part_path)
     
     try:
-        # Send a GET request to the URL
-        response = requests.get(url, stream=True)
-        response.raise_for_status()  # Raise an exception for HTTP errors
-        
-        # Get file size if available
-        total_size = int(response.headers.get('content-length', 0))
-        
-        # Initialize progress bar
-        progress_bar = tqdm(total=total_size, unit='B', unit_scale=True, 
-                           desc=os.path.basename(destination))
-        
-        # Write the file
-        with open(destination, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
-                    progress_bar.update(len(chunk))
-        
-        progress_bar.close()
-        print(f"Successfully downloaded {url} to {destination}")
+        with requests.Session() as session:
+            for attempt in range(retries + 1):
+                try:
+                    total_size = fetch_part(session, url, part_path, chunk_size, timeout, progress)
+                    # A connection closed cleanly but early still leaves a short file
+                    if total_size is None or os.path.getsize(part_path) >= total_size:
+                        break
+                    log(f"{os.path.basename(destination)}: connection closed early, resuming")
+                except RETRYABLE_ERRORS as e:
+                    if attempt == retries:
+                        raise
+                    log(f"{os.path.basename(destination)}: {type(e).__name__}, resuming (attempt {attempt + 2} of {retries + 1})")
+                    time.sleep(min(2 ** attempt, 30))
+            else:
+                raise IOError(f"{os.path.basename(destination)} still incomplete after {retries + 1} attempts")
+    
+        mismatch = verify_file(part_path, expected_size if expected_size is not None else total_size, sha256)
+        if mismatch is not None:
+            # Resuming cannot repair a corrupt file, so start over next time
+            os.remove(part_path)
+            log(f"Verification failed for {destination}: {mismatch}")
+            return False
+    
+        os.replace(part_path, destination)
+        if progress:
+            progress.finish_file()
+        log(f"Successfully downloaded {url} to {destination}")
         return True
     
     except requests.exceptions.HTTPError as e:
-        print(f"HTTP Error: {e}")
+        log(f"HTTP Error: {e}")
     except requests.exceptions.ConnectionError as e:
-        print(f"Connection Error: {e}")
+        log(f"Connection Error: {e}")
     except requests.exceptions.Timeout as e:
-        print(f"Timeout Error: {e}")
+        log(f"Timeout Error: {e}")
     except requests.exceptions.RequestException as e:
-        print(f"Error: {e}")
+        log(f"Error: {e}")
     except IOError as e:
-        print(f"I/O Error: {e}")
+        log(f"I/O Error: {e}")
     
-    print(f"Failed to download {url}")
+    log(f"Failed to download {url}")
     return False
 
+def download_files(files, workers=DEFAULT_WORKERS, show_progress=True, **options):
+    """
+    Download several files concurrently with one aggregate progress bar.
+    
+    Args:
+        files (list): Dicts of download_file() arguments ('url', 'destination', ...)
+        workers (int): Maximum number of simultaneous downloads
+        show_progress (bool): Whether to draw the progress bar
+        **options: download_file() arguments shared by every file
+    
+    Returns:
+        int: Number of files downloaded (or already present) successfully
+    """
+    progress = DownloadProgress(len(files), enabled=show_progress)
+    success_count = 0
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = [executor.submit(download_file, progress=progress, **dict(options, **file_info))
+                       for file_info in files]
+            for future in as_completed(futures):
+                if future.result():
+                    success_count += 1
+    finally:
+        progress.close()
+    return success_count
+
+def de430_files(base_url=DE430_BASE_URL, output_dir=DEFAULT_OUTPUT_DIR, checksums=None):
+    """List the DE430 ASCII coefficient files (ascp1550.430 ... ascp2550.430) to download."""
+    files = []
+    for year in DE430_YEARS:
+        name = 'ascp{:04d}.430'.format(year)
+        files.append({
+            'url': '{}/{}'.format(base_url.rstrip('/'), name),
+            'destination': os.path.join(output_dir, name),
+            'sha256': (checksums or {}).get(name),
+        })
+    return files
+
 def main():
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='Download astronomical ephemeris files from JPL')
-    parser.add_argument('--refresh', action='store_true', 
+    parser.add_argument('--refresh', action='store_true',
                         help='Force redownload of files even if they already exist')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='Maximum number of simultaneous downloads')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help='Bytes read from the connection per write')
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES,
+                        help='Resume attempts per file after connection errors')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help='Seconds to wait for the server before retrying')
+    parser.add_argument('--checksums', help='sha256sum-style file to verify the downloads against')
+    parser.add_argument('--base-url', default=DE430_BASE_URL,
+                        help='Directory URL holding the ascpYYYY.430 files (e.g. a local mirror)')
+    parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR, help='Where to save the files')
+    parser.add_argument('--no-progress', action='store_true', help='Do not draw the progress bar')
     args = parser.parse_args()
     
-    refresh = args.refresh
-    
     # List of files to download
-    required_files = []
-    for year in range(1550, 2551, 100):
-        required_files.append({
-            'url': 'https://ssd.jpl.nasa.gov/ftp/eph/planets/ascii/de430/ascp{:04d}.430'.format(year),
-            'destination': './data/ascp{:04d}.430'.format(year),
-            'force_refresh': refresh
-        })
-    
-    # Download each file
-    success_count = 0
+    checksums = load_checksums(args.checksums) if args.checksums else None
+    required_files = de430_files(args.base_url, args.output_dir, checksums)
     total_files = len(required_files)
     
-    print(f"Preparing to download {total_files} files...")
+    print(f"Preparing to download {total_files} files with {args.workers} workers...")
     
-    for file_info in required_files:
-        if download_file(**file_info):
-            success_count += 1
+    success_count = download_files(
+        required_files, args.workers, not args.no_progress, force_refresh=args.refresh,
+        chunk_size=args.chunk_size, retries=args.retries, timeout=args.timeout
+    )
     
     print(f"Downloaded {success_count} of {total_files} files successfully.")
+    return 0 if success_count == total_files else 1
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    raise SystemExit(main())
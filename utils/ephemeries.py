@@ -1,11 +1,21 @@
 
+import contextlib
 import csv
+import heapq
+import importlib
+import json
+import math
+import os
 import struct
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from pathlib import Path
 import numpy as np
 from skyfield.api import load, Topos, utc
-from skyfield.almanac import find_discrete, risings_and_settings
+from skyfield.almanac import find_discrete, risings_and_settings, moon_phases
+from skyfield.positionlib import Apparent
 
 # Custom epoch: January 4, 1992, 23:05:37 UTC 694566337
 CUSTOM_EPOCH = datetime(1992, 1, 4, 23, 5, 37, tzinfo=utc)
@@ -16,7 +26,7 @@ CUSTOM_EPOCH_OFFSET = int((CUSTOM_EPOCH - UNIX_EPOCH).total_seconds())
 EVENT_RISE = 1
 EVENT_SET = 2
 EVENT_CULMINATION = 3           # Upper culmination (meridian transit)
-EVENT_ANTI_CULMINATION = 4      # Lower culmination (altitude minimum)
+EVENT_ANTI_CULMINATION = 4      # Lower culmination (meridian transit below the pole)
 EVENT_PLANET_TRANSIT = 5        # Closest planet changes
 EVENT_APOGEE = 6               # Maximum distance
 EVENT_PERIGEE = 7              # Minimum distance
@@ -42,15 +52,478 @@ HORIZON_CORRECTIONS = {
     'planets': -0.5667,  # Just atmospheric refraction
 }
 
+# Debug CSV columns
+STREAM_CSV_COLUMNS = ['datetime_utc', 'timestamp', 'phase_or_separation', 'distance_km', 'azimuth_deg', 'altitude_deg']
+EVENTS_CSV_COLUMNS = [
+    'datetime_utc', 'timestamp', 'event_type', 'event_name', 'phase_or_separation',
+    'distance_km', 'azimuth_deg', 'altitude_deg', 'from_planet', 'to_planet'
+]
+
+# Stream record layout, identical to one '<Iffff' EPHS record (20 bytes)
+STREAM_RECORD_DTYPE = np.dtype([
+    ('timestamp', '<u4'),
+    ('phase', '<f4'),
+    ('distance_km', '<f4'),
+    ('azimuth_deg', '<f4'),
+    ('altitude_deg', '<f4'),
+])
+
+# Event record layout, identical to one '<IIffffII' EVTS record (32 bytes)
+EVENT_RECORD_DTYPE = np.dtype([
+    ('timestamp', '<u4'),
+    ('event_type', '<u4'),
+    ('azimuth_deg', '<f4'),
+    ('altitude_deg', '<f4'),
+    ('phase', '<f4'),
+    ('distance_km', '<f4'),
+    ('from_planet_id', '<u4'),
+    ('to_planet_id', '<u4'),
+])
+
+# Header layouts of the EPHS and EVTS files, records start right after them
+STREAM_HEADER_FORMAT = '<4sIIIIfffffff'
+EVENTS_HEADER_FORMAT = '<4sIIIIffffffff'
+STREAM_HEADER_SIZE = struct.calcsize(STREAM_HEADER_FORMAT)  # 48 bytes
+EVENTS_HEADER_SIZE = struct.calcsize(EVENTS_HEADER_FORMAT)  # 52 bytes
+
+# EPHE v1 device format (c-clock/main.c, EphemerisReader.h): 32-byte header,
+# 28-byte records, then one index entry for every EPHE_INDEX_STRIDE records
+EPHE_MAGIC = 0x45504845  # "EPHE"
+EPHE_VERSION = 1
+EPHE_HEADER_FORMAT = '<IIIIIIII'
+EPHE_HEADER_SIZE = struct.calcsize(EPHE_HEADER_FORMAT)  # 32 bytes
+EPHE_RECORD_DTYPE = np.dtype([
+    ('timestamp', '<u4'),
+    ('phase', '<f4'),
+    ('distance_km', '<f4'),
+    ('azimuth_deg', '<f4'),
+    ('altitude_deg', '<f4'),
+    ('event', 'u1'),
+    ('distance_event', 'u1'),
+    ('closest_planet_id', 'u1'),
+    ('reserved', 'u1'),
+    ('angular_distance_deg', '<f4'),
+])
+EPHE_INDEX_DTYPE = np.dtype([
+    ('timestamp', '<u4'),
+    ('file_offset', '<u4'),
+])
+EPHE_INDEX_STRIDE = 10
+
+# Per-record event codes understood by the device reader
+EPHE_EVENT_CODES = {
+    EVENT_RISE: 1,
+    EVENT_SET: 2,
+    EVENT_CULMINATION: 3,
+}
+EPHE_DISTANCE_EVENT_CODES = {
+    EVENT_PERIGEE: 1,
+    EVENT_APOGEE: 2,
+}
+
+# Compressed stream format (EPHZ v1): implicit timestamps, fixed-size blocks with an
+# absolute float64 keyframe, per-block channel scales and int16 quantized deltas
+COMPRESSED_MAGIC = b'EPHZ'
+COMPRESSED_VERSION = 1
+COMPRESSED_HEADER_FORMAT = '<4sIIIIIIfff'
+COMPRESSED_HEADER_SIZE = struct.calcsize(COMPRESSED_HEADER_FORMAT)  # 40 bytes
+COMPRESSED_BLOCK_SIZE = 1440  # Records per block, one day at 1-minute resolution
+COMPRESSED_CHANNELS = ('phase', 'distance_km', 'azimuth_deg', 'altitude_deg')
+COMPRESSED_BLOCK_HEADER_FORMAT = '<ddddffff'  # Keyframe values, then quantization scales
+COMPRESSED_BLOCK_HEADER_SIZE = struct.calcsize(COMPRESSED_BLOCK_HEADER_FORMAT)  # 48 bytes
+# Finest quantization step per channel; a block coarsens a step only if its deltas overflow int16
+COMPRESSED_SCALES = {
+    'phase': 1e-6,
+    'distance_km': 0.01,
+    'azimuth_deg': 1e-4,
+    'altitude_deg': 1e-4,
+}
+COMPRESSED_MAX_DELTA = 32767
+
+# Array bytes held by each generator's SkyfieldCache before least-recently-used eviction
+SKYFIELD_CACHE_BYTES = 64 * 1024 * 1024
+
+# TT instants are keyed in integer microseconds since J2000.0 for per-instant cache lookups
+J2000_JD = 2451545.0
+MICROSECONDS_PER_DAY = 86400 * 10**6
+
+# Number of stream samples evaluated per vectorized backend call
+STREAM_CHUNK_SIZE = 10080  # One week at 1-minute resolution
+
+# Closest-planet check grid of the planet transit detector; chunked runs align to it
+PLANET_TRANSIT_CHECK_MINUTES = 30
+
+# Stream-derived events: a distance extremum must dominate this many seconds on each side
+DISTANCE_EXTREMUM_WINDOW = 86400   # Absorbs float32 noise around flat perigees/apogees
+# Stream-derived event times are bisected on the ephemeris down to this precision
+EVENT_REFINE_PRECISION_SECONDS = 0.01
+
+# Event detector registry: name -> (input, generator method). 'range' detectors search
+# a time range with Skyfield, 'stream' detectors scan the computed stream records.
+EVENT_DETECTORS = {
+    'rise_set': ('range', 'find_rise_set_events'),
+    'planet_transit': ('range', 'find_planet_transit_events'),
+    'phase_transit': ('range', 'find_phase_transit_events'),
+    'moon_phase': ('range', 'find_moon_phase_events'),
+    'distance': ('stream', 'find_distance_events'),
+    'culmination': ('stream', 'find_altitude_events'),
+}
+
+# Stream position backend registry: name -> (module, class). A backend is built with
+# the generator plus its options and computes the stream channels for a Time array;
+# modules are imported on first use, so the native backend's store is only needed when chosen.
+EPHEMERIS_BACKENDS = {
+    'skyfield': (__name__, 'SkyfieldBackend'),
+    'native': ('native_ephemeris', 'NativeBackend'),
+}
+
+def empty_stream_records(count):
+    """Allocate a columnar stream record store for `count` samples."""
+    return np.zeros(count, dtype=STREAM_RECORD_DTYPE)
+
+def events_to_records(events):
+    """Convert a list of event dicts into an EVENT_RECORD_DTYPE array."""
+    records = np.zeros(len(events), dtype=EVENT_RECORD_DTYPE)
+    if not events:
+        return records
+    
+    for field in EVENT_RECORD_DTYPE.names:
+        # Planet transit ids are optional on every other event type
+        records[field] = [event.get(field, 0) for event in events]
+    return records
+
+def write_record_block(f, records, dtype):
+    """Write a whole record array to an open binary file in a single buffer write."""
+    block = np.ascontiguousarray(records, dtype=dtype)
+    f.write(block.data)
+
+def read_header(filename, header_format, magic):
+    """Read and validate the header of an EPHS/EVTS file."""
+    header_size = struct.calcsize(header_format)
+    with open(filename, 'rb') as f:
+        header_bytes = f.read(header_size)
+    
+    if len(header_bytes) < header_size:
+        raise ValueError(f"{filename}: file too small for a {header_size}-byte header")
+    
+    header = struct.unpack(header_format, header_bytes)
+    if header[0] != magic:
+        raise ValueError(f"{filename}: bad magic number {header[0]!r}, expected {magic!r}")
+    return header
+
+def encode_compressed_block(records):
+    """Encode one block of stream records as (block header bytes, int16 delta array)."""
+    keyframe = []
+    scales = []
+    deltas = np.zeros((max(len(records) - 1, 0), len(COMPRESSED_CHANNELS)), dtype='<i2')
+    
+    for channel_index, channel in enumerate(COMPRESSED_CHANNELS):
+        values = records[channel].astype(np.float64)
+        if channel == 'azimuth_deg':
+            # Unwrap 360 -> 0 jumps so they quantize as small steps; the decoder wraps back
+            values = np.unwrap(values, period=360.0)
+        
+        steps = np.abs(np.diff(values))
+        max_step = steps.max() if len(steps) else 0.0
+        # Leave headroom for rounding: |quantized step| <= max_step / scale + 1
+        scale = max(COMPRESSED_SCALES[channel], max_step / (COMPRESSED_MAX_DELTA - 2))
+        scale = float(np.float32(scale))
+        
+        # Quantize relative to the keyframe, then delta-encode the integers (no drift)
+        quantized = np.rint((values - values[0]) / scale).astype(np.int64)
+        deltas[:, channel_index] = np.diff(quantized)
+        keyframe.append(values[0])
+        scales.append(scale)
+    
+    return struct.pack(COMPRESSED_BLOCK_HEADER_FORMAT, *keyframe, *scales), deltas
+
+def decode_compressed_block(block_header, deltas, first_timestamp, interval_seconds):
+    """Decode one block back into STREAM_RECORD_DTYPE records."""
+    values = struct.unpack(COMPRESSED_BLOCK_HEADER_FORMAT, block_header)
+    channel_count = len(COMPRESSED_CHANNELS)
+    keyframe, scales = values[:channel_count], values[channel_count:]
+    
+    count = len(deltas) + 1
+    records = empty_stream_records(count)
+    records['timestamp'] = first_timestamp + np.arange(count, dtype=np.int64) * interval_seconds
+    
+    for channel_index, channel in enumerate(COMPRESSED_CHANNELS):
+        quantized = np.zeros(count, dtype=np.int64)
+        np.cumsum(deltas[:, channel_index], out=quantized[1:])
+        channel_values = keyframe[channel_index] + quantized * scales[channel_index]
+        if channel == 'azimuth_deg':
+            channel_values = np.mod(channel_values, 360.0)
+        records[channel] = channel_values
+    
+    return records
+
+# Timescale and de421.bsp, shared by every generator in the process
+_ephemeris_data = None
+
+def load_ephemeris():
+    """Load the timescale and de421.bsp once per process."""
+    global _ephemeris_data
+    if _ephemeris_data is None:
+        _ephemeris_data = (load.timescale(), load('de421.bsp'))
+    return _ephemeris_data
+
+def checkpoint_filename(stream_filename):
+    """Sidecar state file of a checkpointed streaming run."""
+    return f"{stream_filename}.state.json"
+
+def ensure_utc(dt):
+    """Make naive datetimes timezone-aware (UTC)."""
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=utc)
+    return dt
+
+def utc_sample_times(ts, start_time, count, interval_seconds):
+    """Time array of `count` samples every `interval_seconds` from `start_time`, stepped like datetime arithmetic.
+    
+    Offsets are split into whole days and seconds of day: one long seconds
+    argument to ts.utc() would count any leap second it crosses, putting every
+    later sample 1 s before the timestamp derived from its datetime.
+    """
+    since_epoch = ensure_utc(start_time) - UNIX_EPOCH
+    seconds = since_epoch.seconds + since_epoch.microseconds / 1e6 + np.arange(count, dtype=np.float64) * interval_seconds
+    days = (seconds // 86400).astype(np.int64)
+    return ts.utc(1970, 1, 1 + since_epoch.days + days, 0, 0, seconds - days * 86400.0)
+
+def unix_times(ts, unix_seconds):
+    """Time array for integer unix seconds (split into days so no leap seconds creep in)."""
+    unix_seconds = np.asarray(unix_seconds, dtype=np.int64)
+    return ts.utc(1970, 1, 1 + unix_seconds // 86400, 0, 0, unix_seconds % 86400)
+
+def align_chunk_steps(chunk_steps, interval_seconds, grid_seconds=PLANET_TRANSIT_CHECK_MINUTES * 60):
+    """Round `chunk_steps` up so every chunk spans whole closest-planet check intervals.
+    
+    Each chunk then checks the closest planet at the same instants as a single
+    run over the whole range, and a change between a chunk's last check and
+    its end is not lost.
+    """
+    step = grid_seconds // math.gcd(grid_seconds, int(interval_seconds))
+    return max(step, -(-chunk_steps // step) * step)
+
+def find_extrema(values, window):
+    """Indices of the local (minima, maxima) of `values` that dominate `window` samples on each side.
+    
+    Candidates come from sign changes of the first difference; flat runs (float32
+    plateaus) take the slope before them and report their centre.
+    """
+    slope = np.sign(np.diff(values))
+    positions = np.arange(len(slope))
+    last_nonzero = np.maximum.accumulate(np.where(slope != 0, positions, -1))
+    filled = np.where(last_nonzero >= 0, slope[np.maximum(last_nonzero, 0)], 0)
+    
+    # Slope changes sign at sample i: filled[i - 1] and filled[i] disagree
+    changes = np.flatnonzero(filled[:-1] * filled[1:] < 0) + 1
+    centres = (last_nonzero[changes - 1] + 1 + changes) // 2
+    
+    extrema = ([], [])
+    for index, rising in zip(centres, filled[changes - 1] > 0):
+        first = max(0, index - window)
+        neighbourhood = values[first:index + window + 1]
+        # Ties keep the first sample, so a noisy flat extremum is reported once
+        best = np.argmax(neighbourhood) if rising else np.argmin(neighbourhood)
+        if first + best == index:
+            extrema[int(rising)].append(int(index))
+    return np.array(extrema[0], dtype=np.int64), np.array(extrema[1], dtype=np.int64)
+
+def position_bytes(position):
+    """Bytes of the arrays a Skyfield position holds: its vectors and what its Time has computed."""
+    arrays = [position.xyz.au, position.velocity.au_per_d, getattr(position, '_observer_gcrs_au', None)]
+    arrays.extend(vars(position.t).values())
+    return sum(array.nbytes for array in arrays if isinstance(array, np.ndarray))
+
+def instant_keys(t):
+    """TT of every instant of `t` as integer microseconds since J2000.0 (1-D, even for a scalar Time)."""
+    whole, fraction = np.broadcast_arrays(np.atleast_1d(t.whole), np.atleast_1d(t.tt_fraction))
+    return (np.rint((whole - J2000_JD) * MICROSECONDS_PER_DAY).astype(np.int64) +
+            np.rint(fraction * MICROSECONDS_PER_DAY).astype(np.int64))
+
+class SkyfieldCache:
+    """Per-generation cache of Skyfield positions shared by the stream pass and detectors.
+    
+    Holds the single observer vector and memoizes observer/geocenter positions
+    and apparent body positions per Time (keyed by its exact TT values).
+    Apparent positions are also found instant by instant, so a detector asking
+    for some of the stream's sample times (e.g. both sides of a transit) reuses
+    the stream's positions instead of evaluating the ephemeris again. Entries
+    are evicted least recently used once they hold more than `max_bytes`.
+    """
+    
+    def __init__(self, earth, observer, max_bytes=SKYFIELD_CACHE_BYTES):
+        self.earth = earth
+        self.observer_location = earth + observer
+        self.max_bytes = max_bytes
+        # key -> (value, per-instant index or None, bytes held)
+        self.entries = OrderedDict()
+        self.cached_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evaluations = 0
+    
+    def clear(self):
+        """Drop every cached position (e.g. at the start of a new generation run)."""
+        self.entries.clear()
+        self.cached_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evaluations = 0
+    
+    def count_evaluations(self, t, positions=1):
+        """Count `positions` ephemeris evaluations at every instant of `t`."""
+        self.evaluations += positions * int(np.size(t.tt))
+    
+    def lookup(self, key, compute, t, find_instants=None):
+        """Return the cached value for `key`, computing and storing it on a miss.
+        
+        `find_instants`, if given, assembles the value from other entries' instants
+        (or returns None) before falling back to `compute`.
+        """
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key][0]
+        
+        value = find_instants() if find_instants else None
+        if value is not None:
+            self.hits += 1
+            return value
+        
+        self.misses += 1
+        self.count_evaluations(t)
+        value = compute()
+        index = None
+        if find_instants:
+            keys = instant_keys(t)
+            order = np.argsort(keys, kind='stable')
+            index = (keys[order], order)
+        nbytes = position_bytes(value) + (index[0].nbytes + index[1].nbytes if index else 0)
+        self.entries[key] = (value, index, nbytes)
+        self.cached_bytes += nbytes
+        # The newest entry stays even when it alone exceeds the bound
+        while self.cached_bytes > self.max_bytes and len(self.entries) > 1:
+            _, (_, _, evicted_bytes) = self.entries.popitem(last=False)
+            self.cached_bytes -= evicted_bytes
+        return value
+    
+    def time_key(self, t):
+        return (np.shape(t.tt), np.asarray(t.whole).tobytes(), np.asarray(t.tt_fraction).tobytes())
+    
+    def observer_at(self, t):
+        """Barycentric position of the observer at `t`."""
+        return self.lookup(('observer',) + self.time_key(t), lambda: self.observer_location.at(t), t)
+    
+    def earth_at(self, t):
+        """Barycentric position of the geocenter at `t`."""
+        return self.lookup(('earth',) + self.time_key(t), lambda: self.earth.at(t), t)
+    
+    def apparent(self, body, t):
+        """Topocentric apparent position of `body` at `t`."""
+        return self.lookup(
+            ('apparent', body) + self.time_key(t),
+            lambda: self.observer_at(t).observe(body).apparent(), t,
+            lambda: self.apparent_from_instants(body, t)
+        )
+    
+    def apparent_from_instants(self, body, t):
+        """Apparent position of `body` gathered from cached entries holding every instant of `t`, or None."""
+        keys = instant_keys(t)
+        whole, fraction = np.broadcast_arrays(np.atleast_1d(t.whole), np.atleast_1d(t.tt_fraction))
+        xyz = np.empty((3, len(keys)))
+        velocity = np.empty((3, len(keys)))
+        missing = np.ones(len(keys), dtype=bool)
+        template = None
+        
+        for key, (value, index, _) in reversed(self.entries.items()):
+            if key[:2] != ('apparent', body) or index is None:
+                continue
+            sorted_keys, order = index
+            if sorted_keys[0] > keys.max() or sorted_keys[-1] < keys.min():
+                continue
+            positions = np.minimum(np.searchsorted(sorted_keys, keys[missing]), len(sorted_keys) - 1)
+            found = order[positions]
+            # Same microsecond is not enough: the TT split must match bit for bit
+            cached_whole, cached_fraction = np.broadcast_arrays(np.atleast_1d(value.t.whole),
+                                                                np.atleast_1d(value.t.tt_fraction))
+            matched = ((sorted_keys[positions] == keys[missing]) &
+                       (cached_whole[found] == whole[missing]) & (cached_fraction[found] == fraction[missing]))
+            if not matched.any():
+                continue
+            
+            targets = np.flatnonzero(missing)[matched]
+            xyz[:, targets] = value.xyz.au.reshape(3, -1)[:, found[matched]]
+            velocity[:, targets] = value.velocity.au_per_d.reshape(3, -1)[:, found[matched]]
+            missing[targets] = False
+            template = value
+            if not missing.any():
+                break
+        
+        if missing.any():
+            return None
+        if np.ndim(t.tt) == 0:
+            xyz, velocity = xyz[:, 0], velocity[:, 0]
+        return Apparent(xyz, velocity, t, template.center, template.target)
+
+class SkyfieldBackend:
+    """Stream positions through Skyfield and de421.bsp, sharing the generator's position cache."""
+    
+    name = 'skyfield'
+    
+    def __init__(self, generator):
+        self.generator = generator
+    
+    def stream_channels(self, bodies, t):
+        """Phase, distance, azimuth and altitude of each body over a Skyfield Time (array or scalar).
+        
+        `bodies` maps body names to Skyfield bodies. Moon phase comes from the
+        Sun-Moon elongation; other bodies get their angular separation from the Sun.
+        Returns a dict of body name -> dict of channel values.
+        """
+        generator = self.generator
+        sun_apparent = None
+        moon_phase = None
+        
+        channels = {}
+        for current_body_name, body in bodies.items():
+            apparent = generator.cache.apparent(body, t)
+            ra, dec, distance = apparent.radec()
+            alt, az, d = apparent.altaz()
+            
+            if current_body_name.lower() == 'moon':
+                if moon_phase is None:
+                    moon_phase = generator.get_moon_phase(t)
+                phase = moon_phase
+            else:
+                # Angular separation from the sun for planets
+                if sun_apparent is None:
+                    sun_apparent = generator.cache.apparent(generator.sun, t)
+                phase = apparent.separation_from(sun_apparent).degrees
+            
+            channels[current_body_name] = {
+                'phase': phase,
+                'distance_km': distance.km,
+                'azimuth_deg': az.degrees,
+                'altitude_deg': alt.degrees
+            }
+        return channels
+
 class DualFileEphemerisGenerator:
-    def __init__(self, observer_lat, observer_lon, observer_elevation=0):
-        """Initialize the ephemeris generator."""
+    def __init__(self, observer_lat, observer_lon, observer_elevation=0, detectors=None,
+                 backend='skyfield', backend_options=None):
+        """Initialize the ephemeris generator.
+        
+        `detectors` lists the EVENT_DETECTORS names to run; None enables all of them.
+        `backend` names the EPHEMERIS_BACKENDS entry computing stream positions, built
+        with `backend_options` (e.g. {'ephemeris_file': ...} for the native backend).
+        Event searches always run on Skyfield.
+        """
         self.observer = Topos(observer_lat, observer_lon, elevation_m=observer_elevation)
         self.observer_lat = observer_lat
         self.observer_lon = observer_lon
         self.observer_elevation = observer_elevation
-        self.ts = load.timescale()
-        self.planets = load('de421.bsp')
+        self.ts, self.planets = load_ephemeris()
         
         # Load celestial objects
         self.sun = self.planets['sun']
@@ -71,6 +544,96 @@ class DualFileEphemerisGenerator:
             'moon': self.moon
         }
         
+        # Shared observer vector and position memo for every computation of a run
+        self.cache = SkyfieldCache(self.earth, self.observer)
+        
+        self.detectors = self.select_detectors(detectors)
+        self.backend_options = dict(backend_options or {})
+        self.backend = self.select_backend(backend, self.backend_options)
+        self.reset_run()
+    
+    def select_detectors(self, detectors):
+        """Validate detector names; returns them in registry order."""
+        if detectors is None:
+            return list(EVENT_DETECTORS)
+        unknown = sorted(set(detectors) - set(EVENT_DETECTORS))
+        if unknown:
+            raise ValueError(f"Unknown event detectors: {', '.join(unknown)} "
+                             f"(available: {', '.join(EVENT_DETECTORS)})")
+        return [name for name in EVENT_DETECTORS if name in detectors]
+    
+    def select_backend(self, backend, backend_options=None):
+        """Build the named stream position backend for this generator."""
+        if backend not in EPHEMERIS_BACKENDS:
+            raise ValueError(f"Unknown ephemeris backend: {backend} "
+                             f"(available: {', '.join(EPHEMERIS_BACKENDS)})")
+        module_name, class_name = EPHEMERIS_BACKENDS[backend]
+        backend_class = getattr(importlib.import_module(module_name), class_name)
+        return backend_class(self, **(backend_options or {}))
+    
+    def reset_run(self):
+        """Clear the position cache and the per-stage statistics for a new run."""
+        self.cache.clear()
+        self.run_stats = {}
+        self.worker_cache_stats = {'hits': 0, 'misses': 0, 'evaluations': 0}
+    
+    def record_stage(self, name, seconds, evaluations, events=0, runs=1):
+        """Accumulate timing, Skyfield evaluation and event counts for one stage."""
+        stats = self.run_stats.setdefault(name, {'runs': 0, 'seconds': 0.0, 'skyfield_evaluations': 0, 'events': 0})
+        stats['runs'] += runs
+        stats['seconds'] += seconds
+        stats['skyfield_evaluations'] += evaluations
+        stats['events'] += events
+    
+    def merge_run_stats(self, run_stats, cache_stats):
+        """Fold statistics gathered by another generator (a worker process) into this run."""
+        for name, stats in run_stats.items():
+            self.record_stage(name, stats['seconds'], stats['skyfield_evaluations'], stats['events'], stats['runs'])
+        for key in self.worker_cache_stats:
+            self.worker_cache_stats[key] += cache_stats[key]
+    
+    def cache_stats(self):
+        return {'hits': self.cache.hits, 'misses': self.cache.misses, 'evaluations': self.cache.evaluations}
+    
+    def run_detector(self, name, *args, keep=None):
+        """Run one registered detector, recording its wall time, evaluations and events.
+        
+        `keep` optionally filters the events (e.g. to a chunk's own time span) before they are counted.
+        """
+        _, method = EVENT_DETECTORS[name]
+        evaluations = self.cache.evaluations
+        started = time.perf_counter()
+        events = getattr(self, method)(*args)
+        if keep is not None:
+            events = [event for event in events if keep(event)]
+        self.record_stage(name, time.perf_counter() - started, self.cache.evaluations - evaluations, len(events))
+        return events
+    
+    def build_run_report(self, **details):
+        """Structured summary of the last run: per-stage statistics and cache counters."""
+        cache = {key: value + self.worker_cache_stats[key] for key, value in self.cache_stats().items()}
+        stages = {name: dict(stats, seconds=round(stats['seconds'], 6)) for name, stats in self.run_stats.items()}
+        return dict(
+            details,
+            observer={'lat': self.observer_lat, 'lon': self.observer_lon, 'elevation_m': self.observer_elevation},
+            detectors=self.detectors,
+            backend=self.backend.name,
+            stages=stages,
+            total_seconds=round(sum(stats['seconds'] for stats in self.run_stats.values()), 6),
+            skyfield_cache=cache,
+        )
+    
+    def write_run_report(self, filename, **details):
+        """Write build_run_report() as JSON; `details` adds run metadata (bodies, range, ...)."""
+        report = self.build_run_report(**details)
+        with open(filename, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+        
+        print(f"\nRun report: {filename}")
+        for name, stats in report['stages'].items():
+            print(f"  {name:<16}{stats['seconds']:>10.3f}s{stats['skyfield_evaluations']:>12,} evals{stats['events']:>8} events")
+        return report
+        
     def datetime_to_custom_epoch(self, dt):
         """Convert datetime to custom epoch timestamp."""
         if dt.tzinfo is None:
@@ -79,121 +642,60 @@ class DualFileEphemerisGenerator:
         return int(unix_timestamp - CUSTOM_EPOCH_OFFSET)
     
     def find_phase_transit_events(self, body, celestial_body, start_date, end_date):
-        """Find phase transit events when angular separation from sun crosses key angles."""
+        """Find phase transit events when the elongation from the sun crosses key angles."""
         print(f"  Finding phase transit events...")
         
-        events = []
-        current_time = start_date
-        time_delta = timedelta(hours=6)  # Check every 6 hours
-        
-        # Key angles to detect (in degrees)
-        key_angles = [
-            (0, EVENT_CONJUNCTION, "Conjunction"),
-            (90, EVENT_QUADRATURE_EAST, "Eastern Quadrature"), 
-            (180, EVENT_OPPOSITION, "Opposition"),
-            (270, EVENT_QUADRATURE_WEST, "Western Quadrature")
-        ]
+        # Elongation quadrant boundaries to detect (ecliptic longitude of body minus sun)
+        key_angles = {
+            0: (EVENT_CONJUNCTION, "Conjunction"),
+            1: (EVENT_QUADRATURE_EAST, "Eastern Quadrature"),
+            2: (EVENT_OPPOSITION, "Opposition"),
+            3: (EVENT_QUADRATURE_WEST, "Western Quadrature")
+        }
         
-        prev_separation = None
-        
-        while current_time <= end_date:
-            t = self.ts.from_datetime(current_time)
-            observer_at_t = self.earth + self.observer
-            
-            # Calculate angular separation from sun
-            body_apparent = observer_at_t.at(t).observe(body).apparent()
-            sun_apparent = observer_at_t.at(t).observe(self.sun).apparent()
-            separation = body_apparent.separation_from(sun_apparent)
-            separation_deg = separation.degrees
-            
-            if prev_separation is not None:
-                # Check each key angle for crossings
-                for target_angle, event_type, event_name in key_angles:
-                    # Check for crossing (considering 360° wrap-around)
-                    crossed = False
-                    
-                    if target_angle == 0:  # Conjunction (0°)
-                        # Handle wrap-around at 0°/360°
-                        if (prev_separation > 350 and separation_deg < 10) or \
-                        (prev_separation > 10 and separation_deg < 10 and prev_separation > separation_deg):
-                            crossed = True
-                    elif target_angle == 180:  # Opposition
-                        if prev_separation < 180 and separation_deg >= 180:
-                            crossed = True
-                        elif prev_separation > 180 and separation_deg <= 180:
-                            crossed = True
-                    else:  # Quadratures (90°, 270°)
-                        tolerance = 5  # degrees
-                        if abs(prev_separation - target_angle) > tolerance and \
-                        abs(separation_deg - target_angle) <= tolerance:
-                            crossed = True
-                    
-                    if crossed:
-                        # Find more precise crossing time
-                        precise_time = self.find_precise_phase_transit(
-                            body, celestial_body, current_time - time_delta, current_time, target_angle
-                        )
-                        
-                        if precise_time:
-                            stream_data = self.calculate_stream_data(body, celestial_body, precise_time)
-                            
-                            event = {
-                                'timestamp': stream_data['timestamp'],
-                                'event_type': event_type,
-                                'azimuth_deg': stream_data['azimuth_deg'],
-                                'altitude_deg': stream_data['altitude_deg'],
-                                'phase': stream_data['phase'],  # This will be the actual angle at crossing
-                                'distance_km': stream_data['distance_km']
-                            }
-                            events.append(event)
-                            
-                            print(f"    {event_name}: {precise_time.strftime('%Y-%m-%d %H:%M:%S')} (separation: {event['phase']:.1f}°)")
-            
-            prev_separation = separation_deg
-            current_time += time_delta
+        t0 = self.ts.from_datetime(start_date)
+        t1 = self.ts.from_datetime(end_date)
         
-        return events
-
-    def find_precise_phase_transit(self, body, celestial_body, start_time, end_time, target_angle):
-        """Find precise time of phase transit crossing."""
-        current_time = start_time
-        time_delta = timedelta(minutes=30)  # 30-minute precision
+        def elongation_quadrant(t):
+            _, body_lon, _ = self.cache.apparent(body, t).ecliptic_latlon('date')
+            _, sun_lon, _ = self.cache.apparent(self.sun, t).ecliptic_latlon('date')
+            return (((body_lon.degrees - sun_lon.degrees) // 90) % 4).astype(int)
+        elongation_quadrant.step_days = 0.25
         
-        closest_time = None
-        closest_distance = float('inf')
+        times, quadrants = find_discrete(t0, t1, elongation_quadrant)
         
-        while current_time <= end_time:
-            t = self.ts.from_datetime(current_time)
-            observer_at_t = self.earth + self.observer
-            
-            body_apparent = observer_at_t.at(t).observe(body).apparent()
-            sun_apparent = observer_at_t.at(t).observe(self.sun).apparent()
-            separation = body_apparent.separation_from(sun_apparent)
-            separation_deg = separation.degrees
+        events = []
+        prev_quadrant = int(elongation_quadrant(t0))
+        for time, quadrant in zip(times, quadrants):
+            # The boundary crossed is the new quadrant when moving forward (prograde),
+            # the old one when the elongation moves backwards (inner planets, retrograde)
+            boundary = quadrant if (quadrant - prev_quadrant) % 4 == 1 else prev_quadrant
+            prev_quadrant = quadrant
+            event_type, event_name = key_angles[boundary]
             
-            # Calculate distance from target angle (handling wrap-around)
-            if target_angle == 0:
-                distance = min(separation_deg, 360 - separation_deg)
-            else:
-                distance = abs(separation_deg - target_angle)
+            event_dt = time.utc_datetime()
+            stream_data = self.calculate_stream_data(body, celestial_body, event_dt)
             
-            if distance < closest_distance:
-                closest_distance = distance
-                closest_time = current_time
+            event = {
+                'timestamp': stream_data['timestamp'],
+                'event_type': event_type,
+                'azimuth_deg': stream_data['azimuth_deg'],
+                'altitude_deg': stream_data['altitude_deg'],
+                'phase': stream_data['phase'],  # This will be the actual angle at crossing
+                'distance_km': stream_data['distance_km']
+            }
+            events.append(event)
             
-            current_time += time_delta
+            print(f"    {event_name}: {event_dt.strftime('%Y-%m-%d %H:%M:%S')} (separation: {event['phase']:.1f}°)")
         
-        return closest_time
+        return events
 
     def get_moon_phase(self, t):
         """Calculate moon phase (0.0 = new moon, 1.0 = full moon)."""
-        earth = self.planets['earth']
-        sun = self.planets['sun']
-        moon = self.planets['moon']
-        
-        earth_pos = earth.at(t)
-        sun_apparent = earth_pos.observe(sun)
-        moon_apparent = earth_pos.observe(moon)
+        earth_pos = self.cache.earth_at(t)
+        sun_apparent = earth_pos.observe(self.sun)
+        moon_apparent = earth_pos.observe(self.moon)
+        self.cache.count_evaluations(t, 2)
         
         elongation = sun_apparent.separation_from(moon_apparent)
         elongation_degrees = elongation.degrees
@@ -203,29 +705,34 @@ class DualFileEphemerisGenerator:
     
     def find_closest_planet(self, target_body, t, current_body_name):
         """Find the closest planet to the target celestial body."""
-        earth_pos = self.earth.at(t)
-        target_apparent = earth_pos.observe(target_body).apparent()
+        closest_ids, closest_distances = self.find_closest_planets(target_body, t, current_body_name)
+        return int(closest_ids), float(closest_distances)
+    
+    def find_closest_planets(self, target_body, t, current_body_name):
+        """Find the closest planet to the target body for every instant of a Time array.
         
-        closest_distance = float('inf')
-        closest_planet_id = 0
+        Each candidate body is observed once over the whole array; the closest one
+        is the argmin over the resulting (planets x times) separation matrix.
+        """
+        earth_pos = self.cache.earth_at(t)
+        target_apparent = earth_pos.observe(target_body).apparent()
         
+        planet_ids = []
+        separations = []
         for planet_name, planet_body in self.available_planets.items():
             if planet_name.lower() == current_body_name.lower():
                 continue
-                
-            try:
-                planet_apparent = earth_pos.observe(planet_body).apparent()
-                separation = target_apparent.separation_from(planet_apparent)
-                separation_degrees = separation.degrees
-                
-                if separation_degrees < closest_distance:
-                    closest_distance = separation_degrees
-                    closest_planet_id = PLANET_MAP.get(planet_name, 0)
-                    
-            except Exception:
-                continue
-        
-        return closest_planet_id, closest_distance
+            
+            planet_apparent = earth_pos.observe(planet_body).apparent()
+            separations.append(target_apparent.separation_from(planet_apparent).degrees)
+            planet_ids.append(PLANET_MAP.get(planet_name, 0))
+        self.cache.count_evaluations(t, len(planet_ids) + 1)
+        
+        separations = np.array(separations)
+        closest_index = np.argmin(separations, axis=0)
+        closest_ids = np.array(planet_ids)[closest_index]
+        closest_distances = np.take_along_axis(separations, np.expand_dims(closest_index, 0), axis=0)[0]
+        return closest_ids, closest_distances
     
     def write_stream_csv(self, stream_records, filename, celestial_body, start_date, end_date, interval_seconds):
         """Write stream data to CSV file for debugging."""
@@ -233,35 +740,31 @@ class DualFileEphemerisGenerator:
         
         with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
             writer = csv.writer(csvfile)
-            comm = "#"
-           
-        
-            # Write header
-            writer.writerow([
-                'datetime_utc',
-                'timestamp',
-                'phase_or_separation', 
-                'distance_km',
-                'azimuth_deg',
-                'altitude_deg'
-            ])
             
-            # Write stream records
-            for record in stream_records:
-                dt = datetime.fromtimestamp(record['timestamp'] + CUSTOM_EPOCH_OFFSET, tz=utc)
-                writer.writerow([
-                    dt.strftime('%Y-%m-%d %H:%M:%S'),
-                    record['timestamp'],
-                    f"{record['phase']:.6f}",
-                    f"{record['distance_km']:.1f}",
-                    f"{record['azimuth_deg']:.4f}",
-                    f"{record['altitude_deg']:.4f}"
-                ])
+            writer.writerow(STREAM_CSV_COLUMNS)
+            self.write_stream_csv_rows(writer, stream_records)
         
         file_size = Path(filename).stat().st_size
         print(f"  Written: {len(stream_records)} stream records, {file_size:,} bytes")
-
     
+    def write_stream_csv_rows(self, writer, stream_records):
+        """Write stream records to a csv writer, column by column from the record store."""
+        for timestamp, phase, distance_km, azimuth_deg, altitude_deg in zip(
+            stream_records['timestamp'].tolist(),
+            stream_records['phase'].tolist(),
+            stream_records['distance_km'].tolist(),
+            stream_records['azimuth_deg'].tolist(),
+            stream_records['altitude_deg'].tolist()
+        ):
+            dt = datetime.fromtimestamp(timestamp + CUSTOM_EPOCH_OFFSET, tz=utc)
+            writer.writerow([
+                dt.strftime('%Y-%m-%d %H:%M:%S'),
+                timestamp,
+                f"{phase:.6f}",
+                f"{distance_km:.1f}",
+                f"{azimuth_deg:.4f}",
+                f"{altitude_deg:.4f}"
+            ])
 
     def write_events_csv(self, events, filename, celestial_body):
         """Write events data to CSV file for debugging."""
@@ -270,98 +773,134 @@ class DualFileEphemerisGenerator:
         with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
             writer = csv.writer(csvfile)
             
-            # Write header directly
-            writer.writerow([
-                'datetime_utc',
-                'timestamp',
-                'event_type',
-                'event_name',
-                'phase_or_separation',
-                'distance_km', 
-                'azimuth_deg',
-                'altitude_deg',
-                'from_planet',
-                'to_planet'
-            ])
-            
-            # Event type names
-            event_names = {
-                EVENT_RISE: 'Rise',
-                EVENT_SET: 'Set', 
-                EVENT_CULMINATION: 'Culmination',
-                EVENT_ANTI_CULMINATION: 'Anti-culmination',
-                EVENT_PLANET_TRANSIT: 'Planet Transit',
-                EVENT_APOGEE: 'Apogee',
-                EVENT_PERIGEE: 'Perigee',
-                EVENT_NEW_MOON: 'New Moon',
-                EVENT_FULL_MOON: 'Full Moon',
-                EVENT_FIRST_QUARTER: 'First Quarter',
-                EVENT_LAST_QUARTER: 'Last Quarter',
-                EVENT_CONJUNCTION: 'Conjunction',
-                EVENT_QUADRATURE_EAST: 'Eastern Quadrature',
-                EVENT_OPPOSITION: 'Opposition',
-                EVENT_QUADRATURE_WEST: 'Western Quadrature'
-            }
-            
-            # Planet ID to name mapping
-            planet_id_to_name = {v: k.capitalize() for k, v in PLANET_MAP.items()}
-            
-            # Write event records
-            for event in events:
-                dt = datetime.fromtimestamp(event['timestamp'] + CUSTOM_EPOCH_OFFSET, tz=utc)
-                event_name = event_names.get(event['event_type'], f"Unknown_{event['event_type']}")
-                
-                # Handle planet transit details
-                from_planet = ''
-                to_planet = ''
-                if event['event_type'] == EVENT_PLANET_TRANSIT:
-                    from_planet = planet_id_to_name.get(event.get('from_planet_id', 0), '')
-                    to_planet = planet_id_to_name.get(event.get('to_planet_id', 0), '')
-                
-                writer.writerow([
-                    dt.strftime('%Y-%m-%d %H:%M:%S'),
-                    event['timestamp'],
-                    event['event_type'],
-                    event_name,
-                    f"{event['phase']:.6f}",
-                    f"{event['distance_km']:.1f}",
-                    f"{event['azimuth_deg']:.4f}",
-                    f"{event['altitude_deg']:.4f}",
-                    from_planet,
-                    to_planet
-                ])
+            writer.writerow(EVENTS_CSV_COLUMNS)
+            self.write_events_csv_rows(writer, events)
         
         file_size = Path(filename).stat().st_size
         print(f"  Written: {len(events)} event records, {file_size:,} bytes")
 
+    def write_events_csv_rows(self, writer, events):
+        """Write event dicts to a csv writer."""
+        # Event type names
+        event_names = {
+            EVENT_RISE: 'Rise',
+            EVENT_SET: 'Set', 
+            EVENT_CULMINATION: 'Culmination',
+            EVENT_ANTI_CULMINATION: 'Anti-culmination',
+            EVENT_PLANET_TRANSIT: 'Planet Transit',
+            EVENT_APOGEE: 'Apogee',
+            EVENT_PERIGEE: 'Perigee',
+            EVENT_NEW_MOON: 'New Moon',
+            EVENT_FULL_MOON: 'Full Moon',
+            EVENT_FIRST_QUARTER: 'First Quarter',
+            EVENT_LAST_QUARTER: 'Last Quarter',
+            EVENT_CONJUNCTION: 'Conjunction',
+            EVENT_QUADRATURE_EAST: 'Eastern Quadrature',
+            EVENT_OPPOSITION: 'Opposition',
+            EVENT_QUADRATURE_WEST: 'Western Quadrature'
+        }
+        
+        # Planet ID to name mapping
+        planet_id_to_name = {v: k.capitalize() for k, v in PLANET_MAP.items()}
+        
+        # Write event records
+        for event in events:
+            dt = datetime.fromtimestamp(event['timestamp'] + CUSTOM_EPOCH_OFFSET, tz=utc)
+            event_name = event_names.get(event['event_type'], f"Unknown_{event['event_type']}")
+            
+            # Handle planet transit details
+            from_planet = ''
+            to_planet = ''
+            if event['event_type'] == EVENT_PLANET_TRANSIT:
+                from_planet = planet_id_to_name.get(event.get('from_planet_id', 0), '')
+                to_planet = planet_id_to_name.get(event.get('to_planet_id', 0), '')
+            
+            writer.writerow([
+                dt.strftime('%Y-%m-%d %H:%M:%S'),
+                event['timestamp'],
+                event['event_type'],
+                event_name,
+                f"{event['phase']:.6f}",
+                f"{event['distance_km']:.1f}",
+                f"{event['azimuth_deg']:.4f}",
+                f"{event['altitude_deg']:.4f}",
+                from_planet,
+                to_planet
+            ])
+
     def calculate_stream_data(self, body, current_body_name, time_dt):
         """Calculate streamlined data for the ephemeral stream file."""
         t = self.ts.from_datetime(time_dt)
-        observer_at_t = self.earth + self.observer
-        apparent = observer_at_t.at(t).observe(body).apparent()
-        
-        ra, dec, distance = apparent.radec()
-        alt, az, d = apparent.altaz()
+        values = self.backend.stream_channels({current_body_name: body}, t)[current_body_name]
         
         timestamp = self.datetime_to_custom_epoch(time_dt)
         
-        # Calculate phase (for moon) or angular separation from sun (for other bodies)
-        if current_body_name.lower() == 'moon':
-            phase = self.get_moon_phase(t)
-        else:
-            # Calculate angular separation from sun for planets
-            sun_apparent = observer_at_t.at(t).observe(self.sun).apparent()
-            separation = apparent.separation_from(sun_apparent)
-            phase = separation.degrees  # Store angular separation in degrees
-        
         return {
             'timestamp': timestamp,
-            'phase': phase,
-            'distance_km': distance.km,
-            'azimuth_deg': az.degrees,
-            'altitude_deg': alt.degrees
+            'phase': values['phase'],
+            'distance_km': values['distance_km'],
+            'azimuth_deg': values['azimuth_deg'],
+            'altitude_deg': values['altitude_deg']
         }
     
+    def calculate_event_data(self, body, current_body_name, times):
+        """Calculate stream data for a Skyfield Time array of event instants in one pass."""
+        if len(times) == 0:
+            return []
+        
+        values = self.backend.stream_channels({current_body_name: body}, times)[current_body_name]
+        
+        return [
+            {
+                'timestamp': self.datetime_to_custom_epoch(event_dt),
+                'phase': float(values['phase'][i]),
+                'distance_km': float(values['distance_km'][i]),
+                'azimuth_deg': float(values['azimuth_deg'][i]),
+                'altitude_deg': float(values['altitude_deg'][i])
+            }
+            for i, event_dt in enumerate(times.utc_datetime())
+        ]
+    
+    def calculate_stream_chunk(self, body, current_body_name, start_time, count, interval_seconds, out=None):
+        """Calculate stream data for `count` evenly spaced samples in one vectorized pass.
+        
+        Results are written into `out` (a STREAM_RECORD_DTYPE array or slice of one)
+        when given, otherwise into a newly allocated record store.
+        """
+        outs = {current_body_name: out} if out is not None else None
+        return self.calculate_stream_chunks(
+            {current_body_name: body}, start_time, count, interval_seconds, outs
+        )[current_body_name]
+    
+    def calculate_stream_chunks(self, bodies, start_time, count, interval_seconds, outs=None):
+        """Calculate stream data for several bodies over the same samples in one pass.
+        
+        `bodies` maps body names to Skyfield bodies. The Time array, observer state,
+        Sun position and moon phase are computed once by the backend and shared by
+        every body. Returns a dict of body name -> STREAM_RECORD_DTYPE records.
+        """
+        outs = dict(outs) if outs else {}
+        
+        t = utc_sample_times(self.ts, start_time, count, interval_seconds)
+        
+        start_timestamp = self.datetime_to_custom_epoch(start_time)
+        timestamps = start_timestamp + np.arange(count, dtype=np.int64) * int(interval_seconds)
+        
+        channels = self.backend.stream_channels(bodies, t)
+        
+        for current_body_name, values in channels.items():
+            out = outs.get(current_body_name)
+            if out is None:
+                out = outs[current_body_name] = empty_stream_records(count)
+            
+            out['timestamp'] = timestamps
+            out['phase'] = values['phase']
+            out['distance_km'] = values['distance_km']
+            out['azimuth_deg'] = values['azimuth_deg']
+            out['altitude_deg'] = values['altitude_deg']
+        
+        return outs
+    
     def get_horizon_correction(self, celestial_body):
         """Get the appropriate horizon correction for the celestial body."""
         body_name = celestial_body.lower()
@@ -377,10 +916,9 @@ class DualFileEphemerisGenerator:
         horizon_degrees = self.get_horizon_correction(celestial_body)
         t0 = self.ts.from_datetime(start_date)
         t1 = self.ts.from_datetime(end_date)
-        observer_location = self.earth + self.observer
         
         def body_above_horizon(t):
-            apparent = observer_location.at(t).observe(body).apparent()
+            apparent = self.cache.apparent(body, t)
             alt, az, d = apparent.altaz()
             return alt.degrees > horizon_degrees
         body_above_horizon.step_days = 0.1
@@ -408,338 +946,705 @@ class DualFileEphemerisGenerator:
         
         return events
     
-    def find_culmination_events(self, body, celestial_body, start_date, end_date):
-        """Find culmination and anti-culmination events."""
-        print(f"  Finding culmination events...")
+    def find_planet_transit_events(self, body, celestial_body, start_date, end_date,
+                                   check_interval_minutes=PLANET_TRANSIT_CHECK_MINUTES):
+        """Find when the closest planet changes."""
+        print(f"  Finding planet transit events...")
         
-        t0 = self.ts.from_datetime(start_date)
-        t1 = self.ts.from_datetime(end_date)
-        observer_location = self.earth + self.observer
+        interval_seconds = check_interval_minutes * 60
+        total_checks = int((end_date - start_date).total_seconds() // interval_seconds) + 1
         
-        def body_hour_angle(t):
-            apparent = observer_location.at(t).observe(body).apparent()
-            ra, dec, distance = apparent.radec()
+        transit_jd = []
+        from_ids = []
+        to_ids = []
+        prev_jd = None
+        prev_closest_id = None
+        check_count = 0
+        
+        while check_count < total_checks:
+            # Evaluate the closest planet over a whole chunk of check times at once
+            chunk_size = min(STREAM_CHUNK_SIZE, total_checks - check_count)
+            chunk_start = start_date + timedelta(seconds=check_count * interval_seconds)
+            t = utc_sample_times(self.ts, chunk_start, chunk_size, interval_seconds)
+            closest_ids, _ = self.find_closest_planets(body, t, celestial_body)
             
-            lst = t.gast + (self.observer_lon / 15.0)
-            hour_angle = lst - ra.hours
+            # Carry the last check of the previous chunk so boundary changes are not lost
+            if prev_closest_id is not None:
+                chunk_jd = np.concatenate(([prev_jd], t.tt))
+                closest_ids = np.concatenate(([prev_closest_id], closest_ids))
+            else:
+                chunk_jd = t.tt
             
-            while all(hour_angle > 12):
-                hour_angle -= 24
-            while all(hour_angle < -12):
-                hour_angle += 24
-                
-            return hour_angle < 0
+            changed = np.flatnonzero(closest_ids[1:] != closest_ids[:-1])
+            if len(changed):
+                # Refine only the intervals where the argmin changes
+                transit_jd.append(self.find_precise_planet_transits(
+                    body, celestial_body, chunk_jd[changed], chunk_jd[changed + 1], closest_ids[changed]
+                ))
+                from_ids.append(closest_ids[changed])
+                to_ids.append(closest_ids[changed + 1])
+            
+            prev_jd = chunk_jd[-1]
+            prev_closest_id = closest_ids[-1]
+            check_count += chunk_size
         
-
-        body_hour_angle.step_days = 0.1
-
-        times, crossing_upward = find_discrete(t0, t1, body_hour_angle)
+        if not transit_jd:
+            return []
+        
+        times = self.ts.tt_jd(np.concatenate(transit_jd))
+        from_ids = np.concatenate(from_ids)
+        to_ids = np.concatenate(to_ids)
         
         events = []
-        for time, upward in zip(times, crossing_upward):
-            event_dt = time.utc_datetime()
-            stream_data = self.calculate_stream_data(body, celestial_body, event_dt)
-            
-            # Determine if this is upper or lower culmination
-            if stream_data['altitude_deg'] > 0:
-                event_type = EVENT_CULMINATION
-                event_name = "culmination"
-            else:
-                event_type = EVENT_ANTI_CULMINATION  
-                event_name = "anti-culmination"
-            
+        event_data = self.calculate_event_data(body, celestial_body, times)
+        planet_id_to_name = {v: k for k, v in PLANET_MAP.items()}
+        for stream_data, from_id, to_id in zip(event_data, from_ids.tolist(), to_ids.tolist()):
             event = {
                 'timestamp': stream_data['timestamp'],
-                'event_type': event_type,
+                'event_type': EVENT_PLANET_TRANSIT,
                 'azimuth_deg': stream_data['azimuth_deg'],
                 'altitude_deg': stream_data['altitude_deg'],
                 'phase': stream_data['phase'],
-                'distance_km': stream_data['distance_km']
+                'distance_km': stream_data['distance_km'],
+                'from_planet_id': from_id,
+                'to_planet_id': to_id
             }
             events.append(event)
             
-            print(f"    {event_name.capitalize()}: {event_dt.strftime('%Y-%m-%d %H:%M:%S')} (alt: {event['altitude_deg']:.1f}°)")
+            event_dt = datetime.fromtimestamp(stream_data['timestamp'] + CUSTOM_EPOCH_OFFSET, tz=utc)
+            from_name = planet_id_to_name.get(from_id, 'Unknown')
+            to_name = planet_id_to_name.get(to_id, 'Unknown')
+            print(f"    Transit: {event_dt.strftime('%Y-%m-%d %H:%M:%S')} ({from_name} → {to_name})")
         
         return events
     
-    def find_planet_transit_events(self, body, celestial_body, start_date, end_date, check_interval_minutes=30):
-        """Find when the closest planet changes."""
-        print(f"  Finding planet transit events...")
-        
-        events = []
-        current_time = start_date
-        time_delta = timedelta(minutes=check_interval_minutes)
-        prev_closest_id = None
-        
-        while current_time <= end_date:
-            t = self.ts.from_datetime(current_time)
-            closest_id, _ = self.find_closest_planet(body, t, celestial_body)
-            
-            if prev_closest_id is not None and closest_id != prev_closest_id:
-                # Planet transit detected - find more precise time
-                precise_time = self.find_precise_planet_transit(
-                    body, celestial_body, current_time - time_delta, current_time, 
-                    prev_closest_id, closest_id
-                )
-                
-                if precise_time:
-                    stream_data = self.calculate_stream_data(body, celestial_body, precise_time)
-                    
-                    event = {
-                        'timestamp': stream_data['timestamp'],
-                        'event_type': EVENT_PLANET_TRANSIT,
-                        'azimuth_deg': stream_data['azimuth_deg'],
-                        'altitude_deg': stream_data['altitude_deg'],
-                        'phase': stream_data['phase'],
-                        'distance_km': stream_data['distance_km'],
-                        'from_planet_id': prev_closest_id,
-                        'to_planet_id': closest_id
-                    }
-                    events.append(event)
-                    
-                    from_name = [k for k, v in PLANET_MAP.items() if v == prev_closest_id][0] if prev_closest_id in PLANET_MAP.values() else 'Unknown'
-                    to_name = [k for k, v in PLANET_MAP.items() if v == closest_id][0] if closest_id in PLANET_MAP.values() else 'Unknown'
-                    print(f"    Transit: {precise_time.strftime('%Y-%m-%d %H:%M:%S')} ({from_name} → {to_name})")
-            
-            prev_closest_id = closest_id
-            current_time += time_delta
-        
-        return events
+    def find_precise_planet_transits(self, body, celestial_body, start_jd, end_jd, from_ids, precision_seconds=1.0):
+        """Find precise times of planet transits by bisecting all change intervals at once.
+        
+        Returns the TT Julian dates at which the closest planet first stops being `from_ids`.
+        """
+        lo = np.array(start_jd, dtype=np.float64)
+        hi = np.array(end_jd, dtype=np.float64)
+        precision_days = precision_seconds / 86400.0
+        
+        while np.max(hi - lo) > precision_days:
+            mid = (lo + hi) / 2
+            closest_ids, _ = self.find_closest_planets(body, self.ts.tt_jd(mid), celestial_body)
+            changed = closest_ids != from_ids
+            hi = np.where(changed, mid, hi)
+            lo = np.where(changed, lo, mid)
+        
+        return hi
     
-    def find_precise_planet_transit(self, body, celestial_body, start_time, end_time, from_id, to_id):
-        """Find precise time of planet transit using binary search."""
-        current_time = start_time
-        time_delta = timedelta(minutes=1)
-        
-        while current_time <= end_time:
-            t = self.ts.from_datetime(current_time)
-            closest_id, _ = self.find_closest_planet(body, t, celestial_body)
-            
-            if closest_id == to_id:
-                return current_time
-            
-            current_time += time_delta
-        
-        return None
-    
-    def find_moon_phase_events(self, start_date, end_date):
-        """Find major moon phase events."""
-        if hasattr(self, 'current_body') and self.current_body.lower() != 'moon':
+    def find_moon_phase_events(self, body, celestial_body, start_date, end_date):
+        """Find major moon phase events (one per lunation quarter); moon only."""
+        if celestial_body.lower() != 'moon':
             return []
             
         print(f"  Finding moon phase events...")
         
-        events = []
-        current_time = start_date
-        time_delta = timedelta(hours=2)  # Reduced to 2 hours for better detection
-        
-        # Store phase history for peak/trough detection
-        phase_history = []
-        time_history = []
-        
-        while current_time <= end_date:
-            t = self.ts.from_datetime(current_time)
-            phase = self.get_moon_phase(t)
-            
-            phase_history.append(phase)
-            time_history.append(current_time)
-            
-            # Keep only last 5 points for local extrema detection
-            if len(phase_history) > 5:
-                phase_history.pop(0)
-                time_history.pop(0)
-            
-            # Need at least 3 points to detect extrema
-            if len(phase_history) >= 3:
-                # Check if middle point is a local maximum (full moon) or minimum (new moon)
-                mid_idx = len(phase_history) // 2
-                mid_phase = phase_history[mid_idx]
-                mid_time = time_history[mid_idx]
-                
-                # Check for local maximum (full moon)
-                if (mid_idx > 0 and mid_idx < len(phase_history) - 1):
-                    is_max = (mid_phase > phase_history[mid_idx - 1] and 
-                            mid_phase > phase_history[mid_idx + 1] and
-                            mid_phase > 0.85)  # Must be reasonably close to full
-                    
-                    is_min = (mid_phase < phase_history[mid_idx - 1] and 
-                            mid_phase < phase_history[mid_idx + 1] and
-                            mid_phase < 0.15)  # Must be reasonably close to new
-                    
-                    # Check for quarter phases (around 0.5)
-                    is_quarter = (abs(mid_phase - 0.5) < 0.1)
-                    
-                    if is_max:
-                        # Full moon detected
-                        precise_time = self.find_precise_moon_phase(mid_time, 1.0, timedelta(hours=4))
-                        if precise_time:
-                            self.add_moon_phase_event(events, precise_time, EVENT_FULL_MOON, "Full Moon")
-                    
-                    elif is_min:
-                        # New moon detected  
-                        precise_time = self.find_precise_moon_phase(mid_time, 0.0, timedelta(hours=4))
-                        if precise_time:
-                            self.add_moon_phase_event(events, precise_time, EVENT_NEW_MOON, "New Moon")
-                    
-                    elif is_quarter:
-                        # Determine if first or last quarter by checking trend
-                        if len(phase_history) >= 3:
-                            trend = phase_history[-1] - phase_history[0]  # Overall trend
-                            if trend > 0:
-                                # Phase increasing -> First quarter
-                                precise_time = self.find_precise_moon_phase(mid_time, 0.5, timedelta(hours=4))
-                                if precise_time:
-                                    self.add_moon_phase_event(events, precise_time, EVENT_FIRST_QUARTER, "First Quarter")
-                            else:
-                                # Phase decreasing -> Last quarter
-                                precise_time = self.find_precise_moon_phase(mid_time, 0.5, timedelta(hours=4))
-                                if precise_time:
-                                    self.add_moon_phase_event(events, precise_time, EVENT_LAST_QUARTER, "Last Quarter")
-            
-            current_time += time_delta
-    
-        return events
-
-    def find_precise_moon_phase(self, approximate_time, target_phase, search_window):
-        """Find precise time when moon phase is closest to target value."""
-        start_time = approximate_time - search_window
-        end_time = approximate_time + search_window
+        # moon_phases() returns the quarter index 0-3 of the Sun-Moon ecliptic elongation
+        quarter_events = {
+            0: (EVENT_NEW_MOON, "New Moon"),
+            1: (EVENT_FIRST_QUARTER, "First Quarter"),
+            2: (EVENT_FULL_MOON, "Full Moon"),
+            3: (EVENT_LAST_QUARTER, "Last Quarter")
+        }
         
-        best_time = approximate_time
-        best_distance = float('inf')
+        t0 = self.ts.from_datetime(start_date)
+        t1 = self.ts.from_datetime(end_date)
+        quarter_at = moon_phases(self.planets)
         
-        current_time = start_time
-        time_step = timedelta(minutes=30)
+        def moon_quarter(t):
+            # Sun and Moon, observed from the geocenter
+            self.cache.count_evaluations(t, 3)
+            return quarter_at(t)
+        moon_quarter.step_days = quarter_at.step_days
         
-        while current_time <= end_time:
-            t = self.ts.from_datetime(current_time)
-            phase = self.get_moon_phase(t)
-            
-            distance = abs(phase - target_phase)
+        times, quarters = find_discrete(t0, t1, moon_quarter)
+        
+        events = []
+        event_data = self.calculate_event_data(self.moon, 'moon', times)
+        for stream_data, quarter in zip(event_data, quarters):
+            event_type, event_name = quarter_events[int(quarter)]
+            event_dt = datetime.fromtimestamp(stream_data['timestamp'] + CUSTOM_EPOCH_OFFSET, tz=utc)
             
-            if distance < best_distance:
-                best_distance = distance
-                best_time = current_time
+            event = {
+                'timestamp': stream_data['timestamp'],
+                'event_type': event_type,
+                'azimuth_deg': stream_data['azimuth_deg'],
+                'altitude_deg': stream_data['altitude_deg'],
+                'phase': stream_data['phase'],
+                'distance_km': stream_data['distance_km']
+            }
+            events.append(event)
             
-            current_time += time_step
+            print(f"    {event_name}: {event_dt.strftime('%Y-%m-%d %H:%M:%S')} (phase: {event['phase']:.3f})")
         
-        return best_time
-
-    def add_moon_phase_event(self, events, event_time, event_type, event_name):
-        """Add a moon phase event to the events list."""
-        # Check if we already have this event (avoid duplicates)
-        for existing_event in events:
-            if (existing_event['event_type'] == event_type and 
-                abs(existing_event['timestamp'] - self.datetime_to_custom_epoch(event_time)) < 3600):  # Within 1 hour
-                return  # Skip duplicate
-        
-        stream_data = self.calculate_stream_data(self.moon, 'moon', event_time)
-        
-        event = {
-            'timestamp': stream_data['timestamp'],
-            'event_type': event_type,
-            'azimuth_deg': stream_data['azimuth_deg'],
-            'altitude_deg': stream_data['altitude_deg'],
-            'phase': stream_data['phase'],
-            'distance_km': stream_data['distance_km']
-        }
-        events.append(event)
-        
-        print(f"    {event_name}: {event_time.strftime('%Y-%m-%d %H:%M:%S')} (phase: {event['phase']:.3f})")
+        return events
     
     def generate_dual_files(self, celestial_body, start_date, end_date, stream_interval_seconds=60):
         """Generate both stream and event files."""
-        # Ensure dates are timezone-aware (UTC)
-        if start_date.tzinfo is None:
-            start_date = start_date.replace(tzinfo=utc)
-        if end_date.tzinfo is None:  
-            end_date = end_date.replace(tzinfo=utc)
-        
-        body = self.available_planets[celestial_body.lower()]
-        if body is None:
-            raise ValueError(f"Unknown celestial body: {celestial_body}")
-            
+        results = self.generate_multi_body_files([celestial_body], start_date, end_date, stream_interval_seconds)
+        return results[celestial_body]
+    
+    def generate_multi_body_files(self, celestial_bodies, start_date, end_date, stream_interval_seconds=60):
+        """Generate stream and event data for several bodies in a single stream pass.
         
-        self.current_body = celestial_body  # For moon phase events
+        Returns a dict of body name -> (stream_records, events), with the same
+        contents generate_dual_files produces for each body on its own.
+        """
+        start_date, end_date = ensure_utc(start_date), ensure_utc(end_date)
+        bodies = self.resolve_bodies(celestial_bodies)
+        self.reset_run()
         
-        print(f"Generating dual files for {celestial_body.upper()}")
+        print(f"Generating dual files for {', '.join(name.upper() for name in bodies)}")
         print(f"Date range: {start_date} to {end_date}")
         print(f"Stream interval: {stream_interval_seconds} seconds")
         
-        # Phase 1: Generate ephemeral stream data
-        print("\n=== GENERATING EPHEMERAL STREAM ===")
-        stream_records = []
-        current_time = start_date
-        time_delta = timedelta(seconds=stream_interval_seconds)
+        stream_records = self.generate_stream_records(bodies, start_date, end_date, stream_interval_seconds)
         
-        total_steps = int((end_date - start_date).total_seconds() / stream_interval_seconds)
+        # Phase 2: Generate event data
+        results = {}
+        for celestial_body, body in bodies.items():
+            events = self.generate_events(body, celestial_body, start_date, end_date, stream_records[celestial_body])
+            results[celestial_body] = (stream_records[celestial_body], events)
+        
+        return results
+    
+    def resolve_bodies(self, celestial_bodies):
+        """Map body names to Skyfield bodies, rejecting unknown names."""
+        bodies = {}
+        for celestial_body in celestial_bodies:
+            body = self.available_planets.get(celestial_body.lower())
+            if body is None:
+                raise ValueError(f"Unknown celestial body: {celestial_body}")
+            bodies[celestial_body] = body
+        return bodies
+    
+    def generate_stream_records(self, bodies, start_date, end_date, stream_interval_seconds):
+        """Sample every body on the stream grid, sharing per-sample terms across bodies."""
+        print("\n=== GENERATING EPHEMERAL STREAM ===")
+        total_steps = int((end_date - start_date).total_seconds() // stream_interval_seconds) + 1
+        stream_records = {name: empty_stream_records(total_steps) for name in bodies}
         step_count = 0
+        evaluations = self.cache.evaluations
+        started = time.perf_counter()
         
-        while current_time <= end_date:
-            if step_count % 1000 == 0:
-                print(f"  Progress: {step_count}/{total_steps} ({100*step_count/total_steps:.1f}%)")
+        while step_count < total_steps:
+            print(f"  Progress: {step_count}/{total_steps} ({100*step_count/total_steps:.1f}%)")
             
-            stream_data = self.calculate_stream_data(body, celestial_body, current_time)
-            stream_records.append(stream_data)
+            chunk_size = min(STREAM_CHUNK_SIZE, total_steps - step_count)
+            chunk_start = start_date + timedelta(seconds=step_count * stream_interval_seconds)
+            self.calculate_stream_chunks(
+                bodies, chunk_start, chunk_size, stream_interval_seconds,
+                outs={name: records[step_count:step_count + chunk_size] for name, records in stream_records.items()}
+            )
             
-            current_time += time_delta
-            step_count += 1
+            step_count += chunk_size
         
-        print(f"  Generated {len(stream_records)} stream records")
+        self.record_stage('stream', time.perf_counter() - started, self.cache.evaluations - evaluations)
+        print(f"  Generated {total_steps} stream records per body")
+        return stream_records
+    
+    def generate_parallel_files(self, celestial_bodies, start_date, end_date, stream_interval_seconds=60,
+                                chunk_days=30, max_workers=None):
+        """Generate stream and event data by splitting the range across worker processes.
+        
+        Each worker loads de421.bsp once and handles whole time chunks; the results
+        are stitched back in timestamp order. Returns the same dict of
+        body name -> (stream_records, events) as generate_multi_body_files.
+        Chunks are aligned to the closest-planet check grid (align_chunk_steps);
+        the other range detectors search chunk by chunk, as in generate_streaming_files.
+        """
+        start_date, end_date = ensure_utc(start_date), ensure_utc(end_date)
+        bodies = self.resolve_bodies(celestial_bodies)
+        self.reset_run()
+        
+        # Chunk boundaries fall on the stream grid so stitched samples stay evenly spaced,
+        # and on the transit check grid so chunks check the closest planet like one run
+        total_steps = int((end_date - start_date).total_seconds() // stream_interval_seconds) + 1
+        chunk_steps = align_chunk_steps(max(1, int(chunk_days * 86400 // stream_interval_seconds)),
+                                        stream_interval_seconds)
+        chunks = []
+        for first_step in range(0, total_steps, chunk_steps):
+            step_count = min(chunk_steps, total_steps - first_step)
+            chunk_start = start_date + timedelta(seconds=first_step * stream_interval_seconds)
+            is_last = first_step + step_count >= total_steps
+            # Detectors search up to the next chunk's start; events there belong to the next chunk
+            chunk_end = end_date if is_last else chunk_start + timedelta(seconds=step_count * stream_interval_seconds)
+            chunks.append((first_step, step_count, chunk_start, chunk_end, is_last))
+        
+        print(f"Generating dual files for {', '.join(name.upper() for name in bodies)} in {len(chunks)} chunks")
+        print(f"Date range: {start_date} to {end_date}")
+        print(f"Stream interval: {stream_interval_seconds} seconds")
         
-        # Phase 2: Generate event data
-        print("\n=== GENERATING EVENTS ===")
-        all_events = []
+        stream_records = {name: empty_stream_records(total_steps) for name in bodies}
+        detector_events = {name: [] for name in bodies}
+        
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker_generator,
+            initargs=(self.observer_lat, self.observer_lon, self.observer_elevation, self.detectors,
+                      self.backend.name, self.backend_options)
+        ) as executor:
+            futures = {
+                executor.submit(
+                    _generate_chunk, list(bodies), chunk_start, chunk_end, step_count,
+                    stream_interval_seconds, is_last
+                ): first_step
+                for first_step, step_count, chunk_start, chunk_end, is_last in chunks
+            }
+            for future in as_completed(futures):
+                first_step = futures[future]
+                chunk_records, chunk_events, run_stats, cache_stats = future.result()
+                self.merge_run_stats(run_stats, cache_stats)
+                for name in bodies:
+                    records = chunk_records[name]
+                    stream_records[name][first_step:first_step + len(records)] = records
+                    detector_events[name].extend(chunk_events[name])
+        
+        results = {}
+        for celestial_body in bodies:
+            # Stream-derived events need the whole stitched stream
+            all_events = detector_events[celestial_body]
+            all_events.extend(self.find_stream_events(stream_records[celestial_body], celestial_body))
+            all_events.sort(key=lambda e: e['timestamp'])
+            print(f"  {celestial_body.upper()}: {total_steps} stream records, {len(all_events)} events")
+            results[celestial_body] = (stream_records[celestial_body], all_events)
+        
+        return results
+    
+    def generate_streaming_files(self, celestial_body, start_date, end_date, stream_interval_seconds,
+                                 stream_filename, events_filename, stream_csv_filename=None,
+                                 events_csv_filename=None, chunk_steps=STREAM_CHUNK_SIZE,
+                                 resume=False, checkpoint_chunks=1):
+        """Generate EPHS/EVTS (and optional CSV) files chunk by chunk with bounded memory.
+        
+        Each stream chunk is written as soon as it is computed. Detector events are
+        merged in timestamp order and written once no later chunk can emit an earlier
+        event; header counts are patched at the end. `chunk_steps` is rounded up to
+        whole closest-planet check intervals (align_chunk_steps).
+        
+        The stream file matches generate_dual_files followed by the writers byte for
+        byte, and so do stream-derived and planet transit events. Rise/set, moon
+        phase and phase transit searches run per chunk over a different sample grid,
+        so those events can differ from a single run in the last float32 digits and,
+        rarely, by a second.
+        
+        Every `checkpoint_chunks` chunks the progress is saved to a sidecar
+        `<stream_filename>.state.json`; with `resume` an interrupted run continues
+        from its last checkpoint and produces the same files as an uninterrupted one.
+        Returns (record count, event count).
+        """
+        start_date, end_date = ensure_utc(start_date), ensure_utc(end_date)
+        body = self.resolve_bodies([celestial_body])[celestial_body]
+        self.reset_run()
+        
+        total_steps = int((end_date - start_date).total_seconds() // stream_interval_seconds) + 1
+        chunk_steps = align_chunk_steps(chunk_steps, stream_interval_seconds)
+        # A distance extremum is found once its dominance window is complete, and its
+        # event lies within a window of it; stream detectors settle events that far
+        # back and need twice that much history before each chunk
+        settle_steps = 2 * (DISTANCE_EXTREMUM_WINDOW // stream_interval_seconds) + 1
+        context_steps = 2 * settle_steps
+        
+        filenames = [stream_filename, events_filename, stream_csv_filename, events_csv_filename]
+        state_filename = checkpoint_filename(stream_filename)
+        job = {
+            'body': celestial_body,
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+            'stream_interval_seconds': stream_interval_seconds,
+            'chunk_steps': chunk_steps,
+            'observer': [self.observer_lat, self.observer_lon, self.observer_elevation],
+            'detectors': self.detectors,
+            'backend': self.backend.name,
+            'files': [str(filename) if filename else None for filename in filenames],
+        }
+        
+        state = None
+        if resume:
+            state = self.load_checkpoint(state_filename, job)
+            if state is None:
+                print(f"No checkpoint at {state_filename}, starting from {start_date}")
+        
+        if state is None:
+            print(f"Streaming {celestial_body.upper()} from {start_date} to {end_date} in chunks of {chunk_steps} samples")
+            state = {
+                'job': job,
+                'step_count': 0,
+                'settled_timestamp': -1,
+                'first_timestamp': 0,
+                'last_timestamp': 0,
+                'event_count': 0,
+                'first_event_timestamp': 0,
+                'last_event_timestamp': 0,
+                'sequence': 0,
+                'pending': [],  # Heap of (timestamp, detector rank, sequence, event)
+                'file_sizes': [None] * len(filenames),
+            }
+            self.start_streaming_files(filenames, stream_interval_seconds)
+            if os.path.exists(state_filename):
+                os.remove(state_filename)  # Stale checkpoint of an earlier run of these files
+            context = empty_stream_records(0)
+        else:
+            print(f"Resuming {celestial_body.upper()} at record {state['step_count']}/{total_steps}")
+            for filename, size in zip(filenames, state['file_sizes']):
+                if filename:
+                    os.truncate(filename, size)
+            self.run_stats = state['run_stats']
+            # The carried context is the tail of what is already on disk
+            context_start = max(0, state['step_count'] - context_steps)
+            context = np.fromfile(stream_filename, dtype=STREAM_RECORD_DTYPE, count=state['step_count'] - context_start,
+                                  offset=STREAM_HEADER_SIZE + context_start * STREAM_RECORD_DTYPE.itemsize)
+        
+        pending = state['pending']
+        chunks_since_checkpoint = 0
+        
+        with contextlib.ExitStack() as files:
+            stream_file = files.enter_context(open(stream_filename, 'r+b'))
+            events_file = files.enter_context(open(events_filename, 'r+b'))
+            stream_file.seek(0, 2)
+            events_file.seek(0, 2)
+            stream_csv = events_csv = None
+            if stream_csv_filename:
+                stream_csv_file = files.enter_context(open(stream_csv_filename, 'a', newline='', encoding='utf-8'))
+                stream_csv = csv.writer(stream_csv_file)
+            if events_csv_filename:
+                events_csv_file = files.enter_context(open(events_csv_filename, 'a', newline='', encoding='utf-8'))
+                events_csv = csv.writer(events_csv_file)
+            open_files = [stream_file, events_file,
+                          stream_csv_file if stream_csv else None, events_csv_file if events_csv else None]
+            
+            while state['step_count'] < total_steps:
+                step_count = state['step_count']
+                print(f"  Progress: {step_count}/{total_steps} ({100*step_count/total_steps:.1f}%)")
+                
+                chunk_size = min(chunk_steps, total_steps - step_count)
+                chunk_start = start_date + timedelta(seconds=step_count * stream_interval_seconds)
+                is_last = step_count + chunk_size >= total_steps
+                chunk_end = end_date if is_last else chunk_start + timedelta(seconds=chunk_size * stream_interval_seconds)
+                
+                evaluations = self.cache.evaluations
+                started = time.perf_counter()
+                records = self.calculate_stream_chunk(body, celestial_body, chunk_start, chunk_size, stream_interval_seconds)
+                self.record_stage('stream', time.perf_counter() - started, self.cache.evaluations - evaluations)
+                
+                write_record_block(stream_file, records, STREAM_RECORD_DTYPE)
+                if stream_csv:
+                    self.write_stream_csv_rows(stream_csv, records)
+                if step_count == 0:
+                    state['first_timestamp'] = int(records[0]['timestamp'])
+                state['last_timestamp'] = int(records[-1]['timestamp'])
+                
+                # Range detectors own [chunk_start, chunk_end); stream detectors own
+                # (previous settle point, new settle point] of the samples seen so far
+                end_timestamp = self.datetime_to_custom_epoch(chunk_end)
+                window = np.concatenate([context, records])
+                settle_timestamp = state['last_timestamp']
+                if not is_last:
+                    settle_timestamp -= settle_steps * stream_interval_seconds
+                for rank, name in enumerate(self.detectors):
+                    if EVENT_DETECTORS[name][0] == 'range':
+                        # A last chunk of a single sample leaves no range to search
+                        events = [] if chunk_start >= chunk_end else self.run_detector(
+                            name, body, celestial_body, chunk_start, chunk_end,
+                            keep=lambda event: is_last or event['timestamp'] < end_timestamp
+                        )
+                    else:
+                        events = self.run_detector(
+                            name, window, celestial_body,
+                            keep=lambda event: state['settled_timestamp'] < event['timestamp'] <= settle_timestamp
+                        )
+                    for event in events:
+                        heapq.heappush(pending, (event['timestamp'], rank, state['sequence'], event))
+                        state['sequence'] += 1
+                state['settled_timestamp'] = max(state['settled_timestamp'], settle_timestamp)
+                
+                # Everything up to the settle point is final: no later chunk emits earlier events
+                ready = []
+                while pending and (is_last or pending[0][0] <= state['settled_timestamp']):
+                    ready.append(heapq.heappop(pending)[3])
+                if ready:
+                    write_record_block(events_file, events_to_records(ready), EVENT_RECORD_DTYPE)
+                    if events_csv:
+                        self.write_events_csv_rows(events_csv, ready)
+                    if state['event_count'] == 0:
+                        state['first_event_timestamp'] = ready[0]['timestamp']
+                    state['last_event_timestamp'] = ready[-1]['timestamp']
+                    state['event_count'] += len(ready)
+                
+                context = window[-context_steps:].copy()
+                state['step_count'] += chunk_size
+                for f in open_files:
+                    if f:
+                        f.flush()
+                
+                chunks_since_checkpoint += 1
+                if chunks_since_checkpoint >= checkpoint_chunks and not is_last:
+                    state['file_sizes'] = [os.fstat(f.fileno()).st_size if f else None for f in open_files]
+                    self.save_checkpoint(state_filename, state)
+                    chunks_since_checkpoint = 0
+            
+            stream_file.seek(0)
+            stream_file.write(self.pack_stream_header(
+                state['step_count'], state['first_timestamp'], state['last_timestamp'], stream_interval_seconds
+            ))
+            events_file.seek(0)
+            events_file.write(self.pack_events_header(
+                state['event_count'], state['first_event_timestamp'], state['last_event_timestamp']
+            ))
+        
+        if os.path.exists(state_filename):
+            os.remove(state_filename)
+        print(f"  Written: {state['step_count']} records to {stream_filename}, {state['event_count']} events to {events_filename}")
+        return state['step_count'], state['event_count']
+    
+    def start_streaming_files(self, filenames, stream_interval_seconds):
+        """Create the streaming outputs: placeholder binary headers (patched at the end) and CSV headers."""
+        stream_filename, events_filename, stream_csv_filename, events_csv_filename = filenames
+        with open(stream_filename, 'wb') as f:
+            f.write(self.pack_stream_header(0, 0, 0, stream_interval_seconds))
+        with open(events_filename, 'wb') as f:
+            f.write(self.pack_events_header(0, 0, 0))
+        for filename, columns in ((stream_csv_filename, STREAM_CSV_COLUMNS), (events_csv_filename, EVENTS_CSV_COLUMNS)):
+            if filename:
+                with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+                    csv.writer(csvfile).writerow(columns)
+    
+    def save_checkpoint(self, state_filename, state):
+        """Atomically write the streaming state (progress, pending events, file sizes, stats)."""
+        state = dict(state, run_stats=self.run_stats)
+        temporary = f"{state_filename}.tmp"
+        with open(temporary, 'w') as f:
+            # Event values may be numpy scalars
+            json.dump(state, f, default=lambda value: value.item())
+        os.replace(temporary, state_filename)
+    
+    def load_checkpoint(self, state_filename, job):
+        """Load a streaming checkpoint, or None if there is none; refuses one from a different job."""
+        if not os.path.exists(state_filename):
+            return None
+        with open(state_filename) as f:
+            state = json.load(f)
+        
+        if state['job'] != job:
+            changed = sorted(key for key in job if state['job'].get(key) != job[key])
+            raise ValueError(f"{state_filename}: checkpoint is for a different job ({', '.join(changed)} changed)")
+        for filename, size in zip(job['files'], state['file_sizes']):
+            if filename and (not os.path.exists(filename) or os.path.getsize(filename) < size):
+                raise ValueError(f"{filename}: shorter than its checkpoint ({size:,} bytes), cannot resume")
+        
+        state['pending'] = [tuple(entry) for entry in state['pending']]
+        heapq.heapify(state['pending'])
+        return state
+    
+    def generate_events(self, body, celestial_body, start_date, end_date, stream_records):
+        """Run every event detector for one body and return the events sorted by timestamp."""
+        print(f"\n=== GENERATING EVENTS ({celestial_body.upper()}) ===")
+        all_events = self.run_event_detectors(body, celestial_body, start_date, end_date)
+        all_events.extend(self.find_stream_events(stream_records, celestial_body))
         
-        # Find different types of events
-        rise_set_events = self.find_rise_set_events(body, celestial_body, start_date, end_date)
-        all_events.extend(rise_set_events)
+        # Sort events by timestamp
+        all_events.sort(key=lambda e: e['timestamp'])
         
-        culmination_events = self.find_culmination_events(body, celestial_body, start_date, end_date)
-        all_events.extend(culmination_events)
+        print(f"  Total events: {len(all_events)}")
         
-        transit_events = self.find_planet_transit_events(body, celestial_body, start_date, end_date)
-        all_events.extend(transit_events)
-
-        phase_transit_events = self.find_phase_transit_events(body, celestial_body, start_date, end_date)
-        all_events.extend(phase_transit_events)
+        return all_events
+    
+    def run_event_detectors(self, body, celestial_body, start_date, end_date):
+        """Run the enabled time-range event detectors for one body (unsorted)."""
+        all_events = []
+        for name in self.detectors:
+            if EVENT_DETECTORS[name][0] == 'range':
+                all_events.extend(self.run_detector(name, body, celestial_body, start_date, end_date))
+        return all_events
+    
+    def find_stream_events(self, stream_records, celestial_body):
+        """Run the enabled stream-derived detectors (perigee/apogee, culmination)."""
+        print(f"  Finding stream-derived events...")
+        events = []
+        for name in self.detectors:
+            if EVENT_DETECTORS[name][0] == 'stream':
+                events.extend(self.run_detector(name, stream_records, celestial_body))
+        return events
+    
+    def geocentric_distances(self, stream_records):
+        """Geocentric distance for every record, rebuilt from the topocentric stream columns.
+        
+        The stored distance carries a daily ripple of up to an Earth radius from the
+        observer's rotation; adding the observer's own geocentric vector (constant in
+        the local horizon frame) removes it, so perigee/apogee are the true ones.
+        """
+        lat = np.radians(self.observer.latitude.degrees)
+        lon = np.radians(self.observer.longitude.degrees)
+        observer_xyz = self.observer.itrs_xyz.km
+        north = np.dot(observer_xyz, [-np.sin(lat) * np.cos(lon), -np.sin(lat) * np.sin(lon), np.cos(lat)])
+        up = np.dot(observer_xyz, [np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+        
+        distance = stream_records['distance_km'].astype(np.float64)
+        azimuth = np.radians(stream_records['azimuth_deg'].astype(np.float64))
+        altitude = np.radians(stream_records['altitude_deg'].astype(np.float64))
+        toward_observer = north * np.cos(altitude) * np.cos(azimuth) + up * np.sin(altitude)
+        return np.sqrt(distance ** 2 + np.dot(observer_xyz, observer_xyz) + 2 * distance * toward_observer)
+    
+    def stream_interval(self, stream_records):
+        """Sample spacing of a stream record array, in seconds."""
+        if len(stream_records) < 2:
+            return 1
+        return max(1, int(stream_records[1]['timestamp']) - int(stream_records[0]['timestamp']))
+    
+    def bisect_transitions(self, starts, spans, state_at, initial):
+        """Bisect every candidate interval at once to where a boolean state flips.
+        
+        `starts` is a Time array, `spans` the interval lengths in seconds and
+        `initial` the state at each start. Returns the Time at which each state
+        first differs from `initial`, to EVENT_REFINE_PRECISION_SECONDS.
+        """
+        lo = np.zeros(len(spans))
+        hi = np.asarray(spans, dtype=np.float64)
+        while np.max(hi - lo, initial=0.0) > EVENT_REFINE_PRECISION_SECONDS:
+            mid = (lo + hi) / 2
+            same = state_at(self.ts.tt_jd(starts.whole, starts.tt_fraction + mid / 86400.0)) == initial
+            lo = np.where(same, mid, lo)
+            hi = np.where(same, hi, mid)
+        return self.ts.tt_jd(starts.whole, starts.tt_fraction + hi / 86400.0)
+    
+    def stream_times(self, timestamps):
+        """Time array for custom epoch timestamps of stream records."""
+        return unix_times(self.ts, np.asarray(timestamps, dtype=np.int64) + CUSTOM_EPOCH_OFFSET)
+    
+    def find_distance_events(self, stream_records, celestial_body):
+        """Find every perigee/apogee: local extrema of the geocentric distance, refined on the ephemeris.
+        
+        The stream locates each extremum to within its float32 plateau (hours for
+        the Sun). The event is where the geometric Earth-body range rate changes
+        sign, the distance published perigee/apogee tables use; the light-time
+        distance the stream stores can turn several minutes earlier or later.
+        """
+        if len(stream_records) < 3:
+            return []
         
-        if celestial_body.lower() == 'moon':
-            phase_events = self.find_moon_phase_events(start_date, end_date)
-            all_events.extend(phase_events)
+        body = self.resolve_bodies([celestial_body])[celestial_body]
+        geocentric = body - self.earth
+        distances = self.geocentric_distances(stream_records)
+        window = DISTANCE_EXTREMUM_WINDOW // self.stream_interval(stream_records)
+        minima, maxima = find_extrema(distances, window)
         
-        # Find distance extremes
-        if len(stream_records) > 0:
-            min_distance_record = min(stream_records, key=lambda r: r['distance_km'])
-            max_distance_record = max(stream_records, key=lambda r: r['distance_km'])
+        def receding(t):
+            position = geocentric.at(t)
+            self.cache.count_evaluations(t, 2)
+            return np.sum(position.xyz.au * position.velocity.au_per_d, axis=0) > 0
+        
+        def sample_times(indices):
+            return self.stream_times(stream_records['timestamp'][indices])
+        
+        events = []
+        for indices, event_type, event_name in ((minima, EVENT_PERIGEE, "Perigee"), (maxima, EVENT_APOGEE, "Apogee")):
+            if len(indices) == 0:
+                continue
             
-            perigee_event = {
-                'timestamp': min_distance_record['timestamp'],
-                'event_type': EVENT_PERIGEE,
-                'azimuth_deg': 0.0,  # Not meaningful for distance events
-                'altitude_deg': 0.0,
-                'phase': min_distance_record['phase'],
-                'distance_km': min_distance_record['distance_km']
-            }
+            # Widen a bracket around each candidate until the range rate changes sign across it:
+            # a minimum is approached before and receded from after, a maximum the other way round
+            initial = np.full(len(indices), event_type == EVENT_APOGEE)
+            span = np.ones(len(indices), dtype=np.int64)
+            while True:
+                first = np.maximum(indices - span, 0)
+                last = np.minimum(indices + span, len(stream_records) - 1)
+                crossed = (receding(sample_times(first)) == initial) & (receding(sample_times(last)) != initial)
+                widen = ~crossed & (span < window)
+                if not widen.any():
+                    break
+                span = np.where(widen, np.minimum(2 * span, window), span)
             
-            apogee_event = {
-                'timestamp': max_distance_record['timestamp'],
-                'event_type': EVENT_APOGEE,
-                'azimuth_deg': 0.0,
-                'altitude_deg': 0.0, 
-                'phase': max_distance_record['phase'],
-                'distance_km': max_distance_record['distance_km']
-            }
+            spans = (stream_records['timestamp'][last].astype(np.int64) -
+                     stream_records['timestamp'][first].astype(np.int64))
+            if not crossed.any():
+                continue
+            # A candidate with no sign change inside its window is float32 noise, not an extremum
+            times = self.bisect_transitions(sample_times(first[crossed]), spans[crossed], receding, initial[crossed])
             
-            all_events.extend([perigee_event, apogee_event])
-            print(f"  Added distance events: perigee ({min_distance_record['distance_km']:.1f} km), apogee ({max_distance_record['distance_km']:.1f} km)")
+            for data, event_dt in zip(self.calculate_event_data(body, celestial_body, times), times.utc_datetime()):
+                event = dict(data, event_type=event_type)
+                events.append(event)
+                print(f"    {event_name}: {event_dt.strftime('%Y-%m-%d %H:%M:%S')} ({event['distance_km']:.1f} km)")
         
-        # Sort events by timestamp
-        all_events.sort(key=lambda e: e['timestamp'])
+        return events
+    
+    def find_altitude_events(self, stream_records, celestial_body):
+        """Find upper and lower culminations (meridian transits), refined on the ephemeris.
+        
+        The stream's azimuth changes half-sky (east to west at upper culmination,
+        west to east below the pole) between the two samples around each transit;
+        the exact instant is where the apparent hour angle changes sign.
+        """
+        if len(stream_records) < 2:
+            return []
         
-        print(f"  Total events: {len(all_events)}")
+        body = self.resolve_bodies([celestial_body])[celestial_body]
+        east = np.sin(np.radians(stream_records['azimuth_deg'].astype(np.float64))) > 0
+        indices = np.flatnonzero(east[:-1] != east[1:])
+        if len(indices) == 0:
+            return []
+        
+        def east_of_meridian(t):
+            hour_angle, _, _ = self.cache.apparent(body, t).hadec()
+            return hour_angle.hours < 0
+        
+        first_timestamps = stream_records['timestamp'][indices].astype(np.int64)
+        last_timestamps = stream_records['timestamp'][indices + 1].astype(np.int64)
+        starts = self.stream_times(first_timestamps)
+        initial = east_of_meridian(starts)
+        # The float32 azimuth can put a sample on the wrong side when it sits on the meridian
+        crossed = east_of_meridian(self.stream_times(last_timestamps)) != initial
+        starts = starts[crossed]
+        initial = initial[crossed]
+        if len(initial) == 0:
+            return []
+        times = self.bisect_transitions(starts, (last_timestamps - first_timestamps)[crossed],
+                                        east_of_meridian, initial)
         
-        return stream_records, all_events
+        events = []
+        event_data = self.calculate_event_data(body, celestial_body, times)
+        for data, event_dt, upper in zip(event_data, times.utc_datetime(), initial):
+            event_type, event_name = (EVENT_CULMINATION, "Culmination") if upper else \
+                (EVENT_ANTI_CULMINATION, "Anti-culmination")
+            event = dict(data, event_type=event_type)
+            events.append(event)
+            print(f"    {event_name}: {event_dt.strftime('%Y-%m-%d %H:%M:%S')} (alt: {event['altitude_deg']:.1f}°)")
+        
+        return events
+    
+    def pack_stream_header(self, record_count, start_timestamp, end_timestamp, interval_seconds):
+        """Pack an EPHS header (STREAM_HEADER_SIZE bytes)."""
+        return struct.pack(
+            STREAM_HEADER_FORMAT,
+            b'EPHS',  # Magic number (4 bytes)
+            record_count,  # Number of records (4 bytes) 
+            start_timestamp,  # Start timestamp (4 bytes)
+            end_timestamp,  # End timestamp (4 bytes)
+            interval_seconds,  # Interval in seconds (4 bytes)
+            self.observer_lat,  # Observer latitude (4 bytes)
+            self.observer_lon,  # Observer longitude (4 bytes)
+            self.observer_elevation,  # Observer elevation (4 bytes)
+            0.0, 0.0, 0.0, 0.0  # Reserved space (16 bytes)
+        )
+    
+    def pack_events_header(self, event_count, first_timestamp, last_timestamp):
+        """Pack an EVTS header (EVENTS_HEADER_SIZE bytes)."""
+        return struct.pack(
+            EVENTS_HEADER_FORMAT,
+            b'EVTS',  # Magic number (4 bytes)
+            event_count,  # Number of events (4 bytes)
+            first_timestamp,  # First event timestamp (4 bytes)
+            last_timestamp,  # Last event timestamp (4 bytes)
+            0,  # Reserved (4 bytes)
+            self.observer_lat,  # Observer latitude (4 bytes)
+            self.observer_lon,  # Observer longitude (4 bytes)  
+            self.observer_elevation,  # Observer elevation (4 bytes)
+            0.0, 0.0, 0.0, 0.0, 0.0  # Reserved space (20 bytes)
+        )
     
     def write_binary_stream(self, stream_records, filename, celestial_body, start_date, end_date, interval_seconds):
         """Write stream data to binary file for deterministic access."""
@@ -750,37 +1655,20 @@ class DualFileEphemerisGenerator:
         record_size = 20
         
         with open(filename, 'wb') as f:
-            # Write header (64 bytes total)
-            header = struct.pack(
-                '<4sIIIIfffffff',
-                b'EPHS',  # Magic number (4 bytes)
-                len(stream_records),  # Number of records (4 bytes) 
-                stream_records[0]['timestamp'] if stream_records else 0,  # Start timestamp (4 bytes)
-                stream_records[-1]['timestamp'] if stream_records else 0,  # End timestamp (4 bytes)
-                interval_seconds,  # Interval in seconds (4 bytes)
-                self.observer_lat,  # Observer latitude (4 bytes)
-                self.observer_lon,  # Observer longitude (4 bytes)
-                self.observer_elevation,  # Observer elevation (4 bytes)
-                0.0, 0.0, 0.0, 0.0  # Reserved space (16 bytes)
-            )
-            f.write(header)
+            f.write(self.pack_stream_header(
+                len(stream_records),
+                int(stream_records[0]['timestamp']) if len(stream_records) else 0,
+                int(stream_records[-1]['timestamp']) if len(stream_records) else 0,
+                interval_seconds
+            ))
             
-            # Write records
-            for record in stream_records:
-                record_bytes = struct.pack(
-                    '<Iffff',
-                    record['timestamp'],
-                    record['phase'],
-                    record['distance_km'],
-                    record['azimuth_deg'],
-                    record['altitude_deg']
-                )
-                f.write(record_bytes)
+            # Write all records in one block, the store already has the on-disk layout
+            write_record_block(f, stream_records, STREAM_RECORD_DTYPE)
         
         file_size = Path(filename).stat().st_size
         print(f"  Written: {len(stream_records)} records, {file_size:,} bytes")
         print(f"  Record size: {record_size} bytes (deterministic access)")
-        print(f"  Header size: 64 bytes")
+        print(f"  Header size: {STREAM_HEADER_SIZE} bytes")
         
     def write_binary_events(self, events, filename, celestial_body):
         """Write events to binary file."""
@@ -791,43 +1679,236 @@ class DualFileEphemerisGenerator:
         record_size = 32
         
         with open(filename, 'wb') as f:
-            # Write header (64 bytes)
+            f.write(self.pack_events_header(
+                len(events),
+                events[0]['timestamp'] if events else 0,
+                events[-1]['timestamp'] if events else 0
+            ))
+            
+            # Write events (extra1/extra2 hold the planet transit ids)
+            write_record_block(f, events_to_records(events), EVENT_RECORD_DTYPE)
+        
+        file_size = Path(filename).stat().st_size
+        print(f"  Written: {len(events)} events, {file_size:,} bytes")
+        print(f"  Event size: {record_size} bytes (deterministic access)")
+        
+    def append_dual_files(self, celestial_body, stream_filename, events_filename, end_date,
+                          stream_interval_seconds=None):
+        """Extend existing stream and event files up to `end_date` in place.
+        
+        Only the tail after the last stored record is computed, using the interval
+        from the stream header. Appending with a different observer or interval is
+        refused. Returns the number of appended records and events.
+        """
+        end_date = ensure_utc(end_date)
+        stream_header = read_header(stream_filename, STREAM_HEADER_FORMAT, b'EPHS')
+        events_header = read_header(events_filename, EVENTS_HEADER_FORMAT, b'EVTS')
+        _, record_count, start_timestamp, end_timestamp, interval_seconds = stream_header[:5]
+        event_count, first_event_timestamp = events_header[1:3]
+        
+        if record_count == 0 or interval_seconds == 0:
+            raise ValueError(f"{stream_filename}: cannot append to an empty stream")
+        if stream_interval_seconds is not None and stream_interval_seconds != interval_seconds:
+            raise ValueError(
+                f"{stream_filename}: interval {interval_seconds}s does not match {stream_interval_seconds}s"
+            )
+        
+        # Header floats are float32, compare against the float32 observer values
+        observer = np.array([self.observer_lat, self.observer_lon, self.observer_elevation], dtype=np.float32)
+        for filename, header in ((stream_filename, stream_header), (events_filename, events_header)):
+            if not np.array_equal(observer, np.array(header[5:8], dtype=np.float32)):
+                raise ValueError(
+                    f"{filename}: observer {header[5]:.6f}, {header[6]:.6f}, {header[7]:.0f} m "
+                    f"does not match {self.observer_lat:.6f}, {self.observer_lon:.6f}, {self.observer_elevation:.0f} m"
+                )
+        
+        expected_size = STREAM_HEADER_SIZE + record_count * STREAM_RECORD_DTYPE.itemsize
+        if Path(stream_filename).stat().st_size != expected_size:
+            raise ValueError(f"{stream_filename}: size does not match header record count {record_count}")
+        
+        stream_end = datetime.fromtimestamp(end_timestamp + CUSTOM_EPOCH_OFFSET, tz=utc)
+        tail_start = stream_end + timedelta(seconds=interval_seconds)
+        if tail_start > end_date:
+            print(f"Nothing to append: {stream_filename} already ends at {stream_end}")
+            return 0, 0
+        
+        bodies = self.resolve_bodies([celestial_body])
+        body = bodies[celestial_body]
+        self.reset_run()
+        print(f"Appending {celestial_body.upper()} from {tail_start} to {end_date}")
+        
+        stream_records = self.generate_stream_records(bodies, tail_start, end_date, interval_seconds)[celestial_body]
+        
+        # Detectors search from the previous end; events at or before it were already written
+        tail_events = self.run_event_detectors(body, celestial_body, stream_end, end_date)
+        
+        # Stream-derived events near the junction need the stored samples before it: a candidate's
+        # dominance window, and the window its refined event can lie from it
+        context_count = min(record_count, 2 * (DISTANCE_EXTREMUM_WINDOW // interval_seconds) + 1)
+        stored_records = np.memmap(stream_filename, dtype=STREAM_RECORD_DTYPE, mode='r',
+                                   offset=STREAM_HEADER_SIZE, shape=(record_count,))
+        context_records = np.array(stored_records[record_count - context_count:])
+        del stored_records
+        tail_events.extend(self.find_stream_events(
+            np.concatenate([context_records, stream_records]), celestial_body
+        ))
+        tail_events = [event for event in tail_events if event['timestamp'] > end_timestamp]
+        tail_events.sort(key=lambda e: e['timestamp'])
+        
+        with open(stream_filename, 'r+b') as f:
+            f.seek(0, 2)
+            write_record_block(f, stream_records, STREAM_RECORD_DTYPE)
+            f.seek(4)
+            f.write(struct.pack('<III', record_count + len(stream_records), start_timestamp,
+                                int(stream_records[-1]['timestamp'])))
+        
+        if tail_events:
+            with open(events_filename, 'r+b') as f:
+                f.seek(EVENTS_HEADER_SIZE + event_count * EVENT_RECORD_DTYPE.itemsize)
+                f.truncate()
+                write_record_block(f, events_to_records(tail_events), EVENT_RECORD_DTYPE)
+                f.seek(4)
+                f.write(struct.pack('<III', event_count + len(tail_events),
+                                    first_event_timestamp if event_count else tail_events[0]['timestamp'],
+                                    tail_events[-1]['timestamp']))
+        
+        print(f"  Appended {len(stream_records)} records and {len(tail_events)} events")
+        return len(stream_records), len(tail_events)
+    
+    def build_ephe_records(self, stream_records, events, celestial_body, interval_seconds):
+        """Combine stream records, events and closest-planet data into EPHE records."""
+        body = self.resolve_bodies([celestial_body])[celestial_body]
+        count = len(stream_records)
+        ephe_records = np.zeros(count, dtype=EPHE_RECORD_DTYPE)
+        for field in STREAM_RECORD_DTYPE.names:
+            ephe_records[field] = stream_records[field]
+        
+        if count == 0:
+            return ephe_records
+        
+        # Closest planet for every record, one vectorized evaluation per chunk
+        for first in range(0, count, STREAM_CHUNK_SIZE):
+            chunk = ephe_records[first:first + STREAM_CHUNK_SIZE]
+            t = self.stream_times(chunk['timestamp'])
+            closest_ids, closest_distances = self.find_closest_planets(body, t, celestial_body)
+            chunk['closest_planet_id'] = closest_ids
+            chunk['angular_distance_deg'] = closest_distances
+        
+        # Flag each event on the record nearest to it
+        start_timestamp = int(stream_records[0]['timestamp'])
+        for event in events:
+            index = int(round((event['timestamp'] - start_timestamp) / interval_seconds))
+            if index < 0 or index >= count:
+                continue
+            if event['event_type'] in EPHE_EVENT_CODES:
+                ephe_records[index]['event'] = EPHE_EVENT_CODES[event['event_type']]
+            elif event['event_type'] in EPHE_DISTANCE_EVENT_CODES:
+                ephe_records[index]['distance_event'] = EPHE_DISTANCE_EVENT_CODES[event['event_type']]
+        
+        return ephe_records
+    
+    def write_ephe_file(self, stream_records, events, filename, celestial_body, interval_seconds):
+        """Write the indexed EPHE v1 device file directly, without the CSV round trip."""
+        print(f"\nWriting EPHE file: {filename}")
+        
+        ephe_records = self.build_ephe_records(stream_records, events, celestial_body, interval_seconds)
+        count = len(ephe_records)
+        
+        # Seek index: every EPHE_INDEX_STRIDE-th record with its byte offset
+        index_positions = np.arange(0, count, EPHE_INDEX_STRIDE)
+        index = np.zeros(len(index_positions), dtype=EPHE_INDEX_DTYPE)
+        index['timestamp'] = ephe_records['timestamp'][index_positions]
+        index['file_offset'] = EPHE_HEADER_SIZE + index_positions * EPHE_RECORD_DTYPE.itemsize
+        
+        with open(filename, 'wb') as f:
+            header = struct.pack(
+                EPHE_HEADER_FORMAT,
+                EPHE_MAGIC,
+                EPHE_VERSION,
+                count,
+                EPHE_RECORD_DTYPE.itemsize,
+                int(ephe_records[0]['timestamp']) if count else 0,
+                int(ephe_records[-1]['timestamp']) if count else 0,
+                interval_seconds,
+                0  # Reserved
+            )
+            f.write(header)
+            write_record_block(f, ephe_records, EPHE_RECORD_DTYPE)
+            write_record_block(f, index, EPHE_INDEX_DTYPE)
+        
+        file_size = Path(filename).stat().st_size
+        print(f"  Written: {count} records, {len(index)} index entries, {file_size:,} bytes")
+        print(f"  Record size: {EPHE_RECORD_DTYPE.itemsize} bytes, header size: {EPHE_HEADER_SIZE} bytes")
+    
+    def write_compressed_stream(self, stream_records, filename, interval_seconds, block_size=COMPRESSED_BLOCK_SIZE):
+        """Write stream data in the block-indexed, delta-quantized EPHZ format."""
+        print(f"\nWriting compressed stream: {filename}")
+        
+        count = len(stream_records)
+        block_count = (count + block_size - 1) // block_size
+        start_timestamp = int(stream_records[0]['timestamp']) if count else 0
+        
+        # Implicit timestamps only hold on a regular grid
+        if count > 1 and np.any(np.diff(stream_records['timestamp'].astype(np.int64)) != interval_seconds):
+            raise ValueError("Compressed streams require evenly spaced records")
+        
+        with open(filename, 'wb') as f:
             header = struct.pack(
-                '<4sIIIIffffffff',
-                b'EVTS',  # Magic number (4 bytes)
-                len(events),  # Number of events (4 bytes)
-                events[0]['timestamp'] if events else 0,  # First event timestamp (4 bytes)
-                events[-1]['timestamp'] if events else 0,  # Last event timestamp (4 bytes)
-                0,  # Reserved (4 bytes)
-                self.observer_lat,  # Observer latitude (4 bytes)
-                self.observer_lon,  # Observer longitude (4 bytes)  
-                self.observer_elevation,  # Observer elevation (4 bytes)
-                0.0, 0.0, 0.0, 0.0, 0.0  # Reserved space (20 bytes)
+                COMPRESSED_HEADER_FORMAT,
+                COMPRESSED_MAGIC,
+                COMPRESSED_VERSION,
+                count,
+                start_timestamp,
+                interval_seconds,
+                block_size,
+                block_count,
+                self.observer_lat,
+                self.observer_lon,
+                self.observer_elevation
             )
             f.write(header)
             
-            # Write events
-            for event in events:
-                # Handle optional fields for planet transits
-                extra1 = event.get('from_planet_id', 0)
-                extra2 = event.get('to_planet_id', 0)
-                
-                event_bytes = struct.pack(
-                    '<IIffffII',
-                    event['timestamp'],
-                    event['event_type'],
-                    event['azimuth_deg'],
-                    event['altitude_deg'],
-                    event['phase'],
-                    event['distance_km'],
-                    extra1,
-                    extra2
-                )
-                f.write(event_bytes)
+            # Block offset table is filled in once block sizes are known
+            offsets = np.zeros(block_count, dtype='<u8')
+            table_position = f.tell()
+            f.write(offsets.tobytes())
+            
+            for block_index in range(block_count):
+                offsets[block_index] = f.tell()
+                block = stream_records[block_index * block_size:(block_index + 1) * block_size]
+                block_header, deltas = encode_compressed_block(block)
+                f.write(block_header)
+                write_record_block(f, deltas, '<i2')
+            
+            f.seek(table_position)
+            f.write(offsets.tobytes())
         
         file_size = Path(filename).stat().st_size
-        print(f"  Written: {len(events)} events, {file_size:,} bytes")
-        print(f"  Event size: {record_size} bytes (deterministic access)")
+        raw_size = STREAM_HEADER_SIZE + count * STREAM_RECORD_DTYPE.itemsize
+        print(f"  Written: {count} records in {block_count} blocks, {file_size:,} bytes")
+        print(f"  Compression: {raw_size / max(file_size, 1):.1f}x vs EPHS ({raw_size:,} bytes)")
+    
+    def write_chebyshev_stream(self, stream_records, filename, **fit_options):
+        """Write stream data as EPHC Chebyshev segments.
+        
+        `fit_options` are fit_chebyshev_segments() settings (window_seconds,
+        max_degree, max_errors). Returns the error report of the written file
+        against the records: channel -> (max error, RMS error).
+        """
+        # chebyshev builds on this module's stream format, so it is imported on first use
+        from chebyshev import ChebyshevEphemeris, error_report, fit_chebyshev_segments, write_chebyshev_file
+        print(f"\nWriting Chebyshev stream: {filename}")
+        
+        segments = fit_chebyshev_segments(stream_records, **fit_options)
+        file_size = write_chebyshev_file(segments, filename, self.observer_lat, self.observer_lon,
+                                         self.observer_elevation)
+        report = error_report(ChebyshevEphemeris(filename), stream_records)
+        
+        raw_size = STREAM_HEADER_SIZE + len(stream_records) * STREAM_RECORD_DTYPE.itemsize
+        print(f"  Written: {len(stream_records)} records in {len(segments)} segments, {file_size:,} bytes")
+        print(f"  Compression: {raw_size / max(file_size, 1):.1f}x vs EPHS ({raw_size:,} bytes)")
+        print("  Max error: " + ", ".join(f"{channel} {max_error:.3g}" for channel, (max_error, _) in report.items()))
+        return report
         
     def analyze_files(self, stream_filename, events_filename):
         """Analyze the generated files."""
@@ -837,57 +1918,53 @@ class DualFileEphemerisGenerator:
         stream_size = Path(stream_filename).stat().st_size
         print(f"Stream file: {stream_filename}")
         print(f"  Size: {stream_size:,} bytes")
-        print(f"  Header: 64 bytes")
-        print(f"  Data: {stream_size - 64:,} bytes")
-        print(f"  Records: {(stream_size - 64) // 20}")
-        print(f"  Arduino access: byte_offset = 64 + (minute_index * 20)")
+        print(f"  Header: {STREAM_HEADER_SIZE} bytes")
+        print(f"  Data: {stream_size - STREAM_HEADER_SIZE:,} bytes")
+        print(f"  Records: {(stream_size - STREAM_HEADER_SIZE) // STREAM_RECORD_DTYPE.itemsize}")
+        print(f"  Arduino access: byte_offset = {STREAM_HEADER_SIZE} + (minute_index * {STREAM_RECORD_DTYPE.itemsize})")
         
         # Analyze events file  
         events_size = Path(events_filename).stat().st_size
         print(f"\nEvents file: {events_filename}")
         print(f"  Size: {events_size:,} bytes")
-        print(f"  Header: 64 bytes")
-        print(f"  Data: {events_size - 64:,} bytes")
-        print(f"  Events: {(events_size - 64) // 32}")
+        print(f"  Header: {EVENTS_HEADER_SIZE} bytes")
+        print(f"  Data: {events_size - EVENTS_HEADER_SIZE:,} bytes")
+        print(f"  Events: {(events_size - EVENTS_HEADER_SIZE) // EVENT_RECORD_DTYPE.itemsize}")
         print(f"  Arduino access: binary search by timestamp")
 
-# Example usage
-def main():
-    # Configuration
-    observer_lat = 52.9822196   
-    observer_lon = 36.1406844  
-    observer_elevation = 220   # meters
-    
-    # Create generator
-    generator = DualFileEphemerisGenerator(observer_lat, observer_lon, observer_elevation)
-    
-    # Generate data
-    celestial_body = 'moon'
-    start_date = datetime(2025, 6, 10, 0, 0, 0)
-    end_date = datetime(2025, 7, 12, 0, 0, 0)  # One week
-    stream_interval = 60  # 1 minute
-    
-    print(f"{'='*80}")
-    print(f"DUAL-FILE EPHEMERIS GENERATOR")
-    print(f"{'='*80}")
-    
-    # Generate both datasets
-    stream_records, events = generator.generate_dual_files(
-        celestial_body, start_date, end_date, stream_interval
+# Per-process generator for generate_parallel_files, so de421.bsp is loaded once per worker
+_worker_generator = None
+
+def _init_worker_generator(observer_lat, observer_lon, observer_elevation, detectors, backend, backend_options):
+    global _worker_generator
+    _worker_generator = DualFileEphemerisGenerator(
+        observer_lat, observer_lon, observer_elevation, detectors, backend, backend_options
     )
-    
-    # Write binary files
-    stream_filename = f'{celestial_body}_stream_{start_date.strftime("%Y%m%d")}.bin'
-    events_filename = f'{celestial_body}_events_{start_date.strftime("%Y%m%d")}.bin'
-    base_name = f'{celestial_body}_{start_date.strftime("%Y%m%d")}'
 
-    generator.write_binary_stream(stream_records, stream_filename, celestial_body, start_date, end_date, stream_interval)
-    generator.write_binary_events(events, events_filename, celestial_body)
-    generator.write_stream_csv(stream_records, f'{base_name}_stream.csv', celestial_body, start_date, end_date, stream_interval)
-    generator.write_events_csv(events, f'{base_name}_events.csv', celestial_body)
+def _generate_chunk(celestial_bodies, chunk_start, chunk_end, step_count, stream_interval_seconds, is_last):
+    """Worker task: stream records and detector events for one time chunk."""
+    generator = _worker_generator
+    bodies = generator.resolve_bodies(celestial_bodies)
+    generator.reset_run()
+    
+    stream_end = chunk_start + timedelta(seconds=(step_count - 1) * stream_interval_seconds)
+    stream_records = generator.generate_stream_records(bodies, chunk_start, stream_end, stream_interval_seconds)
+    
+    end_timestamp = generator.datetime_to_custom_epoch(chunk_end)
+    events = {}
+    for celestial_body, body in bodies.items():
+        chunk_events = generator.run_event_detectors(body, celestial_body, chunk_start, chunk_end)
+        # Events on the boundary are kept by the chunk that starts there
+        events[celestial_body] = [
+            event for event in chunk_events
+            if is_last or event['timestamp'] < end_timestamp
+        ]
+    return stream_records, events, generator.run_stats, generator.cache_stats()
 
-    # Analyze results
-    generator.analyze_files(stream_filename, events_filename)
+def main():
+    # The command line (single jobs and batch manifests) lives in ephemeris_jobs
+    from ephemeris_jobs import main as run_jobs_cli
+    run_jobs_cli()
 
 if __name__ == "__main__":
     main()
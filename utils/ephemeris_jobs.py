@@ -0,0 +1,294 @@
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime
+from pathlib import Path
+import numpy as np
+
+from ephemeries import (
+    EPHEMERIS_BACKENDS, EVENT_DETECTORS, PLANET_MAP, STREAM_CHUNK_SIZE, STREAM_HEADER_SIZE, EVENTS_HEADER_SIZE,
+    STREAM_RECORD_DTYPE, EVENT_RECORD_DTYPE, DualFileEphemerisGenerator, ensure_utc, load_ephemeris
+)
+
+try:
+    import yaml
+except ImportError:  # Only needed for .yaml/.yml manifests
+    yaml = None
+
+# Manifest format (JSON or YAML): optional `defaults` merged into every entry of `jobs`.
+#
+#   defaults:
+#     observer: {lat: 52.9822196, lon: 36.1406844, elevation: 220}
+#     interval: 60
+#     outputs: [ephe, report]
+#     output_dir: build
+#   jobs:
+#     - {body: moon, start: 2025-01-01, end: 2026-01-01}
+#     - {name: mars-2025, body: mars, start: 2025-01-01, end: 2026-01-01, detectors: [rise_set]}
+#     - {name: moon-fast, body: moon, start: 2025-01-01, end: 2026-01-01, backend: native, ephemeris_file: data/de430.ephd}
+#
+# Every job writes EPHS/EVTS files; `outputs` adds csv, ephe, compressed (EPHZ), chebyshev (EPHC)
+# and report (JSON).
+# `backend` picks the stream position backend (skyfield, or native over a de430.py store).
+JOB_OUTPUTS = ('csv', 'ephe', 'compressed', 'chebyshev', 'report')
+DEFAULT_JOB = {
+    'observer': {'lat': 52.9822196, 'lon': 36.1406844, 'elevation': 220},
+    'body': 'moon',
+    'start': '2025-06-10',
+    'end': '2025-07-12',
+    'interval': 60,
+    'outputs': ['csv', 'ephe', 'report'],
+    'output_dir': '.',
+    'detectors': None,
+    'chunk_steps': STREAM_CHUNK_SIZE,
+    'backend': 'skyfield',
+    'ephemeris_file': None,
+}
+BODIES = [name for name in PLANET_MAP if name != 'none']
+
+
+def parse_datetime(value):
+    """Accept datetimes, dates (YAML parses bare dates) and 'YYYY-MM-DD[ HH:MM[:SS]]' strings as UTC."""
+    if isinstance(value, datetime):
+        return ensure_utc(value)
+    if isinstance(value, date):
+        return ensure_utc(datetime(value.year, value.month, value.day))
+    return ensure_utc(datetime.fromisoformat(str(value)))
+
+
+def normalize_job(entry, defaults=None):
+    """Merge a manifest entry over the defaults and validate it."""
+    job = dict(DEFAULT_JOB, **(defaults or {}))
+    observer = dict(DEFAULT_JOB['observer'], **job['observer'])
+    job.update(entry)
+    observer.update(entry.get('observer', {}))
+
+    body = str(job['body']).lower()
+    if body not in BODIES:
+        raise ValueError(f"Unknown celestial body: {job['body']} (available: {', '.join(BODIES)})")
+    unknown = sorted(set(job['outputs']) - set(JOB_OUTPUTS))
+    if unknown:
+        raise ValueError(f"Unknown outputs: {', '.join(unknown)} (available: {', '.join(JOB_OUTPUTS)})")
+    unknown = sorted(set(job['detectors'] or []) - set(EVENT_DETECTORS))
+    if unknown:
+        raise ValueError(f"Unknown event detectors: {', '.join(unknown)} (available: {', '.join(EVENT_DETECTORS)})")
+
+    if job['backend'] not in EPHEMERIS_BACKENDS:
+        raise ValueError(f"Unknown ephemeris backend: {job['backend']} (available: {', '.join(EPHEMERIS_BACKENDS)})")
+    if job['ephemeris_file'] and job['backend'] == 'skyfield':
+        raise ValueError("ephemeris_file only applies to the native backend (skyfield reads de421.bsp)")
+
+    start_date, end_date = parse_datetime(job['start']), parse_datetime(job['end'])
+    if end_date < start_date:
+        raise ValueError(f"Job {job.get('name') or body}: end {end_date} is before start {start_date}")
+
+    return {
+        'name': job.get('name') or f"{body}_{start_date.strftime('%Y%m%d')}",
+        'body': body,
+        'start_date': start_date,
+        'end_date': end_date,
+        'interval': int(job['interval']),
+        'observer': (float(observer['lat']), float(observer['lon']), float(observer['elevation'])),
+        'outputs': list(job['outputs']),
+        'output_dir': str(job['output_dir']),
+        'detectors': job['detectors'],
+        'chunk_steps': int(job['chunk_steps']),
+        'backend': job['backend'],
+        'backend_options': {'ephemeris_file': str(job['ephemeris_file'])} if job['ephemeris_file'] else {},
+    }
+
+
+def load_manifest(filename):
+    """Read a JSON or YAML manifest and return its normalized jobs."""
+    text = Path(filename).read_text()
+    if Path(filename).suffix.lower() in ('.yaml', '.yml'):
+        if yaml is None:
+            raise ValueError(f"{filename}: PyYAML is required for YAML manifests (pip install pyyaml)")
+        manifest = yaml.safe_load(text)
+    else:
+        manifest = json.loads(text)
+
+    if not isinstance(manifest, dict) or not manifest.get('jobs'):
+        raise ValueError(f"{filename}: manifest needs a non-empty 'jobs' list")
+    jobs = [normalize_job(entry, manifest.get('defaults')) for entry in manifest['jobs']]
+
+    names = [job['name'] for job in jobs]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"{filename}: duplicate job names {', '.join(duplicates)} would overwrite each other's files")
+    return jobs
+
+
+def job_files(job):
+    """Output paths of a job, keyed by output kind."""
+    base = Path(job['output_dir']) / job['name']
+    files = {'stream': f'{base}_stream.bin', 'events': f'{base}_events.bin'}
+    if 'csv' in job['outputs']:
+        files['stream_csv'] = f'{base}_stream.csv'
+        files['events_csv'] = f'{base}_events.csv'
+    if 'ephe' in job['outputs']:
+        files['ephe'] = f'{base}_ephe.bin'
+    if 'compressed' in job['outputs']:
+        files['compressed'] = f'{base}_stream.ephz'
+    if 'chebyshev' in job['outputs']:
+        files['chebyshev'] = f'{base}_stream.ephc'
+    if 'report' in job['outputs']:
+        files['report'] = f'{base}_report.json'
+    return files
+
+
+def job_steps(job):
+    """Stream samples of a job, used as its cost when scheduling."""
+    return int((job['end_date'] - job['start_date']).total_seconds() // job['interval']) + 1
+
+
+def run_job(generator, job, resume=False):
+    """Generate one job's files with `generator`, which must be set up for the job's observer."""
+    started = time.perf_counter()
+    files = job_files(job)
+    Path(job['output_dir']).mkdir(parents=True, exist_ok=True)
+    generator.detectors = generator.select_detectors(job['detectors'])
+    generator.backend = generator.select_backend(job['backend'], job['backend_options'])
+    generator.backend_options = job['backend_options']
+
+    record_count, event_count = generator.generate_streaming_files(
+        job['body'], job['start_date'], job['end_date'], job['interval'], files['stream'], files['events'],
+        files.get('stream_csv'), files.get('events_csv'), job['chunk_steps'], resume=resume
+    )
+
+    if 'ephe' in files or 'compressed' in files or 'chebyshev' in files:
+        stream_records = np.fromfile(files['stream'], dtype=STREAM_RECORD_DTYPE, offset=STREAM_HEADER_SIZE)
+        if 'ephe' in files:
+            events = np.fromfile(files['events'], dtype=EVENT_RECORD_DTYPE, offset=EVENTS_HEADER_SIZE)
+            generator.write_ephe_file(stream_records, events, files['ephe'], job['body'], job['interval'])
+        if 'compressed' in files:
+            generator.write_compressed_stream(stream_records, files['compressed'], job['interval'])
+        if 'chebyshev' in files:
+            generator.write_chebyshev_stream(stream_records, files['chebyshev'])
+
+    if 'report' in files:
+        generator.write_run_report(
+            files['report'], job=job['name'], bodies=[job['body']], start_date=job['start_date'],
+            end_date=job['end_date'], stream_interval_seconds=job['interval'],
+            stream_records=record_count, events=event_count, resumed=resume
+        )
+
+    return {
+        'name': job['name'],
+        'records': record_count,
+        'events': event_count,
+        'seconds': time.perf_counter() - started,
+        'files': files,
+    }
+
+
+def run_job_batch(observer, jobs, resume=False):
+    """Run jobs sharing an observer on one generator (one observer vector and position cache)."""
+    generator = DualFileEphemerisGenerator(*observer)
+    return [run_job(generator, job, resume) for job in jobs]
+
+
+def plan_batches(jobs, workers):
+    """Group jobs by observer, splitting groups when there are fewer groups than workers.
+
+    Returns (observer, jobs) batches, most expensive first so long batches start early.
+    """
+    groups = {}
+    for job in jobs:
+        groups.setdefault(job['observer'], []).append(job)
+
+    batches = []
+    for observer, group in groups.items():
+        parts = max(1, min(len(group), workers // len(groups)))
+        # Deal the longest jobs out first so the parts come out balanced
+        group = sorted(group, key=job_steps, reverse=True)
+        batches.extend((observer, group[part::parts]) for part in range(parts))
+
+    return sorted(batches, key=lambda batch: sum(job_steps(job) for job in batch[1]), reverse=True)
+
+
+def run_jobs(jobs, workers=1, resume=False):
+    """Run every job; batches go to `workers` processes, each loading de421.bsp once."""
+    batches = plan_batches(jobs, workers)
+    print(f"Running {len(jobs)} jobs in {len(batches)} batches on {min(workers, len(batches))} workers")
+
+    if workers <= 1 or len(batches) == 1:
+        return [summary for observer, batch in batches for summary in run_job_batch(observer, batch, resume)]
+
+    summaries = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=load_ephemeris) as executor:
+        futures = [executor.submit(run_job_batch, observer, batch, resume) for observer, batch in batches]
+        for future in as_completed(futures):
+            summaries.extend(future.result())
+    return summaries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Generate ephemeris files for one job (options below) or every job of a manifest'
+    )
+    parser.add_argument('manifest', nargs='?', help='JSON or YAML job manifest')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes for independent jobs')
+    parser.add_argument('--resume', action='store_true', help='Continue interrupted jobs from their checkpoints')
+    parser.add_argument('--dry-run', action='store_true', help='Print the job plan without generating anything')
+
+    job_options = parser.add_argument_group('single job (ignored with a manifest)')
+    job_options.add_argument('--body', default=DEFAULT_JOB['body'], choices=BODIES)
+    job_options.add_argument('--start', default=DEFAULT_JOB['start'], help='UTC start, e.g. 2025-06-10 or "2025-06-10 12:00"')
+    job_options.add_argument('--end', default=DEFAULT_JOB['end'], help='UTC end')
+    job_options.add_argument('--interval', type=int, default=DEFAULT_JOB['interval'], help='Stream interval in seconds')
+    job_options.add_argument('--lat', type=float, default=DEFAULT_JOB['observer']['lat'])
+    job_options.add_argument('--lon', type=float, default=DEFAULT_JOB['observer']['lon'])
+    job_options.add_argument('--elevation', type=float, default=DEFAULT_JOB['observer']['elevation'], help='Meters')
+    job_options.add_argument('--name', help='Output file prefix (default <body>_<start date>)')
+    job_options.add_argument('--output-dir', default=DEFAULT_JOB['output_dir'])
+    job_options.add_argument('--outputs', default=','.join(DEFAULT_JOB['outputs']),
+                             help=f'Comma-separated extra outputs from {", ".join(JOB_OUTPUTS)}')
+    job_options.add_argument('--detectors', help=f'Comma-separated detectors (default all: {", ".join(EVENT_DETECTORS)})')
+    job_options.add_argument('--backend', default=DEFAULT_JOB['backend'], choices=list(EPHEMERIS_BACKENDS),
+                             help='Stream position backend')
+    job_options.add_argument('--ephemeris-file', help='EPHD coefficient store for the native backend (default data/de430.ephd)')
+    args = parser.parse_args(argv)
+
+    try:
+        if args.manifest:
+            jobs = load_manifest(args.manifest)
+        else:
+            jobs = [normalize_job({
+                'name': args.name,
+                'body': args.body,
+                'start': args.start,
+                'end': args.end,
+                'interval': args.interval,
+                'observer': {'lat': args.lat, 'lon': args.lon, 'elevation': args.elevation},
+                'outputs': [output for output in args.outputs.split(',') if output],
+                'output_dir': args.output_dir,
+                'detectors': args.detectors.split(',') if args.detectors else None,
+                'backend': args.backend,
+                'ephemeris_file': args.ephemeris_file,
+            })]
+    except ValueError as error:
+        parser.error(str(error))
+
+    if args.dry_run:
+        for observer, batch in plan_batches(jobs, args.workers):
+            print(f"Observer {observer[0]:.6f}, {observer[1]:.6f}, {observer[2]:.0f} m:")
+            for job in batch:
+                print(f"  {job['name']}: {job['body']} {job['start_date']} to {job['end_date']} "
+                      f"every {job['interval']}s ({job['backend']}) -> {', '.join(job_files(job).values())}")
+        return
+
+    started = time.perf_counter()
+    summaries = run_jobs(jobs, args.workers, args.resume)
+
+    print(f"\n{'='*80}")
+    for summary in sorted(summaries, key=lambda summary: summary['name']):
+        print(f"  {summary['name']:<32}{summary['records']:>10} records{summary['events']:>8} events"
+              f"{summary['seconds']:>10.1f}s")
+    print(f"  {len(summaries)} jobs in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
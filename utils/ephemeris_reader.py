@@ -0,0 +1,262 @@
+import argparse
+import bisect
+from datetime import datetime
+import numpy as np
+from skyfield.api import utc
+
+from ephemeries import (
+    CUSTOM_EPOCH_OFFSET, STREAM_HEADER_FORMAT, EVENTS_HEADER_FORMAT,
+    STREAM_HEADER_SIZE, EVENTS_HEADER_SIZE, STREAM_RECORD_DTYPE, EVENT_RECORD_DTYPE,
+    COMPRESSED_MAGIC, COMPRESSED_VERSION, COMPRESSED_HEADER_FORMAT, COMPRESSED_HEADER_SIZE,
+    COMPRESSED_CHANNELS, COMPRESSED_BLOCK_HEADER_SIZE, read_header, decode_compressed_block
+)
+
+
+def custom_epoch_to_datetime(timestamp):
+    """Convert a custom epoch timestamp back to a UTC datetime."""
+    return datetime.fromtimestamp(int(timestamp) + CUSTOM_EPOCH_OFFSET, tz=utc)
+
+
+class StreamFileReader:
+    """Memory-mapped reader for EPHS stream files.
+
+    Records are never loaded as a whole; lookups index straight into the
+    mapping using the `header + index * 20` rule printed by analyze_files.
+    """
+
+    def __init__(self, filename):
+        header = read_header(filename, STREAM_HEADER_FORMAT, b'EPHS')
+        self.filename = filename
+        self.record_count = header[1]
+        self.start_timestamp = header[2]
+        self.end_timestamp = header[3]
+        self.interval_seconds = header[4]
+        self.observer_lat = header[5]
+        self.observer_lon = header[6]
+        self.observer_elevation = header[7]
+
+        self.records = np.memmap(
+            filename, dtype=STREAM_RECORD_DTYPE, mode='r',
+            offset=STREAM_HEADER_SIZE, shape=(self.record_count,)
+        ) if self.record_count else np.zeros(0, dtype=STREAM_RECORD_DTYPE)
+
+    def __len__(self):
+        return self.record_count
+
+    def record_index(self, timestamp):
+        """Return the index of the record at or just before `timestamp`, or None if out of range."""
+        if self.record_count == 0 or self.interval_seconds == 0:
+            return None
+        if timestamp < self.start_timestamp or timestamp > self.end_timestamp:
+            return None
+        return min((timestamp - self.start_timestamp) // self.interval_seconds, self.record_count - 1)
+
+    def record_offset(self, index):
+        """Byte offset of record `index` inside the file."""
+        return STREAM_HEADER_SIZE + index * STREAM_RECORD_DTYPE.itemsize
+
+    def find_record(self, timestamp):
+        """O(1) lookup of the record at or just before `timestamp`."""
+        index = self.record_index(timestamp)
+        if index is None:
+            return None
+        return self.records[index]
+
+    def find_records(self, start_timestamp, end_timestamp):
+        """Return the (memory-mapped) slice of records covering [start, end]."""
+        first = max(start_timestamp, self.start_timestamp)
+        last = min(end_timestamp, self.end_timestamp)
+        if self.record_count == 0 or first > last:
+            return self.records[0:0]
+        return self.records[self.record_index(first):self.record_index(last) + 1]
+
+    def close(self):
+        """Release the memory mapping."""
+        self.records = None
+
+
+class CompressedStreamReader:
+    """Reader for EPHZ compressed stream files.
+
+    Timestamps are implicit, so a lookup finds its block in O(1) through the
+    block offset table and decodes only that block.
+    """
+
+    def __init__(self, filename):
+        header = read_header(filename, COMPRESSED_HEADER_FORMAT, COMPRESSED_MAGIC)
+        if header[1] != COMPRESSED_VERSION:
+            raise ValueError(f"{filename}: unsupported compressed stream version {header[1]}")
+
+        self.filename = filename
+        self.record_count = header[2]
+        self.start_timestamp = header[3]
+        self.interval_seconds = header[4]
+        self.block_size = header[5]
+        self.block_count = header[6]
+        self.observer_lat = header[7]
+        self.observer_lon = header[8]
+        self.observer_elevation = header[9]
+        self.end_timestamp = self.start_timestamp + max(self.record_count - 1, 0) * self.interval_seconds
+
+        self.data = np.memmap(filename, dtype=np.uint8, mode='r')
+        self.block_offsets = np.frombuffer(
+            self.data, dtype='<u8', count=self.block_count, offset=COMPRESSED_HEADER_SIZE
+        )
+
+    def __len__(self):
+        return self.record_count
+
+    def read_block(self, block_index):
+        """Decode block `block_index` into STREAM_RECORD_DTYPE records."""
+        first_record = block_index * self.block_size
+        count = min(self.block_size, self.record_count - first_record)
+        offset = int(self.block_offsets[block_index])
+
+        block_header = bytes(self.data[offset:offset + COMPRESSED_BLOCK_HEADER_SIZE])
+        deltas = np.frombuffer(
+            self.data, dtype='<i2', count=(count - 1) * len(COMPRESSED_CHANNELS),
+            offset=offset + COMPRESSED_BLOCK_HEADER_SIZE
+        ).reshape(count - 1, len(COMPRESSED_CHANNELS))
+
+        first_timestamp = self.start_timestamp + first_record * self.interval_seconds
+        return decode_compressed_block(block_header, deltas, first_timestamp, self.interval_seconds)
+
+    def record_index(self, timestamp):
+        """Return the index of the record at or just before `timestamp`, or None if out of range."""
+        if self.record_count == 0 or timestamp < self.start_timestamp or timestamp > self.end_timestamp:
+            return None
+        return (timestamp - self.start_timestamp) // self.interval_seconds
+
+    def find_record(self, timestamp):
+        """Look up the record at or just before `timestamp`, decoding a single block."""
+        index = self.record_index(timestamp)
+        if index is None:
+            return None
+        return self.read_block(index // self.block_size)[index % self.block_size]
+
+    def read_all(self):
+        """Decode the whole stream."""
+        records = np.zeros(self.record_count, dtype=STREAM_RECORD_DTYPE)
+        for block_index in range(self.block_count):
+            first_record = block_index * self.block_size
+            block = self.read_block(block_index)
+            records[first_record:first_record + len(block)] = block
+        return records
+
+    def close(self):
+        """Release the memory mapping."""
+        self.data = None
+        self.block_offsets = None
+
+
+class EventFileReader:
+    """Memory-mapped reader for EVTS event files, which are sorted by timestamp.
+
+    Lookups by event type go through an index of sorted (event_type, timestamp)
+    keys, built on the first typed lookup and kept in RAM (12 bytes per event).
+    """
+
+    def __init__(self, filename):
+        header = read_header(filename, EVENTS_HEADER_FORMAT, b'EVTS')
+        self.filename = filename
+        self.event_count = header[1]
+        self.start_timestamp = header[2]
+        self.end_timestamp = header[3]
+        self.observer_lat = header[5]
+        self.observer_lon = header[6]
+        self.observer_elevation = header[7]
+
+        self.events = np.memmap(
+            filename, dtype=EVENT_RECORD_DTYPE, mode='r',
+            offset=EVENTS_HEADER_SIZE, shape=(self.event_count,)
+        ) if self.event_count else np.zeros(0, dtype=EVENT_RECORD_DTYPE)
+        self.type_keys = None
+        self.type_order = None
+
+    def __len__(self):
+        return self.event_count
+
+    def build_type_index(self):
+        """Sort (event_type, timestamp) keys once so typed lookups are binary searches too."""
+        if self.type_keys is None:
+            keys = (self.events['event_type'].astype(np.uint64) << np.uint64(32)) | self.events['timestamp']
+            self.type_order = np.argsort(keys, kind='stable')
+            self.type_keys = keys[self.type_order]
+        return self.type_keys, self.type_order
+
+    def type_range(self, event_type, start_timestamp, end_timestamp):
+        """Positions in the type index of the `event_type` events in [start, end]."""
+        keys, _ = self.build_type_index()
+        base = np.uint64(event_type) << np.uint64(32)
+        first = np.searchsorted(keys, base | np.uint64(max(start_timestamp, 0)), side='left')
+        last = np.searchsorted(keys, base | np.uint64(min(end_timestamp, 0xFFFFFFFF)), side='right')
+        return first, last
+
+    def event_index(self, timestamp):
+        """Binary search for the first event at or after `timestamp`."""
+        # bisect only touches O(log n) records of the mapping
+        return bisect.bisect_left(self.events['timestamp'], timestamp)
+
+    def find_events(self, start_timestamp, end_timestamp, event_type=None):
+        """Return events in [start, end], optionally filtered by event type."""
+        if event_type is not None:
+            first, last = self.type_range(event_type, start_timestamp, end_timestamp)
+            return self.events[self.type_order[first:last]]
+        first = self.event_index(start_timestamp)
+        last = bisect.bisect_right(self.events['timestamp'], end_timestamp)
+        return self.events[first:last]
+
+    def get_next_event(self, from_timestamp, event_type=None):
+        """Return the first event at or after `from_timestamp` (of `event_type`, if given)."""
+        if event_type is None:
+            index = self.event_index(from_timestamp)
+            return self.events[index] if index < self.event_count else None
+
+        first, last = self.type_range(event_type, from_timestamp, 0xFFFFFFFF)
+        return self.events[self.type_order[first]] if first < last else None
+
+    def close(self):
+        """Release the memory mapping."""
+        self.events = None
+        self.type_keys = None
+        self.type_order = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect EPHS stream and EVTS event files')
+    parser.add_argument('stream_file', help='EPHS stream file')
+    parser.add_argument('events_file', nargs='?', help='EVTS events file')
+    parser.add_argument('--at', help='UTC time to look up, e.g. "2025-06-10 12:00:00"')
+    args = parser.parse_args()
+
+    stream = StreamFileReader(args.stream_file)
+    print(f"Stream file: {args.stream_file}")
+    print(f"  Records: {stream.record_count}, interval: {stream.interval_seconds}s")
+    print(f"  Range: {custom_epoch_to_datetime(stream.start_timestamp)} to {custom_epoch_to_datetime(stream.end_timestamp)}")
+    print(f"  Observer: {stream.observer_lat:.6f}, {stream.observer_lon:.6f}, {stream.observer_elevation:.0f} m")
+
+    events = EventFileReader(args.events_file) if args.events_file else None
+    if events is not None:
+        print(f"Events file: {args.events_file}")
+        print(f"  Events: {events.event_count}")
+
+    if args.at:
+        dt = datetime.strptime(args.at, '%Y-%m-%d %H:%M:%S').replace(tzinfo=utc)
+        timestamp = int(dt.timestamp() - CUSTOM_EPOCH_OFFSET)
+        index = stream.record_index(timestamp)
+        if index is None:
+            print(f"  {args.at} is outside the stream range")
+        else:
+            record = stream.records[index]
+            print(f"  Record {index} @ byte {stream.record_offset(index)}: "
+                  f"phase={record['phase']:.6f} distance={record['distance_km']:.1f} km "
+                  f"az={record['azimuth_deg']:.4f} alt={record['altitude_deg']:.4f}")
+
+        if events is not None:
+            event = events.get_next_event(timestamp)
+            if event is not None:
+                print(f"  Next event: type {event['event_type']} at {custom_epoch_to_datetime(event['timestamp'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,16 @@
+import argparse
+import csv
 from skyfield.api import Loader, Topos
 from skyfield import almanac
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 import numpy as np
-import pandas as pd
-from astropy.time import Time
 
 load = Loader('~/.skyfield-data')
 eph = load('de421.bsp')
 ts = load.timescale()
 
 # CONFIG
-LAT, LON = 52.9823, 36.1408        
+LAT, LON = 52.9823, 36.1408
 TZ = 'Russia/Moscow'
 START = datetime(2025, 6, 1)
 END = datetime(2025, 7, 1)
@@ -18,83 +18,122 @@ STEP_HOURS = 1
 
 LUNAR_EPOCH = 694566337  # Jan 4, 1992 23:05:37 UTC (solar eclipse)
 LUNAR_CYCLE_SECONDS = 2551443
+UNIX_EPOCH_JD = 2440587.5
+LUNAR_EPOCH_JD = UNIX_EPOCH_JD + LUNAR_EPOCH / 86400  # Same value astropy's Time(LUNAR_EPOCH, format='unix').jd gives
+LUNAR_CYCLE_DAYS = LUNAR_CYCLE_SECONDS / 86400
+
+TABLE_COLUMNS = [
+    'unix_time', 'moon_phase', 'moon_phase_norm', 'moon_dist', 'moon_dist_norm',
+    'moon_rise', 'moon_set', 'moon_culmination'
+]
 
 def moon_phase(jd):
-    """Returns the phase of the Moon as a fraction (0=new, 0.5=full, 1=new again)"""
-    epoch = Time(LUNAR_EPOCH, format='unix').jd
-    cycle_frac = ((jd - epoch) % (LUNAR_CYCLE_SECONDS/86400)) / (LUNAR_CYCLE_SECONDS/86400)
+    """Returns the phase of the Moon as a fraction (0=new, 0.5=full, 1=new again); `jd` may be an array"""
+    cycle_frac = ((jd - LUNAR_EPOCH_JD) % LUNAR_CYCLE_DAYS) / LUNAR_CYCLE_DAYS
     return cycle_frac
 
 def normalize(val, minv, maxv):
     return (val - minv) / (maxv - minv)
 
-def main():
-    times = []
-    timestamps = []
-    phases_norm, phases_actual = [], []
-    moon_dist_norm, moon_dist_actual = [], []
-    moonrise, moonset, culmination = [], [], []
-    
-    t0 = START.replace(tzinfo=timezone.utc)
-    t1 = END.replace(tzinfo=timezone.utc)
-    steps = int((t1 - t0).total_seconds() // (STEP_HOURS * 3600))
+def unix_to_time(unix_seconds):
+    """Skyfield Time array for integer unix seconds (split into days so no leap seconds creep in)"""
+    unix_seconds = np.asarray(unix_seconds, dtype=np.int64)
+    return ts.utc(1970, 1, 1 + unix_seconds // 86400, 0, 0, unix_seconds % 86400)
+
+def daily_rise_set(observer, first_day, last_day):
+    """First moonrise and moonset (unix seconds) of every UTC day, from one search over all days.
+
+    Returns dicts of day number (unix seconds // 86400) -> timestamp.
+    """
+    t_start = unix_to_time(first_day * 86400)
+    t_end = unix_to_time((last_day + 1) * 86400)
+    f = almanac.risings_and_settings(eph, eph['moon'], observer)
+    times_events, events = almanac.find_discrete(t_start, t_end, f)
+
+    # 1 is rising, 0 is setting
+    rises, sets = {}, {}
+    for ti, ev in zip(times_events.utc_datetime(), events):
+        stamp = int(ti.timestamp())
+        first_of_day = rises if ev == 1 else sets
+        first_of_day.setdefault(stamp // 86400, stamp)
+    return rises, sets
+
+def build_moon_table(start, end, step_seconds=STEP_HOURS * 3600):
+    """Hourly (or any step) moon table over [start, end) as a dict of column name -> list."""
+    t0 = start.replace(tzinfo=timezone.utc)
+    t1 = end.replace(tzinfo=timezone.utc)
+    steps = int((t1 - t0).total_seconds() // step_seconds)
     observer = Topos(latitude_degrees=LAT, longitude_degrees=LON)
     min_dist, max_dist = 356500, 406700  # km, rough perigee/apogee
 
-    for i in range(steps):
-        t = t0 + timedelta(hours=i)
-        ts_t = ts.utc(t.year, t.month, t.day, t.hour, t.minute)
-        timestamps.append(int(t.timestamp()))
-        times.append(t)
-        
-        # Moon distance
-        astrometric = eph['moon'].at(ts_t).observe(eph['earth']).apparent()
-        dist = astrometric.distance().km
-        moon_dist_actual.append(dist)
-        moon_dist_norm.append(normalize(dist, min_dist, max_dist))
-        
-        # Moon phase
-        jd = ts_t.tt
-        phase = moon_phase(jd)
-        phases_actual.append(phase)
-        phases_norm.append(phase)  # phase is already 0-1, but you can re-normalize if desired
-       
-        t_start = ts.utc(t.year, t.month, t.day)
-        t_end = ts.utc(t.year, t.month, t.day+1)
-        f = almanac.risings_and_settings(eph, eph['moon'], observer)
-        times_events, events = almanac.find_discrete(t_start, t_end, f)
-        
-        # 0 is rising, 1 is setting
-        rise, set_ = None, None
-        for ti, ev in zip(times_events, events):
-            if ev == 1 and rise is None:
-                rise = ti.utc_datetime()
-            elif ev == 0 and set_ is None:
-                set_ = ti.utc_datetime()
-        if rise: rise = int(rise.timestamp())
-        if set_: set_ = int(set_.timestamp())
-
-        if rise and set_: 
-            culmination_time = rise + (set_ - rise) / 2 
-            culmination.append(culmination_time) 
-        else: 
-            culmination.append(None) 
-
-        moonrise.append(rise)
-        moonset.append(set_)
-    
-    df = pd.DataFrame({
-        'unix_time': timestamps,
-        'moon_phase': phases_actual,
-        'moon_phase_norm': phases_norm,
-        'moon_dist': moon_dist_actual,
-        'moon_dist_norm': moon_dist_norm,
+    # One Time array for the whole range
+    timestamps = int(t0.timestamp()) + np.arange(steps, dtype=np.int64) * step_seconds
+    t = unix_to_time(timestamps)
+
+    # Moon distance. Skyfield repeats its light-time iteration until every sample has
+    # converged, so a few rows can differ from per-row evaluation by ~1e-8 km
+    astrometric = eph['moon'].at(t).observe(eph['earth']).apparent()
+    dist = astrometric.distance().km
+
+    # Moon phase
+    phase = moon_phase(t.tt)
+
+    # Rise/set searched once over the range, then joined onto the rows by UTC day
+    days = timestamps // 86400
+    rises, sets = daily_rise_set(observer, int(days[0]), int(days[-1])) if steps else ({}, {})
+    moonrise = [rises.get(day) for day in days.tolist()]
+    moonset = [sets.get(day) for day in days.tolist()]
+    culmination = [
+        rise + (set_ - rise) / 2 if rise and set_ else None
+        for rise, set_ in zip(moonrise, moonset)
+    ]
+
+    return {
+        'unix_time': timestamps.tolist(),
+        'moon_phase': phase,
+        'moon_phase_norm': phase,  # phase is already 0-1, but you can re-normalize if desired
+        'moon_dist': dist,
+        'moon_dist_norm': normalize(dist, min_dist, max_dist),
         'moon_rise': moonrise,
         'moon_set': moonset,
         'moon_culmination': culmination
-    })
-    print(df.head())
-    df.to_csv('moon_table.csv')
-    
+    }
+
+def format_column(values):
+    """CSV cells for one column, laid out as pandas.DataFrame.to_csv writes them."""
+    values = list(values)
+    # pandas turns integer columns with gaps into floats, and writes gaps as empty cells
+    as_float = any(value is None for value in values) or any(isinstance(value, (float, np.floating)) for value in values)
+    return ['' if value is None else repr(float(value)) if as_float else str(value) for value in values]
+
+def write_moon_csv(table, filename):
+    """Write the table to CSV (with the DataFrame index column) without importing pandas."""
+    columns = [format_column(table[name]) for name in TABLE_COLUMNS]
+    with open(filename, 'w', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow([''] + TABLE_COLUMNS)
+        for index, row in enumerate(zip(*columns)):
+            writer.writerow([index] + list(row))
+
+def to_dataframe(table):
+    """The table as a pandas DataFrame; pandas is only imported for this sink."""
+    import pandas as pd
+    return pd.DataFrame({name: table[name] for name in TABLE_COLUMNS})
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the moon phase/distance/rise/set table')
+    parser.add_argument('--output', default='moon_table.csv', help='CSV file to write')
+    parser.add_argument('--dataframe', action='store_true', help='Go through a pandas DataFrame (prints its head)')
+    args = parser.parse_args()
+
+    table = build_moon_table(START, END)
+    if args.dataframe:
+        df = to_dataframe(table)
+        print(df.head())
+        df.to_csv(args.output)
+    else:
+        write_moon_csv(table, args.output)
+        print(f"Wrote {len(table['unix_time'])} rows to {args.output}")
+
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,235 @@
+from pathlib import Path
+import numpy as np
+import skyfield
+from skyfield.nutationlib import iau2000a_radians
+from skyfield.timelib import Time
+
+from de430 import DEFAULT_OUTPUT_FILE, DECoefficients
+
+# Constants matching Skyfield's (skyfield.constants) so both backends agree
+C_KM_PER_DAY = 299792.458 * 86400.0
+AU_KM = 149597870.7
+SUN_GM_KM3_PER_DAY2 = 1.32712440017987e+11 * 86400.0 ** 2
+EMRAT = 81.30056907419062  # DE430 Earth/Moon mass ratio
+LIGHT_TIME_ITERATIONS = 10
+LIGHT_TIME_TOLERANCE_DAYS = 1e-12
+NUTATION_GRID_DAYS = 1.0 / 24.0  # Hourly samples interpolate IAU 2000A to within 20 µas, far below the 1 mas tolerance
+
+# Skyfield caches a Time's IAU 2000A angles in this attribute and keeps presetting it
+# supported (see Time._nutation_angles). It is still not public API, so the backend
+# refuses to run on a Skyfield without it; validated against VALIDATED_SKYFIELD_VERSION.
+NUTATION_ANGLES_ATTRIBUTE = '_nutation_angles_radians'
+VALIDATED_SKYFIELD_VERSION = '1.55'
+
+# Largest differences from the Skyfield backend when both read the same DE solution,
+# asserted by tests/test_native_ephemeris.py (azimuth is compared scaled by cos(altitude))
+SKYFIELD_TOLERANCES = {
+    'phase': 1e-6,                    # Moon illuminated fraction, or degrees from the Sun
+    'distance_km': 0.002,
+    'azimuth_deg': 1.0 / 3600000.0,   # 1 mas
+    'altitude_deg': 1.0 / 3600000.0,
+}
+
+# Stream body names -> DE430 bodies (the outer planets are their system barycenters, as in the Skyfield backend)
+NATIVE_BODIES = {
+    'mercury': 'mercury', 'venus': 'venus', 'mars': 'mars', 'jupiter': 'jupiter', 'saturn': 'saturn',
+    'uranus': 'uranus', 'neptune': 'neptune', 'sun': 'sun', 'moon': 'moon'
+}
+
+
+def length_of(xyz):
+    return np.sqrt(np.einsum('i...,i...->...', xyz, xyz))
+
+
+def angle_between(u, v):
+    """Angle in radians between (3, ...) vectors, accurate near 0 and 180 degrees (as Skyfield computes it)."""
+    a = u * length_of(v)
+    b = v * length_of(u)
+    return 2.0 * np.arctan2(length_of(a - b), length_of(a + b))
+
+
+def chebyshev_state(coefficients, granule_index, x, scale):
+    """Evaluate Chebyshev series and their time derivatives for many dates at once.
+
+    `coefficients` is (granule, component, k); each date picks its granule
+    with `granule_index` and its position in it with `x` in [-1, 1]. `scale`
+    converts d/dx into d/dt. Returns (component, ...) values and derivatives.
+    """
+    count = coefficients.shape[-1]
+    polynomials = np.empty((count,) + np.shape(x))
+    derivatives = np.empty_like(polynomials)
+    polynomials[0] = 1.0
+    derivatives[0] = 0.0
+    if count > 1:
+        polynomials[1] = x
+        derivatives[1] = 1.0
+    for k in range(2, count):
+        polynomials[k] = 2.0 * x * polynomials[k - 1] - polynomials[k - 2]
+        derivatives[k] = 2.0 * polynomials[k - 1] + 2.0 * x * derivatives[k - 1] - derivatives[k - 2]
+
+    # Dates in one granule share its coefficients: one matrix product per granule
+    if len(coefficients) == 1:
+        return coefficients[0] @ polynomials, coefficients[0] @ derivatives * scale
+    values = np.empty((coefficients.shape[1],) + np.shape(x))
+    rates = np.empty_like(values)
+    for granule in range(len(coefficients)):
+        mask = granule_index == granule
+        values[:, mask] = coefficients[granule] @ polynomials[:, mask]
+        rates[:, mask] = coefficients[granule] @ derivatives[:, mask]
+    return values, rates * scale
+
+
+def add_sun_deflection(position, observer_from_sun):
+    """Bend `position` (km, relative to the observer) for the Sun's gravity, in place (Skyfield's formula)."""
+    pq = position + observer_from_sun
+    pmag = length_of(position)
+    qmag = length_of(pq)
+    emag = length_of(observer_from_sun)
+
+    phat = position / np.where(pmag, pmag, 1.0)
+    qhat = pq / np.where(qmag, qmag, 1.0)
+    ehat = observer_from_sun / np.where(emag, emag, 1.0)
+    pdotq = np.einsum('i...,i...->...', phat, qhat)
+    qdote = np.einsum('i...,i...->...', qhat, ehat)
+    edotp = np.einsum('i...,i...->...', ehat, phat)
+
+    # No deflection when the Sun is the target or lies on the line of sight
+    flag = np.abs(edotp) <= 0.99999999999
+    factor = 2.0 * SUN_GM_KM3_PER_DAY2 / (C_KM_PER_DAY ** 2 * emag)
+    position += flag * factor * (pdotq * ehat - edotp * qhat) / (1.0 + qdote) * pmag
+
+
+def add_aberration(position, velocity, light_time):
+    """Apply relativistic aberration for an observer moving at `velocity` (km/day), in place."""
+    p1mag = light_time * C_KM_PER_DAY
+    vemag = length_of(velocity)
+    beta = vemag / C_KM_PER_DAY
+    cosd = np.einsum('i...,i...->...', position, velocity) / (p1mag * vemag + 1e-300)
+    gammai = np.sqrt(1.0 - beta * beta)
+    p = beta * cosd
+    q = (1.0 + p / (1.0 + gammai)) * light_time
+    r = 1.0 + p
+
+    position *= gammai
+    position += q * velocity
+    position /= r
+
+
+class NativeBackend:
+    """Stream positions evaluated with NumPy straight from a DE430 EPHD coefficient store.
+
+    Every body is a vectorized Chebyshev evaluation over the whole Time
+    array, corrected for light time, the Sun's light deflection and
+    aberration. Time scales and Earth orientation still come from the
+    generator's Skyfield timescale and observer, with IAU 2000A nutation
+    interpolated from an hourly grid instead of evaluated per sample.
+    """
+
+    name = 'native'
+
+    def __init__(self, generator, ephemeris_file=None):
+        ephemeris_file = ephemeris_file or DEFAULT_OUTPUT_FILE
+        if not Path(ephemeris_file).exists():
+            raise FileNotFoundError(f"{ephemeris_file}: no DE430 coefficient store (download with eph.py, convert with de430.py)")
+        if not hasattr(Time, NUTATION_ANGLES_ATTRIBUTE):
+            raise RuntimeError(f"Skyfield {skyfield.__version__} has no Time.{NUTATION_ANGLES_ATTRIBUTE} to preset; "
+                               f"the native backend needs skyfield=={VALIDATED_SKYFIELD_VERSION}")
+        self.store = DECoefficients(ephemeris_file)
+        self.ts = generator.ts
+        self.observer = generator.observer
+
+    def chebyshev_body(self, body, tdb):
+        """Position and velocity (km, km/day) of a DE430 body at TDB Julian dates."""
+        coefficients, granule_index, x = self.store.body_granules(body, tdb)
+        subintervals = self.store.bodies[body][2]
+        return chebyshev_state(coefficients, granule_index, x, 2.0 * subintervals / self.store.record_days)
+
+    def barycentric(self, name, tdb):
+        """Barycentric position and velocity of a stream body, or of the 'earth' geocenter."""
+        if name not in ('earth', 'moon'):
+            return self.chebyshev_body(NATIVE_BODIES[name], tdb)
+
+        emb_position, emb_velocity = self.chebyshev_body('earth_moon_barycenter', tdb)
+        moon_position, moon_velocity = self.chebyshev_body('moon', tdb)
+        earth_position = emb_position - moon_position / (1.0 + EMRAT)
+        earth_velocity = emb_velocity - moon_velocity / (1.0 + EMRAT)
+        if name == 'earth':
+            return earth_position, earth_velocity
+        return earth_position + moon_position, earth_velocity + moon_velocity
+
+    def observe(self, name, tdb, observer_position):
+        """Astrometric position (km) of `name` from a barycentric observer, and the light time (days)."""
+        position = self.barycentric(name, tdb)[0] - observer_position
+        light_time = np.zeros(np.shape(tdb))
+        for _ in range(LIGHT_TIME_ITERATIONS):
+            corrected = length_of(position) / C_KM_PER_DAY
+            converged = np.max(np.abs(corrected - light_time), initial=0.0) < LIGHT_TIME_TOLERANCE_DAYS
+            light_time = corrected
+            if converged:
+                return position, light_time
+            position = self.barycentric(name, tdb - light_time)[0] - observer_position
+        raise ValueError(f"Light time to {name} did not converge")
+
+    def prepare_time(self, t):
+        """Copy of `t` whose nutation is interpolated from an hourly IAU 2000A grid."""
+        t = self.ts.tt_jd(t.whole, t.tt_fraction)
+        tt = np.atleast_1d(t.tt)
+        grid = np.arange(tt.min() - NUTATION_GRID_DAYS, tt.max() + 2 * NUTATION_GRID_DAYS, NUTATION_GRID_DAYS)
+        d_psi, d_eps = iau2000a_radians(self.ts.tt_jd(grid))
+        setattr(t, NUTATION_ANGLES_ATTRIBUTE, (
+            np.interp(t.tt, grid, d_psi),
+            np.interp(t.tt, grid, d_eps)
+        ))
+        return t
+
+    def stream_channels(self, bodies, t):
+        """Per-body phase, distance, azimuth and altitude over Skyfield Time `t` (same rules as SkyfieldBackend)."""
+        unknown = sorted(name for name in bodies if name.lower() not in NATIVE_BODIES)
+        if unknown:
+            raise ValueError(f"Native backend cannot compute {', '.join(unknown)} "
+                             f"(available: {', '.join(NATIVE_BODIES)})")
+
+        t = self.prepare_time(t)
+        tdb = t.tdb
+
+        # Observer state, shared by every body
+        topocentric = self.observer.at(t)
+        earth_position, earth_velocity = self.barycentric('earth', tdb)
+        observer_position = earth_position + topocentric.position.au * AU_KM
+        observer_velocity = earth_velocity + topocentric.velocity.au_per_d * AU_KM
+        rotation = self.observer.rotation_at(t)
+
+        sun_position = self.barycentric('sun', tdb)[0]
+        cache = {}
+
+        def apparent(name):
+            if name not in cache:
+                position, light_time = self.observe(name, tdb, observer_position)
+                add_sun_deflection(position, observer_position - sun_position)
+                add_aberration(position, observer_velocity, light_time)
+                cache[name] = position
+            return cache[name]
+
+        channels = {}
+        for current_body_name in bodies:
+            name = current_body_name.lower()
+            position = apparent(name)
+            horizon = np.einsum('ij...,j...->i...', rotation, position)
+            x, y, z = horizon
+
+            if name == 'moon':
+                # Geocentric astrometric elongation, as get_moon_phase() measures it
+                sun_geocentric = self.observe('sun', tdb, earth_position)[0]
+                moon_geocentric = self.observe('moon', tdb, earth_position)[0]
+                elongation = angle_between(sun_geocentric, moon_geocentric)
+                phase = (1.0 - np.cos(elongation)) / 2.0
+            else:
+                phase = np.degrees(angle_between(position, apparent('sun')))
+
+            channels[current_body_name] = {
+                'phase': phase,
+                'distance_km': length_of(position),
+                'azimuth_deg': np.degrees(np.arctan2(y, x)) % 360.0,
+                'altitude_deg': np.degrees(np.arctan2(z, np.hypot(x, y)))
+            }
+        return channels
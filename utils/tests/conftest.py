@@ -0,0 +1,39 @@
+import os
+import sys
+from pathlib import Path
+import pytest
+
+UTILS_DIR = Path(__file__).resolve().parent.parent
+# The utils scripts import each other by module name
+sys.path.insert(0, str(UTILS_DIR))
+
+from ephemeries import DualFileEphemerisGenerator  # noqa: E402
+
+OBSERVER = (52.9822196, 36.1406844, 220)
+KERNEL = 'de421.bsp'
+
+
+def find_kernel_dir():
+    """First of $SKYFIELD_DATA, ~/.skyfield-data (moon.py's loader), utils/ and the repo root that holds de421.bsp."""
+    for directory in (os.environ.get('SKYFIELD_DATA'), '~/.skyfield-data', UTILS_DIR, UTILS_DIR.parent):
+        if directory and (Path(directory).expanduser() / KERNEL).is_file():
+            return Path(directory).expanduser()
+    return None
+
+
+@pytest.fixture(scope='session')
+def kernel_dir():
+    """Run from the directory holding de421.bsp, so load('de421.bsp') never downloads; skip without it."""
+    directory = find_kernel_dir()
+    if directory is None:
+        pytest.skip(f"{KERNEL} not found; copy it into utils/ or point SKYFIELD_DATA at its directory")
+    previous = os.getcwd()
+    os.chdir(directory)
+    yield directory
+    os.chdir(previous)
+
+
+@pytest.fixture(scope='session')
+def generator(kernel_dir):
+    """Generator on the default Skyfield backend."""
+    return DualFileEphemerisGenerator(*OBSERVER)
@@ -0,0 +1,91 @@
+import shutil
+from datetime import datetime
+import numpy as np
+import pytest
+from skyfield.api import utc
+
+from ephemeries import EVENT_RISE, EVENT_SET, DualFileEphemerisGenerator
+from ephemeris_reader import EventFileReader
+from conftest import OBSERVER
+
+START = datetime(2025, 6, 10, tzinfo=utc)
+MIDDLE = datetime(2025, 6, 13, tzinfo=utc)
+END = datetime(2025, 6, 16, tzinfo=utc)
+INTERVAL = 600
+
+
+def write_run(generator, directory, start, end):
+    """Generate [start, end] for the Moon into directory/stream.bin and directory/events.bin."""
+    directory.mkdir()
+    records, events = generator.generate_dual_files('moon', start, end, INTERVAL)
+    generator.write_binary_stream(records, directory / 'stream.bin', 'moon', start, end, INTERVAL)
+    generator.write_binary_events(events, directory / 'events.bin', 'moon')
+    return directory
+
+
+@pytest.fixture(scope='module')
+def runs(generator, tmp_path_factory):
+    """A single run over START..END and a run to MIDDLE that was then appended up to END."""
+    root = tmp_path_factory.mktemp('append')
+    single = write_run(generator, root / 'single', START, END)
+    appended = write_run(generator, root / 'appended', START, MIDDLE)
+    counts = generator.append_dual_files('moon', appended / 'stream.bin', appended / 'events.bin', END)
+    return single, appended, counts
+
+
+def test_appended_stream_matches_a_single_run(runs):
+    single, appended, (record_count, _) = runs
+    assert record_count == 3 * 24 * 3600 // INTERVAL
+    # Header counts and end timestamp are patched in place
+    assert (appended / 'stream.bin').read_bytes() == (single / 'stream.bin').read_bytes()
+
+
+def test_appended_events_match_a_single_run(runs):
+    single, appended, (_, event_count) = runs
+    expected = EventFileReader(single / 'events.bin')
+    actual = EventFileReader(appended / 'events.bin')
+
+    assert event_count > 0
+    assert (actual.event_count, actual.start_timestamp, actual.end_timestamp) == \
+        (expected.event_count, expected.start_timestamp, expected.end_timestamp)
+    assert np.array_equal(actual.events['event_type'], expected.events['event_type'])
+    searched = np.isin(expected.events['event_type'], [EVENT_RISE, EVENT_SET])
+    assert actual.events[~searched].tobytes() == expected.events[~searched].tobytes()
+
+    # A rise/set search over a different range may land a second apart (see generate_streaming_files)
+    rise_set, expected_rise_set = actual.events[searched], expected.events[searched]
+    assert np.abs(rise_set['timestamp'].astype(np.int64) - expected_rise_set['timestamp']).max() <= 1
+    # How far each value can move in that second, for the Moon
+    for field, tolerance in (('azimuth_deg', 0.01), ('altitude_deg', 0.01), ('phase', 1e-5), ('distance_km', 1.0)):
+        assert np.abs(rise_set[field] - expected_rise_set[field]).max() <= tolerance, field
+
+
+@pytest.fixture
+def stored_run(runs, tmp_path):
+    """A copy of the single run's files that a test may try to append to."""
+    single, _, _ = runs
+    directory = tmp_path / 'stored'
+    directory.mkdir()
+    for name in ('stream.bin', 'events.bin'):
+        shutil.copy(single / name, directory / name)
+    return directory
+
+
+def test_append_refuses_another_observer(stored_run):
+    lat, lon, elevation = OBSERVER
+    generator = DualFileEphemerisGenerator(lat + 1.0, lon, elevation)
+    before = (stored_run / 'stream.bin').read_bytes()
+
+    with pytest.raises(ValueError, match='observer'):
+        generator.append_dual_files('moon', stored_run / 'stream.bin', stored_run / 'events.bin',
+                                    datetime(2025, 6, 20, tzinfo=utc))
+    assert (stored_run / 'stream.bin').read_bytes() == before
+
+
+def test_append_refuses_another_interval(generator, stored_run):
+    before = (stored_run / 'stream.bin').read_bytes()
+
+    with pytest.raises(ValueError, match='interval'):
+        generator.append_dual_files('moon', stored_run / 'stream.bin', stored_run / 'events.bin',
+                                    datetime(2025, 6, 20, tzinfo=utc), stream_interval_seconds=60)
+    assert (stored_run / 'stream.bin').read_bytes() == before
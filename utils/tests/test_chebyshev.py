@@ -0,0 +1,67 @@
+from datetime import datetime
+import numpy as np
+import pytest
+from skyfield.api import utc
+
+from chebyshev import (
+    CHEBYSHEV_CHANNELS, MIN_SEGMENT_SAMPLES, ChebyshevEphemeris, effective_max_errors, error_report,
+    fit_chebyshev_segments, write_chebyshev_file
+)
+from ephemeries import DualFileEphemerisGenerator
+from ephemeris_jobs import normalize_job, run_job
+from ephemeris_reader import StreamFileReader
+from conftest import OBSERVER
+
+START = datetime(2025, 6, 10, tzinfo=utc)
+INTERVAL = 60
+
+
+@pytest.fixture(scope='module')
+def moon_records(generator):
+    """Two days of Moon records at one-minute resolution."""
+    body = generator.resolve_bodies(['moon'])['moon']
+    return generator.calculate_stream_chunk(body, 'moon', START, 2 * 1440 + 1, INTERVAL)
+
+
+def test_written_stream_meets_max_errors(generator, moon_records, tmp_path):
+    report = generator.write_chebyshev_stream(moon_records, tmp_path / 'stream.ephc')
+    limits = effective_max_errors(moon_records)
+
+    ephemeris = ChebyshevEphemeris(tmp_path / 'stream.ephc')
+    assert (ephemeris.start_timestamp, ephemeris.end_timestamp) == \
+        (int(moon_records[0]['timestamp']), int(moon_records[-1]['timestamp']))
+    assert report == error_report(ephemeris, moon_records)
+    for channel in CHEBYSHEV_CHANNELS:
+        assert report[channel][0] <= limits[channel], channel
+
+
+def test_windows_that_miss_max_errors_are_split(moon_records, tmp_path):
+    max_errors = {'azimuth_deg': 1e-3, 'altitude_deg': 1e-3}
+    segments = fit_chebyshev_segments(moon_records, window_seconds=86400, max_degree=8, max_errors=max_errors)
+    write_chebyshev_file(segments, tmp_path / 'stream.ephc')
+    report = error_report(ChebyshevEphemeris(tmp_path / 'stream.ephc'), moon_records)
+    limits = effective_max_errors(moon_records, max_errors)
+
+    durations = [duration for _, duration, _ in segments]
+    assert len(segments) > 2
+    assert max(durations) < 86400
+    # Split down to windows that fit, not to the minimum-size fallback
+    assert min(durations) > 2 * MIN_SEGMENT_SAMPLES * INTERVAL
+    # Segments tile the stream, sharing their boundary samples
+    assert [start for start, _, _ in segments[1:]] == [start + duration for start, duration, _ in segments[:-1]]
+    for channel in CHEBYSHEV_CHANNELS:
+        assert report[channel][0] <= limits[channel], channel
+
+
+def test_job_output_writes_a_chebyshev_stream(kernel_dir, tmp_path):
+    # run_job sets the detectors on its generator, so it gets one of its own
+    generator = DualFileEphemerisGenerator(*OBSERVER)
+    job = normalize_job({'body': 'moon', 'start': '2025-06-10', 'end': '2025-06-12', 'interval': 600,
+                         'outputs': ['chebyshev'], 'output_dir': str(tmp_path), 'detectors': []})
+    files = run_job(generator, job)['files']
+
+    records = np.array(StreamFileReader(files['stream']).records)
+    ephemeris = ChebyshevEphemeris(files['chebyshev'])
+    limits = effective_max_errors(records)
+    for channel, (max_error, _) in error_report(ephemeris, records).items():
+        assert max_error <= limits[channel], channel
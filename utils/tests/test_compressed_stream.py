@@ -0,0 +1,77 @@
+import struct
+from datetime import datetime
+import numpy as np
+import pytest
+from skyfield.api import utc
+
+from ephemeries import (
+    COMPRESSED_BLOCK_HEADER_FORMAT, COMPRESSED_BLOCK_HEADER_SIZE, COMPRESSED_BLOCK_SIZE, COMPRESSED_CHANNELS,
+    COMPRESSED_HEADER_SIZE
+)
+from ephemeris_reader import CompressedStreamReader
+
+START = datetime(2025, 6, 10, tzinfo=utc)
+
+
+@pytest.fixture(scope='module')
+def moon_records(generator):
+    """One day and one minute of Moon records: just over one full block."""
+    body = generator.resolve_bodies(['moon'])['moon']
+    return generator.calculate_stream_chunk(body, 'moon', START, COMPRESSED_BLOCK_SIZE + 1, 60)
+
+
+def block_scales(reader, block_index):
+    """Quantization step of every channel in one block, read from its block header."""
+    offset = int(reader.block_offsets[block_index])
+    values = struct.unpack(COMPRESSED_BLOCK_HEADER_FORMAT,
+                           bytes(reader.data[offset:offset + COMPRESSED_BLOCK_HEADER_SIZE]))
+    return dict(zip(COMPRESSED_CHANNELS, values[len(COMPRESSED_CHANNELS):]))
+
+
+@pytest.mark.parametrize('count', [1, 2, COMPRESSED_BLOCK_SIZE, COMPRESSED_BLOCK_SIZE + 1])
+def test_round_trip_stays_within_one_quantization_step(generator, moon_records, tmp_path, count):
+    records = moon_records[:count]
+    filename = tmp_path / 'stream.ephz'
+    generator.write_compressed_stream(records, filename, 60)
+    reader = CompressedStreamReader(filename)
+    decoded = reader.read_all()
+
+    assert len(reader) == count
+    assert reader.block_count == -(-count // COMPRESSED_BLOCK_SIZE)
+    assert np.array_equal(decoded['timestamp'], records['timestamp'])
+    for block_index in range(reader.block_count):
+        block = slice(block_index * COMPRESSED_BLOCK_SIZE, (block_index + 1) * COMPRESSED_BLOCK_SIZE)
+        for channel, scale in block_scales(reader, block_index).items():
+            expected = records[channel][block].astype(np.float64)
+            error = decoded[channel][block].astype(np.float64) - expected
+            if channel == 'azimuth_deg':
+                error = (error + 180.0) % 360.0 - 180.0
+            # One step of quantization, plus the float32 rounding of the decoded value
+            bound = scale + np.spacing(records[channel][block]).astype(np.float64)
+            assert np.all(np.abs(error) <= bound), channel
+
+
+def test_lookups_decode_only_their_block(generator, moon_records, tmp_path):
+    block_size = 100
+    filename = tmp_path / 'stream.ephz'
+    generator.write_compressed_stream(moon_records, filename, 60, block_size=block_size)
+    expected = CompressedStreamReader(filename).read_all()
+
+    # The offset table points past the header and the table itself, then steps one block at a time
+    reader = CompressedStreamReader(filename)
+    block_bytes = COMPRESSED_BLOCK_HEADER_SIZE + (block_size - 1) * len(COMPRESSED_CHANNELS) * 2
+    assert reader.block_offsets[0] == COMPRESSED_HEADER_SIZE + 8 * reader.block_count
+    assert np.all(np.diff(reader.block_offsets.astype(np.int64)) == block_bytes)
+
+    # Garble the first block: lookups anywhere else never read it
+    data = bytearray(filename.read_bytes())
+    data[int(reader.block_offsets[0]):int(reader.block_offsets[1])] = b'\xff' * block_bytes
+    reader.close()
+    filename.write_bytes(bytes(data))
+    reader = CompressedStreamReader(filename)
+
+    rng = np.random.default_rng(7)
+    for index in rng.integers(block_size, len(moon_records), 50):
+        record = reader.find_record(int(moon_records[index]['timestamp']) + 59)
+        assert record.tobytes() == expected[index].tobytes()
+    assert reader.read_block(reader.block_count - 1).tobytes() == expected[-(len(moon_records) % block_size):].tobytes()
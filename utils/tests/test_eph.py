@@ -0,0 +1,157 @@
+import gzip
+import hashlib
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+import eph
+
+PAYLOAD = bytes(range(256)) * 400  # 100 KiB
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Serves PAYLOAD at any path; the class attributes script the server's behaviour."""
+
+    honor_range = True
+    drop_first_after = None  # Close the first response after this many bytes
+    always_gzip = False  # Compress whole-file responses even when asked for identity
+    ranges = []
+    encodings = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        range_header = self.headers.get('Range')
+        type(self).ranges.append(range_header)
+        type(self).encodings.append(self.headers.get('Accept-Encoding'))
+        match = re.fullmatch(r'bytes=(\d+)-', range_header or '')
+        start = int(match.group(1)) if match and self.honor_range else 0
+
+        if start >= len(PAYLOAD):
+            self.send_response(416)
+            self.send_header('Content-Range', f'bytes */{len(PAYLOAD)}')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if start:
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{len(PAYLOAD) - 1}/{len(PAYLOAD)}')
+        else:
+            self.send_response(200)
+        body = PAYLOAD[start:]
+        if self.always_gzip and not start:
+            body = gzip.compress(body)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+
+        if self.drop_first_after is not None and len(type(self).ranges) == 1:
+            self.wfile.write(body[:self.drop_first_after])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """Start a local HTTP stand-in on a thread; yields its handler class (configure before downloading)."""
+    handler = type('Handler', (StandInHandler,), {'ranges': [], 'encodings': []})
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    handler.url = f'http://127.0.0.1:{httpd.server_address[1]}/ascp2000.430'
+    monkeypatch.setattr(eph.time, 'sleep', lambda seconds: None)  # No retry back-off in tests
+    yield handler
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_resumes_a_part_file_with_a_range_request(server, tmp_path):
+    destination = tmp_path / 'ascp2000.430'
+    (tmp_path / ('ascp2000.430' + eph.PART_SUFFIX)).write_bytes(PAYLOAD[:30000])
+
+    assert eph.download_file(server.url, str(destination), timeout=5)
+    assert server.ranges == ['bytes=30000-']
+    assert destination.read_bytes() == PAYLOAD
+    assert not (tmp_path / ('ascp2000.430' + eph.PART_SUFFIX)).exists()
+
+
+def test_resumes_after_the_connection_drops(server, tmp_path):
+    server.drop_first_after = 40000
+    destination = tmp_path / 'ascp2000.430'
+
+    # Whole chunks reach the part file; the retry asks for the rest of the file
+    assert eph.download_file(server.url, str(destination), chunk_size=4096, timeout=5)
+    first, resumed = server.ranges
+    assert first is None
+    assert 0 < int(re.fullmatch(r'bytes=(\d+)-', resumed).group(1)) <= 40000
+    assert destination.read_bytes() == PAYLOAD
+
+
+def test_finishes_a_complete_part_file(server, tmp_path):
+    destination = tmp_path / 'ascp2000.430'
+    (tmp_path / ('ascp2000.430' + eph.PART_SUFFIX)).write_bytes(PAYLOAD)
+
+    # The server answers 416: nothing is left to send
+    assert eph.download_file(server.url, str(destination), timeout=5)
+    assert server.ranges == [f'bytes={len(PAYLOAD)}-']
+    assert destination.read_bytes() == PAYLOAD
+
+
+def test_discards_a_part_file_longer_than_the_server_file(server, tmp_path):
+    destination = tmp_path / 'ascp2000.430'
+    part = tmp_path / ('ascp2000.430' + eph.PART_SUFFIX)
+    part.write_bytes(PAYLOAD + b'tail of another version')
+
+    # The server answers 416 with a different size: this run fails, the next starts over
+    assert not eph.download_file(server.url, str(destination), timeout=5)
+    assert not part.exists()
+    assert eph.download_file(server.url, str(destination), timeout=5)
+    assert server.ranges == [f'bytes={len(PAYLOAD) + 23}-', None]
+    assert destination.read_bytes() == PAYLOAD
+
+
+def test_asks_for_the_file_unencoded(server, tmp_path):
+    destination = tmp_path / 'ascp2000.430'
+
+    assert eph.download_file(server.url, str(destination), timeout=5)
+    assert server.encodings == ['identity']
+
+
+def test_skips_the_length_check_on_a_compressed_body(server, tmp_path):
+    server.always_gzip = True
+    destination = tmp_path / 'ascp2000.430'
+
+    # Content-Length is the gzip size; the decoded file is what gets verified
+    assert eph.download_file(server.url, str(destination), sha256=hashlib.sha256(PAYLOAD).hexdigest(), timeout=5)
+    assert destination.read_bytes() == PAYLOAD
+
+
+def test_restarts_when_the_server_ignores_range(server, tmp_path):
+    server.honor_range = False
+    destination = tmp_path / 'ascp2000.430'
+    (tmp_path / ('ascp2000.430' + eph.PART_SUFFIX)).write_bytes(b'stale bytes from another file')
+
+    assert eph.download_file(server.url, str(destination), timeout=5)
+    assert server.ranges == ['bytes=29-']
+    assert destination.read_bytes() == PAYLOAD
+
+
+def test_rejects_a_checksum_mismatch(server, tmp_path):
+    destination = tmp_path / 'ascp2000.430'
+    wrong = hashlib.sha256(b'not the payload').hexdigest()
+
+    assert not eph.download_file(server.url, str(destination), sha256=wrong, timeout=5)
+    assert not destination.exists()
+    # A corrupt part file cannot be resumed into a good one, so it is discarded too
+    assert not (tmp_path / ('ascp2000.430' + eph.PART_SUFFIX)).exists()
+
+
+def test_accepts_a_matching_checksum(server, tmp_path):
+    destination = tmp_path / 'ascp2000.430'
+
+    assert eph.download_file(server.url, str(destination), sha256=hashlib.sha256(PAYLOAD).hexdigest(), timeout=5)
+    assert destination.read_bytes() == PAYLOAD
@@ -0,0 +1,133 @@
+import struct
+from datetime import datetime, timedelta
+import numpy as np
+from skyfield.api import utc
+
+from ephemeries import (
+    EVENTS_HEADER_FORMAT, STREAM_HEADER_FORMAT, STREAM_RECORD_DTYPE, DualFileEphemerisGenerator, align_chunk_steps,
+    empty_stream_records, utc_sample_times, write_record_block
+)
+from conftest import OBSERVER
+
+# 2016-12-31 ended with a leap second (23:59:60 UTC)
+LEAP_SECOND_START = datetime(2016, 12, 31, 23, 0, 0, tzinfo=utc)
+STREAM_START = 1749513600  # 2025-06-10 00:00 UTC
+
+
+def test_sample_times_step_like_datetimes_across_leap_second(generator):
+    t = utc_sample_times(generator.ts, LEAP_SECOND_START, 121, 60)
+    expected = [LEAP_SECOND_START + timedelta(minutes=i) for i in range(121)]
+    assert t.utc_datetime().tolist() == expected
+
+
+def test_stream_chunk_matches_scalar_samples_across_leap_second(generator):
+    body = generator.resolve_bodies(['moon'])['moon']
+    count = 121
+    chunk = generator.calculate_stream_chunk(body, 'moon', LEAP_SECOND_START, count, 60)
+
+    expected = empty_stream_records(count)
+    for i in range(count):
+        values = generator.calculate_stream_data(body, 'moon', LEAP_SECOND_START + timedelta(minutes=i))
+        expected[i] = tuple(values[name] for name in STREAM_RECORD_DTYPE.names)
+    assert np.diff(chunk['timestamp']).tolist() == [60] * (count - 1)
+    assert chunk.tobytes() == expected.tobytes()
+
+
+def sample_stream_records(count):
+    """Stream records with random values on a one-minute grid."""
+    rng = np.random.default_rng(1)
+    records = np.zeros(count, dtype=STREAM_RECORD_DTYPE)
+    records['timestamp'] = STREAM_START + 60 * np.arange(count)
+    records['phase'] = rng.uniform(0, 1, count)
+    records['distance_km'] = rng.uniform(356500, 406700, count)
+    records['azimuth_deg'] = rng.uniform(0, 360, count)
+    records['altitude_deg'] = rng.uniform(-90, 90, count)
+    return records
+
+
+def test_binary_stream_matches_per_record_struct_pack(generator, tmp_path):
+    records = sample_stream_records(240)
+    filename = tmp_path / 'stream.bin'
+    generator.write_binary_stream(records, filename, 'moon', None, None, 60)
+
+    # The pre-vectorization writer: header, then one '<Iffff' pack per record
+    expected = struct.pack(STREAM_HEADER_FORMAT, b'EPHS', len(records), int(records[0]['timestamp']),
+                           int(records[-1]['timestamp']), 60, generator.observer_lat, generator.observer_lon,
+                           generator.observer_elevation, 0.0, 0.0, 0.0, 0.0)
+    expected += b''.join(struct.pack('<Iffff', *record) for record in records.tolist())
+    assert filename.read_bytes() == expected
+
+
+def test_binary_events_match_per_event_struct_pack(generator, tmp_path):
+    rng = np.random.default_rng(3)
+    events = [
+        {
+            'timestamp': STREAM_START + 3600 * i,
+            'event_type': int(event_type),
+            'azimuth_deg': float(rng.uniform(0, 360)),
+            'altitude_deg': float(rng.uniform(-90, 90)),
+            'phase': float(rng.uniform(0, 1)),
+            'distance_km': float(rng.uniform(356500, 406700)),
+        }
+        for i, event_type in enumerate([1, 2, 3, 5, 6, 9, 5])
+    ]
+    # Only planet transits carry the from/to ids
+    events[3].update(from_planet_id=4, to_planet_id=2)
+    events[6].update(from_planet_id=10, to_planet_id=11)
+    filename = tmp_path / 'events.bin'
+    generator.write_binary_events(events, filename, 'moon')
+
+    expected = struct.pack(EVENTS_HEADER_FORMAT, b'EVTS', len(events), events[0]['timestamp'],
+                           events[-1]['timestamp'], 0, generator.observer_lat, generator.observer_lon,
+                           generator.observer_elevation, 0.0, 0.0, 0.0, 0.0, 0.0)
+    expected += b''.join(
+        struct.pack('<IIffffII', event['timestamp'], event['event_type'], event['azimuth_deg'],
+                    event['altitude_deg'], event['phase'], event['distance_km'],
+                    event.get('from_planet_id', 0), event.get('to_planet_id', 0))
+        for event in events
+    )
+    assert filename.read_bytes() == expected
+
+
+def test_record_block_is_one_struct_pack_per_record(tmp_path):
+    records = np.zeros(3, dtype=STREAM_RECORD_DTYPE)
+    records['timestamp'] = [1, 2, 4294967295]
+    records['phase'] = [0.5, -0.0, 1e-30]
+    records['distance_km'] = [384400.123, np.inf, 1e10]
+    filename = tmp_path / 'block.bin'
+    with open(filename, 'wb') as f:
+        write_record_block(f, records, STREAM_RECORD_DTYPE)
+    assert filename.read_bytes() == b''.join(struct.pack('<Iffff', *record) for record in records.tolist())
+
+
+def test_chunk_steps_align_to_the_transit_check_grid():
+    assert align_chunk_steps(10080, 60) == 10080
+    assert align_chunk_steps(1000, 60) == 1020
+    assert align_chunk_steps(1, 7) == 1800
+    assert align_chunk_steps(5, 3600) == 5
+
+
+def test_streaming_planet_transits_match_a_single_run(kernel_dir, tmp_path):
+    # Six closest-planet changes; 50-minute chunks used to leave 20 minutes of each unchecked
+    generator = DualFileEphemerisGenerator(*OBSERVER, detectors=['planet_transit'])
+    start, end = datetime(2025, 6, 20, tzinfo=utc), datetime(2025, 6, 27, tzinfo=utc)
+    _, events = generator.generate_dual_files('moon', start, end, 300)
+    generator.write_binary_events(events, tmp_path / 'batch_events.bin', 'moon')
+    generator.generate_streaming_files('moon', start, end, 300, tmp_path / 'stream.bin',
+                                       tmp_path / 'events.bin', chunk_steps=10)
+
+    assert len(events) == 6
+    assert (tmp_path / 'events.bin').read_bytes() == (tmp_path / 'batch_events.bin').read_bytes()
+
+
+def test_streaming_handles_a_last_chunk_of_one_sample(kernel_dir, tmp_path):
+    # 289 samples in chunks of 144: the last chunk starts at the end date
+    generator = DualFileEphemerisGenerator(*OBSERVER, detectors=['rise_set'])
+    start, end = datetime(2025, 6, 10, tzinfo=utc), datetime(2025, 6, 12, tzinfo=utc)
+    _, events = generator.generate_dual_files('moon', start, end, 600)
+    record_count, event_count = generator.generate_streaming_files(
+        'moon', start, end, 600, tmp_path / 'stream.bin', tmp_path / 'events.bin', chunk_steps=144
+    )
+
+    assert record_count == 289
+    assert event_count == len(events)
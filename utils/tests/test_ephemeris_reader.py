@@ -0,0 +1,77 @@
+from datetime import datetime
+import numpy as np
+import pytest
+from skyfield.api import utc
+
+from ephemeries import EVENT_PERIGEE, EVENT_RISE, EVENT_SET
+from ephemeris_reader import EventFileReader, StreamFileReader
+
+START = datetime(2025, 6, 10, tzinfo=utc)
+END = datetime(2025, 6, 13, tzinfo=utc)
+INTERVAL = 600
+
+
+@pytest.fixture(scope='module')
+def moon_files(generator, tmp_path_factory):
+    """EPHS/EVTS files for three days of the Moon, with the records and events they were written from."""
+    directory = tmp_path_factory.mktemp('reader')
+    records, events = generator.generate_dual_files('moon', START, END, INTERVAL)
+    generator.write_binary_stream(records, directory / 'stream.bin', 'moon', START, END, INTERVAL)
+    generator.write_binary_events(events, directory / 'events.bin', 'moon')
+    return directory, records, events
+
+
+def test_stream_lookup_lands_on_the_record_at_or_before(moon_files):
+    directory, records, _ = moon_files
+    reader = StreamFileReader(directory / 'stream.bin')
+    first = int(records[0]['timestamp'])
+
+    assert len(reader) == len(records)
+    for index in (0, 1, 217):
+        timestamp = first + index * INTERVAL
+        assert reader.find_record(timestamp).tobytes() == records[index].tobytes()
+        assert reader.find_record(timestamp + INTERVAL - 1).tobytes() == records[index].tobytes()
+    assert reader.find_record(int(records[-1]['timestamp'])).tobytes() == records[-1].tobytes()
+    assert reader.find_record(first - 1) is None
+    assert reader.find_record(int(records[-1]['timestamp']) + 1) is None
+    assert reader.find_records(first + INTERVAL, first + 3 * INTERVAL).tobytes() == records[1:4].tobytes()
+
+
+def test_event_lookups_match_a_linear_scan(moon_files):
+    directory, _, events = moon_files
+    reader = EventFileReader(directory / 'events.bin')
+    timestamps = [event['timestamp'] for event in events]
+
+    assert len(reader) == len(events)
+    for from_timestamp in range(timestamps[0] - 1, timestamps[-1] + 2, 997):
+        for event_type in (None, EVENT_RISE, EVENT_SET, EVENT_PERIGEE, 99):
+            expected = next((event for event in events if event['timestamp'] >= from_timestamp
+                             and event_type in (None, event['event_type'])), None)
+            found = reader.get_next_event(from_timestamp, event_type)
+            if expected is None:
+                assert found is None
+            else:
+                assert (int(found['timestamp']), int(found['event_type'])) == \
+                    (expected['timestamp'], expected['event_type'])
+
+    middle = timestamps[len(timestamps) // 2]
+    rises = reader.find_events(timestamps[0], middle, EVENT_RISE)
+    assert rises['timestamp'].tolist() == [event['timestamp'] for event in events
+                                           if event['event_type'] == EVENT_RISE and event['timestamp'] <= middle]
+
+
+def test_rare_event_type_is_found_past_many_others(generator, tmp_path):
+    # One perigee after 100 000 rises: the typed search must not walk the rises
+    count = 100000
+    events = [{'timestamp': 1000 + i, 'event_type': EVENT_RISE, 'azimuth_deg': 0.0, 'altitude_deg': 0.0,
+               'phase': 0.0, 'distance_km': 0.0} for i in range(count)]
+    events.append(dict(events[-1], timestamp=1000 + count, event_type=EVENT_PERIGEE, distance_km=356000.0))
+    generator.write_binary_events(events, tmp_path / 'events.bin', 'moon')
+    reader = EventFileReader(tmp_path / 'events.bin')
+
+    perigee = reader.get_next_event(1000, EVENT_PERIGEE)
+    assert int(perigee['timestamp']) == 1000 + count
+    assert float(perigee['distance_km']) == 356000.0
+    assert reader.get_next_event(1001 + count, EVENT_PERIGEE) is None
+    assert reader.get_next_event(1000 + count, EVENT_RISE) is None
+    assert np.array_equal(reader.find_events(1500, 1502, EVENT_RISE)['timestamp'], [1500, 1501, 1502])
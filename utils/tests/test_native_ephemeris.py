@@ -0,0 +1,89 @@
+from datetime import datetime
+import numpy as np
+import pytest
+from skyfield.api import utc
+from skyfield.nutationlib import iau2000a_radians
+
+from de430 import DE430_COEFFICIENTS, convert_ascii_files
+from ephemeries import SkyfieldBackend, utc_sample_times
+from native_ephemeris import NATIVE_BODIES, SKYFIELD_TOLERANCES, NativeBackend
+
+START = datetime(2025, 6, 10, tzinfo=utc)
+DE_START_JD = 2414864.5  # First DE421/DE430 record; both solutions share the GROUP 1050 layout
+RECORD_DAYS = 32
+# (center, target) segments of de421.bsp in record order; the Moon is geocentric in DE files
+DE_SEGMENTS = [(0, 1), (0, 2), (0, 3), (0, 4), (0, 5), (0, 6), (0, 7), (0, 8), (0, 9), 'moon', (0, 10)]
+NUTATION_LIBRATION_COEFFICIENTS = 2 * 4 * 10 + 3 * 4 * 10
+
+
+def de_records(spk, first, count):
+    """DE ASCII blocks for records `first` .. `first + count - 1`, built from de421.bsp segments."""
+    segments = {(s.center, s.target): s.load_array() for s in spk.segments}
+    # load_array() gives (initial JD, days per granule, coefficients[component, granule, k])
+    segments['moon'] = (None, 4.0, segments[(3, 301)][2] - segments[(3, 399)][2])
+    blocks = []
+    for record in range(first, first + count):
+        values = [DE_START_JD + RECORD_DAYS * record, DE_START_JD + RECORD_DAYS * (record + 1)]
+        for key in DE_SEGMENTS:
+            _, granule_days, coefficients = segments[key]
+            subintervals = round(RECORD_DAYS / granule_days)
+            # DE records hold (granule, component, k)
+            granules = coefficients[:, record * subintervals:(record + 1) * subintervals].transpose(1, 0, 2)
+            values.extend(granules.ravel())
+        values.extend([0.0] * NUTATION_LIBRATION_COEFFICIENTS)
+        assert len(values) == DE430_COEFFICIENTS
+        blocks.append(values)
+    return blocks
+
+
+@pytest.fixture(scope='module')
+def native_backend(generator, tmp_path_factory):
+    """Native backend over a DE-format store converted from the de421.bsp records around START."""
+    directory = tmp_path_factory.mktemp('de')
+    first = int((generator.ts.from_datetime(START).tdb - DE_START_JD) // RECORD_DAYS) - 1
+    ascii_file = directory / 'ascp2000.430'
+    with open(ascii_file, 'w') as f:
+        for number, values in enumerate(de_records(generator.planets.spk, first, 3), 1):
+            values = values + [0.0] * (-len(values) % 3)
+            f.write(f"{number} {DE430_COEFFICIENTS}\n")
+            f.write('\n'.join(' '.join(repr(float(v)) for v in values[i:i + 3]) for i in range(0, len(values), 3)) + '\n')
+    store = directory / 'de.ephd'
+    convert_ascii_files([ascii_file], store)
+    return NativeBackend(generator, store)
+
+
+def test_prepared_time_nutation_matches_iau2000a(native_backend, generator):
+    t = native_backend.prepare_time(utc_sample_times(generator.ts, START, 1440, 60))
+    d_psi, d_eps = t._nutation_angles_radians
+    expected_psi, expected_eps = iau2000a_radians(t)
+    limit = np.radians(20e-6 / 3600.0)  # 20 µas
+    assert np.max(np.abs(d_psi - expected_psi)) < limit
+    assert np.max(np.abs(d_eps - expected_eps)) < limit
+
+
+def test_native_backend_matches_skyfield_within_tolerances(native_backend, generator):
+    bodies = generator.resolve_bodies(list(NATIVE_BODIES))
+    t = utc_sample_times(generator.ts, START, 7 * 24 * 6, 600)  # One week every 10 minutes
+    expected = SkyfieldBackend(generator).stream_channels(bodies, t)
+    actual = native_backend.stream_channels(bodies, t)
+
+    for name in bodies:
+        differences = {
+            channel: np.abs(actual[name][channel] - expected[name][channel])
+            for channel in ('phase', 'distance_km', 'altitude_deg')
+        }
+        azimuth = (actual[name]['azimuth_deg'] - expected[name]['azimuth_deg'] + 180.0) % 360.0 - 180.0
+        differences['azimuth_deg'] = np.abs(azimuth) * np.cos(np.radians(expected[name]['altitude_deg']))
+        for channel, difference in differences.items():
+            assert difference.max() <= SKYFIELD_TOLERANCES[channel], (name, channel, difference.max())
+
+
+def test_native_backend_rejects_bodies_outside_de430(native_backend, generator):
+    t = utc_sample_times(generator.ts, START, 2, 60)
+    with pytest.raises(ValueError, match='pluto'):
+        native_backend.stream_channels({'pluto': None}, t)
+
+
+def test_native_backend_needs_a_store(generator, tmp_path):
+    with pytest.raises(FileNotFoundError, match='de430.py'):
+        NativeBackend(generator, tmp_path / 'missing.ephd')
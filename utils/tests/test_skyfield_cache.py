@@ -0,0 +1,59 @@
+from datetime import datetime
+import numpy as np
+from skyfield.api import utc
+
+from ephemeries import SkyfieldCache, unix_times
+
+START = datetime(2025, 6, 10, tzinfo=utc)
+STREAM_START = 1749513600  # 2025-06-10 00:00 UTC
+
+
+def test_subset_of_cached_instants_needs_no_evaluation(generator):
+    cache = SkyfieldCache(generator.earth, generator.observer)
+    moon = generator.resolve_bodies(['moon'])['moon']
+    t = unix_times(generator.ts, STREAM_START + np.arange(100) * 600)
+    cache.apparent(moon, t)
+    evaluations = cache.evaluations
+
+    for subset in (t[[3, 50, 7]], t[42]):
+        gathered = cache.apparent(moon, subset)
+        fresh = (generator.earth + generator.observer).at(subset).observe(moon).apparent()
+        assert np.array_equal(gathered.xyz.au, fresh.xyz.au)
+        for gathered_angle, fresh_angle in zip(gathered.altaz()[:2] + gathered.hadec()[:1],
+                                               fresh.altaz()[:2] + fresh.hadec()[:1]):
+            assert np.array_equal(gathered_angle.radians, fresh_angle.radians)
+    assert cache.evaluations == evaluations
+    assert cache.hits == 2
+
+    # Another body at the same instants, and an instant never evaluated, are not reused
+    cache.apparent(generator.sun, t[:3])
+    cache.apparent(moon, unix_times(generator.ts, [STREAM_START + 1]))
+    assert cache.hits == 2
+
+
+def test_culmination_detector_reuses_stream_positions(generator):
+    body = generator.resolve_bodies(['moon'])['moon']
+    generator.cache.clear()
+    records = generator.calculate_stream_chunk(body, 'moon', START, 3 * 144, 600)
+    transits = np.count_nonzero(np.diff(np.sin(np.radians(records['azimuth_deg'])) > 0))
+    stream_evaluations = generator.cache.evaluations
+
+    warm = generator.find_altitude_events(records, 'moon')
+    warm_evaluations = generator.cache.evaluations - stream_evaluations
+    generator.cache.clear()
+    cold = generator.find_altitude_events(records, 'moon')
+
+    assert warm == cold
+    assert transits >= 5
+    # The samples on both sides of every transit, observer and apparent positions, came from the stream
+    assert generator.cache.evaluations - warm_evaluations == 2 * 2 * transits
+
+
+def test_cache_holds_at_most_max_bytes(generator):
+    moon = generator.resolve_bodies(['moon'])['moon']
+    cache = SkyfieldCache(generator.earth, generator.observer, max_bytes=1024 * 1024)
+    for day in range(20):
+        cache.apparent(moon, unix_times(generator.ts, STREAM_START + day * 86400 + np.arange(1440) * 60))
+        assert cache.cached_bytes <= cache.max_bytes
+    assert 0 < len(cache.entries) < 40
+    assert cache.cached_bytes == sum(nbytes for _, _, nbytes in cache.entries.values())
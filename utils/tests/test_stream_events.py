@@ -0,0 +1,65 @@
+from datetime import datetime
+import numpy as np
+import pytest
+from skyfield.api import utc
+
+from ephemeries import (
+    CUSTOM_EPOCH_OFFSET, EVENT_ANTI_CULMINATION, EVENT_APOGEE, EVENT_CULMINATION, EVENT_PERIGEE, unix_times
+)
+
+INTERVAL = 600
+
+
+def events_of_type(generator, celestial_body, start, end, event_type):
+    _, events = generator.generate_dual_files(celestial_body, start, end, INTERVAL)
+    return [event for event in events if event['event_type'] == event_type]
+
+
+def range_rate_zero(generator, celestial_body, around):
+    """Unix time, to 0.1 s, where the geometric Earth-body range rate changes sign within two minutes of `around`.
+
+    Found independently of the detector's bisection, on a dense grid.
+    """
+    body = generator.resolve_bodies([celestial_body])[celestial_body]
+    seconds = np.arange(-1200, 1201) / 10.0
+    position = (body - generator.earth).at(unix_times(generator.ts, around + seconds))
+    receding = np.sum(position.xyz.au * position.velocity.au_per_d, axis=0) > 0
+    changes = np.flatnonzero(receding[:-1] != receding[1:])
+    assert len(changes) == 1
+    return around + seconds[changes[0]]
+
+
+@pytest.mark.parametrize('celestial_body, start, end, event_type, published', [
+    # Perihelion and aphelion 2025 as the USNO lists them, to the minute
+    ('sun', datetime(2025, 1, 2, tzinfo=utc), datetime(2025, 1, 7, tzinfo=utc), EVENT_PERIGEE,
+     datetime(2025, 1, 4, 13, 28, tzinfo=utc)),
+    ('sun', datetime(2025, 7, 1, tzinfo=utc), datetime(2025, 7, 6, tzinfo=utc), EVENT_APOGEE,
+     datetime(2025, 7, 3, 19, 55, tzinfo=utc)),
+    ('moon', datetime(2025, 6, 21, tzinfo=utc), datetime(2025, 6, 25, tzinfo=utc), EVENT_PERIGEE, None),
+])
+def test_distance_extremum_lands_within_a_second(generator, celestial_body, start, end, event_type, published):
+    events = events_of_type(generator, celestial_body, start, end, event_type)
+    assert len(events) == 1
+    # Event timestamps are whole seconds, truncated
+    unix_time = events[0]['timestamp'] + CUSTOM_EPOCH_OFFSET
+    assert 0 <= range_rate_zero(generator, celestial_body, unix_time) - unix_time < 1
+    if published is not None:
+        assert abs(unix_time - published.timestamp()) <= 30
+
+
+def test_culminations_land_on_the_meridian(generator):
+    body = generator.resolve_bodies(['moon'])['moon']
+    start, end = datetime(2025, 6, 10, tzinfo=utc), datetime(2025, 6, 13, tzinfo=utc)
+    _, events = generator.generate_dual_files('moon', start, end, INTERVAL)
+    culminations = [event for event in events if event['event_type'] in (EVENT_CULMINATION, EVENT_ANTI_CULMINATION)]
+    # One upper and one lower transit per lunar day
+    assert 5 <= len(culminations) <= 6
+
+    timestamps = np.array([event['timestamp'] for event in culminations]) + CUSTOM_EPOCH_OFFSET
+    observer = generator.earth + generator.observer
+    before, _, _ = observer.at(unix_times(generator.ts, timestamps)).observe(body).apparent().hadec()
+    after, _, _ = observer.at(unix_times(generator.ts, timestamps + 1)).observe(body).apparent().hadec()
+    for event, hours_before, hours_after in zip(culminations, before.hours, after.hours):
+        # The hour angle changes sign within the second after the truncated timestamp
+        assert hours_before < 0 <= hours_after or hours_before >= 0 > hours_after
+        assert (event['event_type'] == EVENT_CULMINATION) == (abs(hours_before) < 6)